@@ -0,0 +1,15 @@
+""" Main file for benchmarking the encoder over synthetic graphs compliant with the OntoUML Vocabulary. """
+
+from modules.benchmark import run_benchmark, save_benchmark_results, treat_benchmark_arguments
+from modules.logger import initialize_logger
+
+if __name__ == '__main__':
+    logger = initialize_logger()
+    benchmark_arguments = treat_benchmark_arguments()
+
+    benchmark_results = run_benchmark(benchmark_arguments["depths"], benchmark_arguments["fan_outs"],
+                                      benchmark_arguments["diagram_counts"], benchmark_arguments["repetitions"],
+                                      benchmark_arguments["seed"])
+
+    results_path = save_benchmark_results(benchmark_results, benchmark_arguments["output_path"])
+    logger.info(f"Benchmark results saved at {results_path}.")
@@ -1,24 +1,72 @@
 """ Main file for encoding a graph into a OntoUML-Schema JSON. """
+import os
 import time
+from typing import TYPE_CHECKING
 
-from modules.encoder.encoder_main import encode_graph_to_json
-from modules.io_graph import load_all_graph_safely
-from modules.io_json import save_json_file
+from modules.batch import encode_batch, is_batch_source
+from modules.cache import get_cache_key, get_cached_json_file, log_cache_statistics, restore_cached_json_file, \
+    store_json_file_in_cache, CACHE_SIZE_DEFAULT
+from modules.instrumentation import create_instrumentation_report, finish_instrumentation_report, \
+    log_instrumentation_report, measure_stage, save_instrumentation_report
+from modules.io_json import get_json_output_path, get_json_path_compression, safe_load_json_file, save_json_file, \
+    JSON_STANDARD_OUTPUT
 from modules.logger import initialize_logger
 from modules.utils import get_date_time
-from src.modules.arguments import ARGUMENTS
+from src.modules.arguments import treat_user_arguments
+from src.modules.globals import GRAPH_STORE_BACKEND_DEFAULT
 
+if TYPE_CHECKING:
+    from modules.async_api import AsyncEncoder
 
-def encode_ontouml_graph2json(graph_file_path: str, execution_mode: str = "production") -> dict:
+
+def encode_ontouml_graph2json(graph_file_path: str, execution_mode: str = "production", cache_directory: str = None,
+                              cache_size: int = CACHE_SIZE_DEFAULT, store_directory: str = None,
+                              store_backend: str = GRAPH_STORE_BACKEND_DEFAULT, instrumentation: bool = False,
+                              parallel_workers: int = None, memory_budget: int = None, output_path: str = None,
+                              compression: str = None, return_json_data: bool = True) -> dict | None:
     """ Main function for ontouml-graph2json. Encodes a graph that complies with the OntoUML Vocabulary in a JSON file
     that complies with the OntoUML Schema.
 
+    If a cache directory is provided, the JSON output of a previous encoding of the same file (with the same encoder
+    version) is reused from the cache instead of encoding the graph again. The cached file is copied to the output
+    without being parsed, unless its dictionary must be returned.
+
     :param graph_file_path: Path to the Graph file to be encoded, provided by the user.
     :type graph_file_path: str
     :param execution_mode: Information about execution mode. Valid values are 'production' (default) and 'test'.
     :type execution_mode: str
-    :return: Generated output dictionary that is going to be saved in JSON format. Used for testing.
-    :rtype: dict
+    :param cache_directory: Path to the cache directory. If None (default), the cache is not used.
+    :type cache_directory: str
+    :param cache_size: Maximum size of the cache directory, in megabytes.
+    :type cache_size: int
+    :param store_directory: Directory of the persistent graph stores. If None (default), no persistent store is used.
+    :type store_directory: str
+    :param store_backend: Name of the rdflib store plugin used for the persistent graph stores.
+    :type store_backend: str
+    :param instrumentation: If True, the wall time, CPU time, peak memory and counts of each stage are logged and
+    saved as a JSON report next to the output file.
+    :type instrumentation: bool
+    :param parallel_workers: Maximum number of worker processes used for encoding the graph's package subtrees in
+    parallel. If None (default), the graph is encoded by the current process.
+    :type parallel_workers: int
+    :param memory_budget: Maximum size of the intermediate objects kept in memory, in megabytes. When provided, the
+    objects that exceed it are spilled into a temporary file and the JSON file is written while the objects are
+    mounted, so the output dictionary is never in memory (and parallel_workers is ignored). If None (default), there
+    is no memory budget.
+    :type memory_budget: int
+    :param output_path: Path of the JSON file or '-' (io_json.JSON_STANDARD_OUTPUT) for writing it to the standard
+    output. If None (default), the file is saved in the results directory. Outputs written to the standard output
+    are not stored in the cache.
+    :type output_path: str
+    :param compression: Compression of the JSON file ('gzip', 'bz2' or 'xz'). If None (default), it is obtained from
+    the output path's extension (e.g., '.json.gz') and the file is not compressed if there is none.
+    :type compression: str
+    :param return_json_data: If False, the output dictionary is not returned (e.g., when called from the command line),
+    so outputs restored from the cache are never parsed. Default is True.
+    :type return_json_data: bool
+    :return: Generated output dictionary that is going to be saved in JSON format (or None, if a memory budget is
+    provided or if return_json_data is False). Used for testing.
+    :rtype: dict | None
     """
 
     logger = initialize_logger(execution_mode)
@@ -31,11 +79,38 @@ def encode_ontouml_graph2json(graph_file_path: str, execution_mode: str = "produ
 
         logger.info(f"OntoUML Graph2JSON encoder started on {start_date_time}!")
 
-    # Load Graph
-    ontology_graph = load_all_graph_safely(graph_file_path)
+    instrumentation_report = create_instrumentation_report() if instrumentation else None
+
+    if compression is None and output_path is not None:
+        compression = get_json_path_compression(output_path)
+
+    cache_key = get_cache_key(graph_file_path, compression) if cache_directory else None
+    cached_file_path = get_cached_json_file(cache_key, cache_directory) if cache_key else None
+
+    if cached_file_path:
+        # Reuse the cached JSON output
+        with measure_stage(instrumentation_report, "restore_cached_json"):
+            output_file_path = output_path or get_json_output_path(graph_file_path, compression)
+            restore_cached_json_file(cached_file_path, output_file_path)
 
-    # Encode Graph into JSON dictionary
-    json_data = encode_graph_to_json(ontology_graph)
+        # Parsed only if returned (never with a memory budget, as encoded outputs are not returned either)
+        json_data = safe_load_json_file(cached_file_path) if return_json_data and memory_budget is None else None
+    elif memory_budget is not None:
+        # Imported only when needed, as importing the encoder (and rdflib) takes most of the start-up time
+        from modules.encoder.encoder_main import encode_graph_file_to_json_file
+
+        # Load and encode Graph directly into the JSON file
+        output_file_path = output_path or get_json_output_path(graph_file_path, compression)
+        encode_graph_file_to_json_file(graph_file_path, output_file_path, memory_budget, store_directory,
+                                       store_backend, instrumentation_report, compression=compression)
+        json_data = None
+    else:
+        # Imported only when needed, as importing the encoder (and rdflib) takes most of the start-up time
+        from modules.encoder.encoder_main import encode_graph_file_to_json
+
+        # Load and encode Graph into JSON dictionary
+        json_data = encode_graph_file_to_json(graph_file_path, store_directory, store_backend, instrumentation_report,
+                                              parallel_workers)
 
     if execution_mode == "production":
         # Get software's execution conclusion time
@@ -45,12 +120,142 @@ def encode_ontouml_graph2json(graph_file_path: str, execution_mode: str = "produ
 
         logger.info(f"Encoding concluded on {end_date_time}. Total execution time: {elapsed_time} seconds.")
 
-    # Save JSON file
-    output_file_path = save_json_file(json_data, graph_file_path)
-    logger.info(f"Output JSON file successfully saved at {output_file_path}.")
+    if not cached_file_path:
+        # Save JSON file (already written when there is a memory budget)
+        if memory_budget is None:
+            with measure_stage(instrumentation_report, "save"):
+                output_file_path = save_json_file(json_data, graph_file_path, output_path=output_path,
+                                                  compression=compression)
+
+        if cache_key and output_file_path != JSON_STANDARD_OUTPUT:
+            store_json_file_in_cache(output_file_path, cache_key, cache_directory, cache_size)
+
+    if output_file_path == JSON_STANDARD_OUTPUT:
+        logger.info("Output JSON successfully written to the standard output.")
+    else:
+        logger.info(f"Output JSON file successfully saved at {output_file_path}.")
+
+    if cache_directory:
+        log_cache_statistics(cache_directory)
+
+    if instrumentation:
+        finish_instrumentation_report(instrumentation_report)
+        log_instrumentation_report(instrumentation_report)
+        # Outputs written to the standard output have their reports saved in the results directory
+        if output_file_path == JSON_STANDARD_OUTPUT:
+            output_file_path = get_json_output_path(graph_file_path)
+        report_path = save_instrumentation_report(instrumentation_report, output_file_path)
+        logger.info(f"Instrumentation report saved at {report_path}.")
+
+    return json_data if return_json_data else None
+
+
+def decode_ontouml_json2graph(json_file_path: str, graph_format: str = "turtle", execution_mode: str = "production",
+                              output_path: str = None) -> str:
+    """ Reverse of encode_ontouml_graph2json. Decodes a JSON file that complies with the OntoUML Schema into a graph
+    file that complies with the OntoUML Vocabulary, saved with the received format. The JSON file is read iteratively
+    and N-Triples files are written while it is read (see decoder_main).
+
+    :param json_file_path: Path to the JSON file to be decoded, provided by the user.
+    :type json_file_path: str
+    :param graph_format: rdflib format of the graph file (e.g., 'turtle' or 'nt').
+    :type graph_format: str
+    :param execution_mode: Information about execution mode. Valid values are 'production' (default) and 'test'.
+    :type execution_mode: str
+    :param output_path: Path of the graph file. If None (default), the file is saved in the results directory.
+    :type output_path: str
+    :return: Path of the saved graph file.
+    :rtype: str
+    """
+
+    logger = initialize_logger(execution_mode)
+
+    # Imported only when needed, as importing the decoder (and rdflib) takes most of the start-up time
+    from modules.decoder.decoder_main import decode_json_file_to_graph_file
+    from modules.io_graph import get_graph_output_path
+
+    st = time.perf_counter()
 
-    return json_data
+    output_file_path = output_path or get_graph_output_path(json_file_path, graph_format)
+    number_triples = decode_json_file_to_graph_file(json_file_path, output_file_path, graph_format)
+
+    elapsed_time = round((time.perf_counter() - st), 3)
+    logger.info(f"{number_triples} triples decoded in {elapsed_time} seconds. "
+                f"Output graph file successfully saved at {output_file_path}.")
+
+    return output_file_path
+
+
+async def encode_ontouml_graph2json_async(async_encoder: "AsyncEncoder", graph_file_path: str,
+                                          execution_mode: str = "production", cache_directory: str = None,
+                                          cache_size: int = CACHE_SIZE_DEFAULT, store_directory: str = None,
+                                          store_backend: str = GRAPH_STORE_BACKEND_DEFAULT,
+                                          instrumentation: bool = False, parallel_workers: int = None,
+                                          memory_budget: int = None, output_path: str = None, compression: str = None,
+                                          return_json_data: bool = True, timeout: float = None) -> dict | None:
+    """ Asynchronous version of encode_ontouml_graph2json, for asyncio applications. The whole encoding (including
+    reading the graph file and saving the JSON file) is executed by the async_encoder's executor, respecting its
+    concurrency limit, so that the event loop is not blocked. The arguments are the same as the ones of
+    encode_ontouml_graph2json.
+
+    :param async_encoder: Encoder that runs the encoding (see modules.async_api.AsyncEncoder).
+    :type async_encoder: AsyncEncoder
+    :param graph_file_path: Path to the Graph file to be encoded, provided by the user.
+    :type graph_file_path: str
+    :param execution_mode: Information about execution mode. Valid values are 'production' (default) and 'test'.
+    :type execution_mode: str
+    :param cache_directory: Path to the cache directory. If None (default), the cache is not used.
+    :type cache_directory: str
+    :param cache_size: Maximum size of the cache directory, in megabytes.
+    :type cache_size: int
+    :param store_directory: Directory of the persistent graph stores. If None (default), no persistent store is used.
+    :type store_directory: str
+    :param store_backend: Name of the rdflib store plugin used for the persistent graph stores.
+    :type store_backend: str
+    :param instrumentation: If True, the wall time, CPU time, peak memory and counts of each stage are logged and
+    saved as a JSON report next to the output file.
+    :type instrumentation: bool
+    :param parallel_workers: Maximum number of worker processes used for encoding the graph's package subtrees in
+    parallel. If None (default), the graph is encoded by the executor's worker.
+    :type parallel_workers: int
+    :param memory_budget: Maximum size of the intermediate objects kept in memory, in megabytes. If None (default),
+    there is no memory budget.
+    :type memory_budget: int
+    :param output_path: Path of the JSON file or '-' (io_json.JSON_STANDARD_OUTPUT) for writing it to the standard
+    output. If None (default), the file is saved in the results directory.
+    :type output_path: str
+    :param compression: Compression of the JSON file ('gzip', 'bz2' or 'xz'). If None (default), it is obtained from
+    the output path's extension.
+    :type compression: str
+    :param return_json_data: If False, the output dictionary is not returned (nor sent back by the executor's worker).
+    Default is True.
+    :type return_json_data: bool
+    :param timeout: Maximum time in seconds for the encoding. If None (default), there is no timeout.
+    :type timeout: float
+    :return: Generated output dictionary that is going to be saved in JSON format (or None, if a memory budget is
+    provided or if return_json_data is False).
+    :rtype: dict | None
+    :raises asyncio.TimeoutError: If the timeout expires.
+    """
+
+    return await async_encoder.run(encode_ontouml_graph2json, graph_file_path, execution_mode, cache_directory,
+                                   cache_size, store_directory, store_backend, instrumentation, parallel_workers,
+                                   memory_budget, output_path, compression, return_json_data, timeout=timeout)
 
 
 if __name__ == '__main__':
-    encode_ontouml_graph2json(ARGUMENTS["graph_path"], "production")
+    ARGUMENTS = treat_user_arguments()
+
+    if ARGUMENTS["decode_format"]:
+        decode_ontouml_json2graph(ARGUMENTS["graph_path"], ARGUMENTS["decode_format"], "production",
+                                  ARGUMENTS["output_path"])
+    elif is_batch_source(ARGUMENTS["graph_path"]):
+        encode_batch(ARGUMENTS["graph_path"], ARGUMENTS["workers"], ARGUMENTS["cache_directory"],
+                     ARGUMENTS["cache_size"], ARGUMENTS["store_directory"], ARGUMENTS["store_backend"],
+                     ARGUMENTS["instrumentation"], ARGUMENTS["compression"])
+    else:
+        parallel_workers = (ARGUMENTS["workers"] or os.cpu_count() or 1) if ARGUMENTS["parallel"] else None
+        encode_ontouml_graph2json(ARGUMENTS["graph_path"], "production", ARGUMENTS["cache_directory"],
+                                  ARGUMENTS["cache_size"], ARGUMENTS["store_directory"], ARGUMENTS["store_backend"],
+                                  ARGUMENTS["instrumentation"], parallel_workers, ARGUMENTS["memory_budget"],
+                                  ARGUMENTS["output_path"], ARGUMENTS["compression"], return_json_data=False)
@@ -1,48 +1,116 @@
-""" Contains the definitions of the arguments to be provided by the user. Publishes the arguments (as the global
-variable ARGUMENTS of type dictionary) to be used in other modules whenever necessary. """
+""" Contains the definitions of the arguments to be provided by the user. The arguments are parsed only when
+treat_user_arguments is called by the entry point, so that importing this module has no side effects. Only lightweight
+modules are imported, so that options like --help and --version are answered without loading the encoder. """
 
 import argparse
 
-from src.modules.globals import METADATA
+from src.modules.globals import get_metadata, CACHE_SIZE_DEFAULT, GRAPH_SNAPSHOT_BACKEND, GRAPH_STORE_BACKEND_DEFAULT
 from src.modules.logger import initialize_logger
 
-LOGGER = initialize_logger()
 
-
-def treat_user_arguments() -> dict:
+def treat_user_arguments(arguments_list: list[str] = None) -> dict:
     """ Treat arguments provided by the user when starting software execution.
 
+    :param arguments_list: List of arguments to be parsed. If None (default), the command line arguments are parsed.
+    :type arguments_list: list[str]
     :return: Dictionary containing all arguments provided by the user.
     :rtype: dict
     """
 
-    about_message = METADATA["name"] + " - version " + METADATA["version"]
+    metadata = get_metadata()
+    about_message = metadata["name"] + " - version " + metadata["version"]
 
     # PARSING ARGUMENTS
-    args_parser = argparse.ArgumentParser(prog=METADATA["name"],
-                                          description=METADATA["description"] + ". Version: " + METADATA["version"],
+    args_parser = argparse.ArgumentParser(prog=metadata["name"],
+                                          description=metadata["description"] + ". Version: " + metadata["version"],
                                           allow_abbrev=False,
-                                          epilog="More information at: " + METADATA["homepage"])
+                                          epilog="More information at: " + metadata["homepage"])
 
     args_parser.version = about_message
 
     # POSITIONAL ARGUMENT
     args_parser.add_argument("graph_file", type=str, action="store",
-                             help="The path of the graph file to be encoded.")
+                             help="The path of the graph file to be encoded. If a directory or a glob pattern is "
+                                  "provided, all its graph files are encoded in batch mode. In decode mode, the path "
+                                  "of the JSON file to be decoded.")
+
+    # OPTIONAL ARGUMENTS
+    args_parser.add_argument("-w", "--workers", type=int, action="store", default=None,
+                             help="Maximum number of worker processes used in batch mode or in parallel mode. "
+                                  "Default is the number of processors of the machine.")
+
+    args_parser.add_argument("-p", "--parallel", action="store_true", default=False,
+                             help="Encodes the package subtrees of a single (large) graph file in parallel worker "
+                                  "processes. Ignored in batch mode, which already encodes the files in parallel.")
+
+    args_parser.add_argument("-c", "--cache", type=str, action="store", default=None, metavar="CACHE_DIRECTORY",
+                             help="Directory of the on-disk cache of JSON outputs. When provided, unchanged graph "
+                                  "files are not encoded again. Default is not using the cache.")
+
+    args_parser.add_argument("-s", "--cache-size", type=int, action="store", default=CACHE_SIZE_DEFAULT,
+                             help="Maximum size of the cache directory in megabytes. The least recently used entries "
+                                  f"are evicted when it is exceeded. Default is {CACHE_SIZE_DEFAULT}.")
+
+    args_parser.add_argument("--store", type=str, action="store", default=None, metavar="STORE_DIRECTORY",
+                             help="Directory of the persistent graph stores. When provided, each graph file is parsed "
+                                  "once into its own store, which is reused while the file does not change. Default "
+                                  "is keeping the graph in memory.")
+
+    args_parser.add_argument("--store-backend", type=str, action="store", default=GRAPH_STORE_BACKEND_DEFAULT,
+                             help="Name of the rdflib store plugin used for the persistent graph stores. With "
+                                  f"'{GRAPH_SNAPSHOT_BACKEND}', each graph file is kept as a memory-mapped binary "
+                                  "snapshot of its triples instead, which is the fastest to load. "
+                                  f"Default is {GRAPH_STORE_BACKEND_DEFAULT}.")
+
+    args_parser.add_argument("--memory-budget", type=int, action="store", default=None, metavar="MEGABYTES",
+                             help="Maximum size in megabytes of the intermediate objects kept in memory. When "
+                                  "provided, the objects that exceed it are spilled into a temporary file and the "
+                                  "output is written without being assembled in memory. Takes precedence over the "
+                                  "parallel mode and is ignored in batch mode. Default is keeping all objects in "
+                                  "memory.")
+
+    args_parser.add_argument("-d", "--decode", type=str, action="store", default=None, metavar="GRAPH_FORMAT",
+                             help="Decodes the received OntoUML-Schema JSON file into a graph file with the given "
+                                  "rdflib format (e.g., 'nt' or 'turtle'), instead of encoding a graph file. "
+                                  "N-Triples is the fastest, as it is written while the JSON file is read.")
+
+    args_parser.add_argument("-o", "--output", type=str, action="store", default=None, metavar="OUTPUT_PATH",
+                             help="Path of the output file, or '-' for writing the JSON output to the standard "
+                                  "output. Ignored in batch mode. Default is saving the output in the results "
+                                  "directory, named after the input file.")
+
+    args_parser.add_argument("-z", "--compression", type=str, action="store", default=None,
+                             choices=["gzip", "bz2", "xz"],
+                             help="Compresses the JSON outputs while they are written. Default is obtained from the "
+                                  "extension of the output path (e.g., '.json.gz'), not compressing the outputs if "
+                                  "there is none.")
+
+    args_parser.add_argument("-i", "--instrumentation", action="store_true", default=False,
+                             help="Logs the wall time, CPU time, peak memory and counts of each encoding stage and "
+                                  "saves them in a JSON report next to each output file. Tracing the memory "
+                                  "allocations slows down the execution.")
 
     # AUTOMATIC ARGUMENTS
     args_parser.add_argument("-v", "--version", action="version", help="Prints the software version and exits.")
 
     # Execute arguments parser
-    arguments = args_parser.parse_args()
+    arguments = args_parser.parse_args(arguments_list)
 
     # Asserting dictionary keys
-    arguments_dictionary = {"graph_path": arguments.graph_file}
-
-    LOGGER.debug(f"Arguments parsed. Obtained values are: {arguments_dictionary}.")
+    arguments_dictionary = {"graph_path": arguments.graph_file,
+                            "workers": arguments.workers,
+                            "parallel": arguments.parallel,
+                            "cache_directory": arguments.cache,
+                            "cache_size": arguments.cache_size,
+                            "store_directory": arguments.store,
+                            "store_backend": arguments.store_backend,
+                            "memory_budget": arguments.memory_budget,
+                            "decode_format": arguments.decode,
+                            "output_path": arguments.output,
+                            "compression": arguments.compression,
+                            "instrumentation": arguments.instrumentation}
+
+    logger = initialize_logger()
+    logger.debug(f"Arguments parsed. Obtained values are: {arguments_dictionary}.")
 
     return arguments_dictionary
-
-
-global ARGUMENTS
-ARGUMENTS = treat_user_arguments()
@@ -0,0 +1,103 @@
+""" Asynchronous API of the encoder, for asyncio applications that run many encodings concurrently.
+
+Parsing, encoding and the files' reading and writing are offloaded to an executor (by default, a pool of worker
+processes), so that the event loop is never blocked. The number of encodings running at the same time is bounded by
+the AsyncEncoder's limit: further encodings wait (without blocking the loop) until a running one finishes.
+
+Encodings can be cancelled and can have a timeout. Encodings that are still waiting for the limit or for the executor
+never start. As worker processes cannot be interrupted, an encoding that is already running when it is cancelled (or
+when its timeout expires) is finished in the background and its result is discarded.
+"""
+
+import asyncio
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Callable
+
+from modules.encoder.encoder_main import encode_graph_data_to_json, encode_graph_file_to_json
+from src.modules.globals import GRAPH_STORE_BACKEND_DEFAULT
+
+
+class AsyncEncoder:
+    """ Runs encodings in an executor, bounding the number of encodings running at the same time.
+
+    If no executor is provided, a pool of max_concurrency worker processes is created when the first encoding is
+    requested and shut down by aclose (or when leaving the AsyncEncoder's async with block). Received executors are
+    not shut down by the AsyncEncoder.
+    """
+
+    def __init__(self, max_concurrency: int = None, executor: Executor = None):
+        self.max_concurrency = max_concurrency or os.cpu_count() or 1
+        self.executor = executor
+        self.owns_executor = executor is None
+        self.concurrency_limit = asyncio.Semaphore(self.max_concurrency)
+
+    async def __aenter__(self) -> "AsyncEncoder":
+        return self
+
+    async def __aexit__(self, *exception_information) -> None:
+        await self.aclose()
+
+    def get_executor(self) -> Executor:
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=self.max_concurrency)
+        return self.executor
+
+    async def run(self, function: Callable, *args, timeout: float = None):
+        """ Runs the function with the received arguments in the executor, once the concurrency limit allows it.
+
+        :param function: Function to be executed. Must be picklable if the executor is a pool of processes.
+        :type function: Callable
+        :param timeout: Maximum time in seconds for waiting for the limit and running the function. If None (default),
+        there is no timeout.
+        :type timeout: float
+        :return: Value returned by the function.
+        :raises asyncio.TimeoutError: If the timeout expires.
+        """
+
+        return await asyncio.wait_for(self.run_when_allowed(function, *args), timeout)
+
+    async def run_when_allowed(self, function: Callable, *args):
+        async with self.concurrency_limit:
+            return await asyncio.get_running_loop().run_in_executor(self.get_executor(), function, *args)
+
+    async def encode_file(self, graph_file_path: str, store_directory: str = None,
+                          store_backend: str = GRAPH_STORE_BACKEND_DEFAULT, timeout: float = None) -> dict:
+        """ Reads a graph file and encodes it into a JSON compliant with the OntoUML-Schema, without saving it.
+
+        :param graph_file_path: Path to the Graph file to be encoded.
+        :type graph_file_path: str
+        :param store_directory: Directory of the persistent stores. If None (default), no persistent store is used.
+        :type store_directory: str
+        :param store_backend: Name of the rdflib store plugin used for the persistent store.
+        :type store_backend: str
+        :param timeout: Maximum time in seconds for the encoding. If None (default), there is no timeout.
+        :type timeout: float
+        :return: JSON compliant with the OntoUML-Schema obtained from the received Graph file.
+        :rtype: dict
+        """
+
+        return await self.run(encode_graph_file_to_json, graph_file_path, store_directory, store_backend,
+                              timeout=timeout)
+
+    async def encode_data(self, graph_data: str | bytes, graph_format: str = "turtle", timeout: float = None) -> dict:
+        """ Parses a graph received as a string and encodes it into a JSON compliant with the OntoUML-Schema.
+
+        :param graph_data: Content of the graph.
+        :type graph_data: str | bytes
+        :param graph_format: rdflib parser format of the graph's content (e.g., 'turtle' or 'nt').
+        :type graph_format: str
+        :param timeout: Maximum time in seconds for the encoding. If None (default), there is no timeout.
+        :type timeout: float
+        :return: JSON compliant with the OntoUML-Schema obtained from the received graph.
+        :rtype: dict
+        """
+
+        return await self.run(encode_graph_data_to_json, graph_data, graph_format, timeout=timeout)
+
+    async def aclose(self) -> None:
+        """ Shuts down the executor created by the AsyncEncoder, waiting for its running encodings to finish. """
+
+        if self.owns_executor and self.executor is not None:
+            executor, self.executor = self.executor, None
+            await asyncio.get_running_loop().run_in_executor(None, executor.shutdown)
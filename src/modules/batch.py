@@ -0,0 +1,325 @@
+""" Functions for encoding several graph files in a single execution (batch mode), using a pool of processes. """
+
+import glob
+import os
+import time
+from pathlib import Path
+
+from modules.cache import get_cache_key, get_cached_json_file, log_cache_statistics, restore_cached_json_file, \
+    store_json_file_in_cache, CACHE_SIZE_DEFAULT
+from modules.graph_input import get_uncompressed_file_path
+from modules.instrumentation import create_instrumentation_report, finish_instrumentation_report, measure_stage, \
+    save_instrumentation_report
+from modules.io_json import save_json_file, safe_write_json_file, JSON_COMPRESSION_EXTENSIONS
+from modules.logger import get_logger, initialize_logger
+from modules.utils import create_directory_if_not_exists, get_date_time
+from src.modules.globals import GRAPH_STORE_BACKEND_DEFAULT
+
+LOGGER = get_logger()
+
+# Extensions of the files that are encoded when a directory is received
+GRAPH_FILE_EXTENSIONS = [".ttl", ".nt", ".nq", ".n3", ".rdf", ".owl", ".xml", ".jsonld", ".trig"]
+
+
+def is_batch_source(graph_source: str) -> bool:
+    """ Verifies if the graph source provided by the user refers to several files, i.e., if it is a directory or a glob
+    pattern.
+
+    :param graph_source: Path or glob pattern provided by the user.
+    :type graph_source: str
+    :return: True if the source must be encoded in batch mode. False otherwise.
+    :rtype: bool
+    """
+
+    # Existing files are never patterns, even if their names have the patterns' special characters
+    if os.path.isfile(graph_source):
+        return False
+
+    return os.path.isdir(graph_source) or any(character in graph_source for character in "*?[")
+
+
+def get_batch_graph_files(graph_source: str) -> list[str]:
+    """ Returns the sorted list of graph files referred by a directory or by a glob pattern. For directories, only the
+    files in its first level with extensions in GRAPH_FILE_EXTENSIONS (possibly followed by the extension of their
+    compression, e.g., '.ttl.gz') are returned.
+
+    :param graph_source: Directory path or glob pattern.
+    :type graph_source: str
+    :return: List of paths of the graph files to be encoded.
+    :rtype: list[str]
+    """
+
+    if os.path.isdir(graph_source):
+        list_graph_files = [os.path.join(graph_source, file_name) for file_name in os.listdir(graph_source)
+                            if Path(get_uncompressed_file_path(file_name)).suffix.lower() in GRAPH_FILE_EXTENSIONS]
+    else:
+        list_graph_files = [file_path for file_path in glob.glob(graph_source) if os.path.isfile(file_path)]
+
+    list_graph_files.sort()
+
+    return list_graph_files
+
+
+def get_batch_output_paths(list_graph_files: list[str], compression: str = None) -> dict[str, str]:
+    """ Returns the paths of the JSON outputs of the batch's graph files. The outputs are saved in the results directory
+    keeping the files' directories relative to the batch root (i.e., the deepest directory that contains all files), so
+    files with the same name in different directories have different outputs.
+
+    Files of the same directory with the same name but for their extensions (e.g., 'model.ttl' and 'model.nt') have
+    the same output path.
+
+    :param list_graph_files: List of paths of the graph files to be encoded.
+    :type list_graph_files: list[str]
+    :param compression: Compression of the JSON outputs, whose extension is appended to the paths. If None (default),
+    they are not compressed.
+    :type compression: str
+    :return: Dictionary with the output path of each graph file.
+    :rtype: dict[str, str]
+    """
+
+    if not list_graph_files:
+        return {}
+
+    batch_root = os.path.commonpath([os.path.dirname(os.path.abspath(graph_file)) for graph_file in list_graph_files])
+    results_directory = os.path.join(os.getcwd(), "results")
+
+    output_paths = {}
+
+    for graph_file in list_graph_files:
+        relative_directory = os.path.relpath(os.path.dirname(os.path.abspath(graph_file)), batch_root)
+        output_file_name = Path(get_uncompressed_file_path(graph_file)).stem + ".json" + \
+            JSON_COMPRESSION_EXTENSIONS.get(compression, "")
+        output_paths[graph_file] = os.path.normpath(os.path.join(results_directory, relative_directory,
+                                                                 output_file_name))
+
+    return output_paths
+
+
+def create_failed_file_result(graph_file_path: str, error_message: str) -> dict:
+    """ Returns the result of a graph file of the batch that could not be encoded.
+
+    :param graph_file_path: Path to the Graph file.
+    :type graph_file_path: str
+    :param error_message: Description of the error.
+    :type error_message: str
+    :return: Result of the file's encoding, with the 'failed' status.
+    :rtype: dict
+    """
+
+    return {"graph_file": graph_file_path, "status": "failed", "output_file": None, "elapsed_time": None,
+            "cache": None, "cache_evictions": 0, "report_file": None, "error": error_message}
+
+
+def encode_batch_file(graph_file_path: str, output_file_path: str, cache_directory: str = None,
+                      cache_size: int = CACHE_SIZE_DEFAULT, store_directory: str = None,
+                      store_backend: str = GRAPH_STORE_BACKEND_DEFAULT, instrumentation: bool = False,
+                      compression: str = None) -> dict:
+    """ Encodes a single graph file of the batch and saves its JSON output. Errors are caught and registered in the
+    returned result, so that a failed file does not abort the batch. Executed by the pool's worker processes.
+
+    :param graph_file_path: Path to the Graph file to be encoded.
+    :type graph_file_path: str
+    :param output_file_path: Path in which the JSON output must be saved (see get_batch_output_paths).
+    :type output_file_path: str
+    :param cache_directory: Path to the cache directory. If None (default), the cache is not used.
+    :type cache_directory: str
+    :param cache_size: Maximum size of the cache directory, in megabytes.
+    :type cache_size: int
+    :param store_directory: Directory of the persistent graph stores. If None (default), no persistent store is used.
+    :type store_directory: str
+    :param store_backend: Name of the rdflib store plugin used for the persistent graph stores.
+    :type store_backend: str
+    :param instrumentation: If True, each file's stages are measured and saved in a JSON report next to its output.
+    :type instrumentation: bool
+    :param compression: Compression of the JSON outputs ('gzip', 'bz2' or 'xz'). If None (default), they are not
+    compressed.
+    :type compression: str
+    :return: Result of the file's encoding, with its status, output path, elapsed time, cache usage and error (if any).
+    :rtype: dict
+    """
+
+    # Workers that do not inherit the logger from the main process (i.e., that are not forked) initialize their own
+    initialize_logger()
+
+    file_result = {"graph_file": graph_file_path, "status": "success", "output_file": None, "elapsed_time": None,
+                   "cache": None, "cache_evictions": 0, "report_file": None, "error": None}
+
+    st = time.perf_counter()
+    instrumentation_report = create_instrumentation_report() if instrumentation else None
+
+    try:
+        create_directory_if_not_exists(os.path.dirname(output_file_path), "results directory")
+
+        cache_key = get_cache_key(graph_file_path, compression) if cache_directory else None
+        cached_file_path = get_cached_json_file(cache_key, cache_directory) if cache_key else None
+
+        if cached_file_path:
+            with measure_stage(instrumentation_report, "restore_cached_json"):
+                file_result["output_file"] = output_file_path
+                restore_cached_json_file(cached_file_path, file_result["output_file"])
+            file_result["cache"] = "hit"
+        else:
+            # Imported only when needed, as importing the encoder (and rdflib) takes most of the start-up time
+            from modules.encoder.encoder_main import encode_graph_file_to_json
+
+            json_data = encode_graph_file_to_json(graph_file_path, store_directory, store_backend,
+                                                  instrumentation_report)
+            with measure_stage(instrumentation_report, "save"):
+                file_result["output_file"] = save_json_file(json_data, graph_file_path, output_path=output_file_path,
+                                                            compression=compression)
+
+            if cache_key:
+                file_result["cache"] = "miss"
+                file_result["cache_evictions"] = store_json_file_in_cache(file_result["output_file"], cache_key,
+                                                                          cache_directory, cache_size)
+
+        if instrumentation:
+            finish_instrumentation_report(instrumentation_report)
+            file_result["report_file"] = save_instrumentation_report(instrumentation_report,
+                                                                     file_result["output_file"])
+    except Exception as error:
+        file_result["status"] = "failed"
+        file_result["error"] = f"{type(error).__name__}: {error}"
+
+        if instrumentation:
+            finish_instrumentation_report(instrumentation_report)
+
+    file_result["elapsed_time"] = round(time.perf_counter() - st, 3)
+
+    return file_result
+
+
+def encode_graph_files_batch(list_graph_files: list[str], workers: int = None, cache_directory: str = None,
+                             cache_size: int = CACHE_SIZE_DEFAULT, store_directory: str = None,
+                             store_backend: str = GRAPH_STORE_BACKEND_DEFAULT,
+                             instrumentation: bool = False, compression: str = None) -> list[dict]:
+    """ Encodes all received graph files using a pool of worker processes. Files whose outputs would overwrite the
+    output of a previous file of the list (see get_batch_output_paths) are not encoded and are reported as failed.
+
+    :param list_graph_files: List of paths of the graph files to be encoded.
+    :type list_graph_files: list[str]
+    :param workers: Maximum number of worker processes. If None, the number of processors of the machine is used.
+    :type workers: int
+    :param cache_directory: Path to the cache directory. If None (default), the cache is not used.
+    :type cache_directory: str
+    :param cache_size: Maximum size of the cache directory, in megabytes.
+    :type cache_size: int
+    :param store_directory: Directory of the persistent graph stores. If None (default), no persistent store is used.
+    :type store_directory: str
+    :param store_backend: Name of the rdflib store plugin used for the persistent graph stores.
+    :type store_backend: str
+    :param instrumentation: If True, each file's stages are measured and saved in a JSON report next to its output.
+    :type instrumentation: bool
+    :param compression: Compression of the JSON outputs ('gzip', 'bz2' or 'xz'). If None (default), they are not
+    compressed.
+    :type compression: str
+    :return: List with the result of each file's encoding, in the same order of list_graph_files.
+    :rtype: list[dict]
+    """
+
+    # Imported only in batch mode, so that the encoding of single files does not load the multiprocessing modules
+    from concurrent.futures import ProcessPoolExecutor
+
+    list_results = []
+    output_paths = get_batch_output_paths(list_graph_files, compression)
+
+    # The first file of each output path is the only one encoded into it
+    output_owners = {}
+    for graph_file in list_graph_files:
+        output_owners.setdefault(output_paths[graph_file], graph_file)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        list_futures = [executor.submit(encode_batch_file, graph_file, output_paths[graph_file], cache_directory,
+                                        cache_size, store_directory, store_backend, instrumentation, compression)
+                        if output_owners[output_paths[graph_file]] == graph_file else None
+                        for graph_file in list_graph_files]
+
+        for graph_file, future in zip(list_graph_files, list_futures):
+            if future is None:
+                file_result = create_failed_file_result(
+                    graph_file, f"Output file collision: {output_paths[graph_file]} is the output of "
+                                f"{output_owners[output_paths[graph_file]]}.")
+            else:
+                try:
+                    file_result = future.result()
+                except Exception as error:
+                    # Failures of the worker process itself (e.g., killed by the system)
+                    file_result = create_failed_file_result(graph_file, f"{type(error).__name__}: {error}")
+
+            if file_result["status"] == "success":
+                LOGGER.info(f"Graph file {graph_file} encoded in {file_result['elapsed_time']} seconds.")
+            else:
+                LOGGER.warning(f"Graph file {graph_file} could not be encoded. {file_result['error']}")
+
+            list_results.append(file_result)
+
+    return list_results
+
+
+def encode_batch(graph_source: str, workers: int = None, cache_directory: str = None,
+                 cache_size: int = CACHE_SIZE_DEFAULT, store_directory: str = None,
+                 store_backend: str = GRAPH_STORE_BACKEND_DEFAULT, instrumentation: bool = False,
+                 compression: str = None) -> dict:
+    """ Encodes all graph files referred by a directory or glob pattern and saves a summary report in the results
+    directory. Returns the summary report.
+
+    :param graph_source: Directory path or glob pattern.
+    :type graph_source: str
+    :param workers: Maximum number of worker processes. If None, the number of processors of the machine is used.
+    :type workers: int
+    :param cache_directory: Path to the cache directory. If None (default), the cache is not used.
+    :type cache_directory: str
+    :param cache_size: Maximum size of the cache directory, in megabytes.
+    :type cache_size: int
+    :param store_directory: Directory of the persistent graph stores. If None (default), no persistent store is used.
+    :type store_directory: str
+    :param store_backend: Name of the rdflib store plugin used for the persistent graph stores.
+    :type store_backend: str
+    :param instrumentation: If True, each file's stages are measured and saved in a JSON report next to its output.
+    :type instrumentation: bool
+    :param compression: Compression of the JSON outputs ('gzip', 'bz2' or 'xz'). If None (default), they are not
+    compressed.
+    :type compression: str
+    :return: Summary report with the number of encoded and failed files and the result of each file.
+    :rtype: dict
+    """
+
+    initialize_logger()
+
+    time_screen_format = "%d-%m-%Y %H:%M:%S"
+    start_date_time = get_date_time(time_screen_format)
+    st = time.perf_counter()
+
+    list_graph_files = get_batch_graph_files(graph_source)
+    LOGGER.info(f"OntoUML Graph2JSON batch encoding of {len(list_graph_files)} files started on {start_date_time}!")
+
+    list_results = encode_graph_files_batch(list_graph_files, workers, cache_directory, cache_size,
+                                            store_directory, store_backend, instrumentation,
+                                            compression) if list_graph_files else []
+    number_failed = sum(1 for file_result in list_results if file_result["status"] == "failed")
+
+    batch_report = {"graph_source": graph_source,
+                    "start_date_time": start_date_time,
+                    "total_files": len(list_results),
+                    "encoded_files": len(list_results) - number_failed,
+                    "failed_files": number_failed,
+                    "elapsed_time": round(time.perf_counter() - st, 3),
+                    "files": list_results}
+
+    # Saving summary report
+    results_directory = "results"
+    create_directory_if_not_exists(results_directory, "results directory")
+    report_path = os.path.join(results_directory, f"batch_report_{get_date_time('%Y.%m.%d-%H.%M.%S')}.json")
+    safe_write_json_file(batch_report, report_path, indent=4)
+
+    LOGGER.info(f"Batch encoding concluded. {batch_report['encoded_files']} files encoded and "
+                f"{number_failed} failed in {batch_report['elapsed_time']} seconds. Report saved at {report_path}.")
+
+    if cache_directory:
+        # Statistics are collected from the results, as each worker process has its own counters
+        cache_statistics = {"hits": sum(1 for file_result in list_results if file_result["cache"] == "hit"),
+                            "misses": sum(1 for file_result in list_results if file_result["cache"] == "miss"),
+                            "evictions": sum(file_result["cache_evictions"] for file_result in list_results)}
+        log_cache_statistics(cache_directory, cache_statistics)
+
+    return batch_report
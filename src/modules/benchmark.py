@@ -0,0 +1,272 @@
+""" Functions for benchmarking the encoder's pipeline over synthetic graphs compliant with the OntoUML Vocabulary.
+
+Each synthetic graph has a single project whose model is a tree of packages with configurable depth and contents
+fan-out, and a configurable number of diagrams owned by random packages. Each pipeline stage (load,
+create_data_dictionaries, which also treats the specific types, mount_json_dictionary and save) is timed separately and
+the results are saved as a JSON file, so that they can be compared between versions.
+"""
+
+import argparse
+import itertools
+import os
+import platform
+import random
+import statistics
+import tempfile
+import time
+
+from modules.encoder.encoder_create import create_data_dictionaries
+from modules.encoder.encoder_mount import mount_json_dictionary
+from modules.errors import report_error_io_write
+from modules.io_graph import load_all_graph_safely
+from modules.io_json import safe_write_json_file
+from modules.logger import get_logger
+from modules.utils import create_directory_if_not_exists, get_date_time
+from src.modules.globals import get_metadata, URI_ONTOLOGY, URI_ONTOUML
+
+LOGGER = get_logger()
+
+# Names of the timed pipeline stages, in execution order
+BENCHMARK_STAGES = ["load", "create_data_dictionaries", "mount_json_dictionary", "save"]
+
+
+def generate_synthetic_graph(graph_path: str, package_depth: int, contents_fan_out: int, diagram_count: int,
+                             seed: int = 0) -> dict:
+    """ Writes a synthetic graph compliant with the OntoUML Vocabulary as a Turtle file. The project's model is a
+    package that contains contents_fan_out packages, each of them containing contents_fan_out packages, and so on,
+    until package_depth levels below the model. The diagrams are owned by randomly chosen packages.
+
+    :param graph_path: Path of the Turtle file to be written.
+    :type graph_path: str
+    :param package_depth: Number of levels of packages below the model package.
+    :type package_depth: int
+    :param contents_fan_out: Number of packages contained in each package that is not in the last level.
+    :type contents_fan_out: int
+    :param diagram_count: Number of diagrams.
+    :type diagram_count: int
+    :param seed: Seed of the random choice of the diagrams' owners.
+    :type seed: int
+    :return: Dictionary with the number of triples and of objects of each type of the generated graph.
+    :rtype: dict
+    """
+
+    random_generator = random.Random(seed)
+    graph_statistics = {"triples": 0, "Project": 1, "Package": 1, "Diagram": diagram_count}
+
+    def write_triple(subject: str, predicate: str, triple_object: str) -> None:
+        graph_file.write(f"<{URI_ONTOLOGY}{subject}> <{URI_ONTOUML}{predicate}> {triple_object} .\n")
+        graph_statistics["triples"] += 1
+
+    def write_type(subject: str, object_type: str) -> None:
+        graph_file.write(f"<{URI_ONTOLOGY}{subject}> <http://www.w3.org/1999/02/22-rdf-syntax-ns#type> "
+                         f"<{URI_ONTOUML}{object_type}> .\n")
+        graph_statistics["triples"] += 1
+
+    try:
+        with open(graph_path, "w", encoding="utf-8") as graph_file:
+            write_type("project", "Project")
+            write_triple("project", "name", '"Synthetic Project"')
+            write_triple("project", "model", f"<{URI_ONTOLOGY}package_0>")
+
+            write_type("package_0", "Package")
+            write_triple("package_0", "project", f"<{URI_ONTOLOGY}project>")
+            write_triple("package_0", "name", '"Synthetic Model"')
+
+            list_packages = ["package_0"]
+            level_packages = ["package_0"]
+
+            for _ in range(package_depth):
+                next_level_packages = []
+                for container in level_packages:
+                    for _ in range(contents_fan_out):
+                        package_id = f"package_{len(list_packages)}"
+                        write_type(package_id, "Package")
+                        write_triple(package_id, "project", f"<{URI_ONTOLOGY}project>")
+                        write_triple(package_id, "name", f'"Package {len(list_packages)}"')
+                        write_triple(container, "containsModelElement", f"<{URI_ONTOLOGY}{package_id}>")
+                        list_packages.append(package_id)
+                        next_level_packages.append(package_id)
+                level_packages = next_level_packages
+
+            for diagram_number in range(diagram_count):
+                diagram_id = f"diagram_{diagram_number}"
+                write_type(diagram_id, "Diagram")
+                write_triple(diagram_id, "project", f"<{URI_ONTOLOGY}project>")
+                write_triple(diagram_id, "name", f'"Diagram {diagram_number}"')
+                write_triple(diagram_id, "owner", f"<{URI_ONTOLOGY}{random_generator.choice(list_packages)}>")
+                write_triple("project", "diagram", f"<{URI_ONTOLOGY}{diagram_id}>")
+    except OSError as error:
+        file_description = f"synthetic graph file"
+        report_error_io_write(graph_path, file_description, error)
+
+    graph_statistics["Package"] = len(list_packages)
+
+    return graph_statistics
+
+
+def benchmark_pipeline(graph_path: str, output_path: str) -> dict[str, float]:
+    """ Encodes a graph file, timing each stage of the pipeline separately.
+
+    :param graph_path: Path of the graph file to be encoded.
+    :type graph_path: str
+    :param output_path: Path of the JSON file to be saved.
+    :type output_path: str
+    :return: Dictionary with the elapsed time (in seconds) of each stage.
+    :rtype: dict[str, float]
+    """
+
+    stages_times = {}
+
+    st = time.perf_counter()
+    ontology_graph = load_all_graph_safely(graph_path)
+    stages_times["load"] = time.perf_counter() - st
+
+    st = time.perf_counter()
+    list_dictionaries, _ = create_data_dictionaries(ontology_graph)
+    stages_times["create_data_dictionaries"] = time.perf_counter() - st
+
+    st = time.perf_counter()
+    json_data = mount_json_dictionary(list_dictionaries)
+    stages_times["mount_json_dictionary"] = time.perf_counter() - st
+
+    st = time.perf_counter()
+    safe_write_json_file(json_data, output_path)
+    stages_times["save"] = time.perf_counter() - st
+
+    return stages_times
+
+
+def summarize_times(list_times: list[float]) -> dict:
+    """ Summarizes the elapsed times of the repetitions of a stage.
+
+    :param list_times: Elapsed times, in seconds.
+    :type list_times: list[float]
+    :return: Dictionary with the minimum, median, mean and maximum times and the time of each repetition.
+    :rtype: dict
+    """
+
+    return {"min": round(min(list_times), 6),
+            "median": round(statistics.median(list_times), 6),
+            "mean": round(statistics.mean(list_times), 6),
+            "max": round(max(list_times), 6),
+            "repetitions": [round(elapsed_time, 6) for elapsed_time in list_times]}
+
+
+def run_benchmark(list_depths: list[int], list_fan_outs: list[int], list_diagram_counts: list[int],
+                  repetitions: int = 3, seed: int = 0) -> dict:
+    """ Benchmarks the encoder's pipeline over synthetic graphs of all combinations of the received shapes.
+
+    :param list_depths: Package depths of the synthetic graphs.
+    :type list_depths: list[int]
+    :param list_fan_outs: Contents fan-outs of the synthetic graphs.
+    :type list_fan_outs: list[int]
+    :param list_diagram_counts: Numbers of diagrams of the synthetic graphs.
+    :type list_diagram_counts: list[int]
+    :param repetitions: Number of times each graph is encoded.
+    :type repetitions: int
+    :param seed: Seed of the generation of the synthetic graphs.
+    :type seed: int
+    :return: Benchmark results, with the environment information and the stages' times of each graph.
+    :rtype: dict
+    """
+
+    metadata = get_metadata()
+    benchmark_results = {"software": metadata["name"],
+                         "version": metadata["version"],
+                         "python_version": platform.python_version(),
+                         "platform": platform.platform(),
+                         "date_time": get_date_time("%Y-%m-%d %H:%M:%S"),
+                         "repetitions": repetitions,
+                         "seed": seed,
+                         "graphs": []}
+
+    with tempfile.TemporaryDirectory() as temporary_directory:
+        graph_path = os.path.join(temporary_directory, "synthetic_graph.ttl")
+        output_path = os.path.join(temporary_directory, "synthetic_graph.json")
+
+        for package_depth, contents_fan_out, diagram_count in itertools.product(list_depths, list_fan_outs,
+                                                                                list_diagram_counts):
+            graph_statistics = generate_synthetic_graph(graph_path, package_depth, contents_fan_out, diagram_count,
+                                                        seed)
+
+            list_stages_times = [benchmark_pipeline(graph_path, output_path) for _ in range(repetitions)]
+
+            graph_results = {"package_depth": package_depth,
+                             "contents_fan_out": contents_fan_out,
+                             "diagram_count": diagram_count,
+                             "graph": graph_statistics,
+                             "stages": {stage: summarize_times([stages_times[stage]
+                                                                for stages_times in list_stages_times])
+                                        for stage in BENCHMARK_STAGES}}
+            graph_results["total"] = summarize_times([sum(stages_times.values())
+                                                      for stages_times in list_stages_times])
+
+            LOGGER.info(f"Graph with depth {package_depth}, fan-out {contents_fan_out} and {diagram_count} diagrams "
+                        f"({graph_statistics['triples']} triples) encoded in {graph_results['total']['median']} "
+                        f"seconds (median of {repetitions}).")
+
+            benchmark_results["graphs"].append(graph_results)
+
+    return benchmark_results
+
+
+def treat_benchmark_arguments() -> dict:
+    """ Treat arguments provided by the user when starting a benchmark execution.
+
+    :return: Dictionary containing all arguments provided by the user.
+    :rtype: dict
+    """
+
+    metadata = get_metadata()
+    args_parser = argparse.ArgumentParser(prog=metadata["name"] + "-benchmark",
+                                          description="Benchmark of the " + metadata["description"] +
+                                                      " over synthetic graphs. Version: " + metadata["version"],
+                                          allow_abbrev=False)
+
+    args_parser.add_argument("-d", "--depth", type=int, nargs="+", default=[2, 3, 4],
+                             help="Package depths of the synthetic graphs. Default is 2 3 4.")
+    args_parser.add_argument("-f", "--fan-out", type=int, nargs="+", default=[8],
+                             help="Contents fan-outs (packages contained in each package) of the synthetic graphs. "
+                                  "Default is 8.")
+    args_parser.add_argument("-g", "--diagrams", type=int, nargs="+", default=[100],
+                             help="Numbers of diagrams of the synthetic graphs. Default is 100.")
+    args_parser.add_argument("-r", "--repetitions", type=int, default=3,
+                             help="Number of times each graph is encoded. Default is 3.")
+    args_parser.add_argument("-s", "--seed", type=int, default=0,
+                             help="Seed of the generation of the synthetic graphs. Default is 0.")
+    args_parser.add_argument("-o", "--output", type=str, default=None,
+                             help="Path of the JSON results file. Default is results/benchmark_<date-time>.json.")
+
+    arguments = args_parser.parse_args()
+
+    arguments_dictionary = {"depths": arguments.depth,
+                            "fan_outs": arguments.fan_out,
+                            "diagram_counts": arguments.diagrams,
+                            "repetitions": arguments.repetitions,
+                            "seed": arguments.seed,
+                            "output_path": arguments.output}
+
+    LOGGER.debug(f"Benchmark arguments parsed. Obtained values are: {arguments_dictionary}.")
+
+    return arguments_dictionary
+
+
+def save_benchmark_results(benchmark_results: dict, output_path: str = None) -> str:
+    """ Saves the benchmark results as a JSON file. Returns the path in which the file was saved.
+
+    :param benchmark_results: Benchmark results.
+    :type benchmark_results: dict
+    :param output_path: Path of the JSON results file. If None, it is saved in the results directory.
+    :type output_path: str
+    :return: Saved results file path.
+    :rtype: str
+    """
+
+    if output_path is None:
+        results_directory = "results"
+        create_directory_if_not_exists(results_directory, "results directory")
+        output_path = os.path.join(results_directory, f"benchmark_{get_date_time('%Y.%m.%d-%H.%M.%S')}.json")
+
+    safe_write_json_file(benchmark_results, output_path, indent=4)
+
+    return output_path
@@ -0,0 +1,251 @@
+""" Functions of the optional on-disk cache of encoded JSON outputs.
+
+Each cache entry is a JSON file named after a hash of the input graph file's bytes and of the encoder version, so a
+changed input or a new release of the encoder never reuses an old output. The cache directory is bounded in size: when
+it grows beyond its limit, the least recently used entries (i.e., with the oldest modification times, which are
+refreshed on every hit) are removed.
+"""
+
+import hashlib
+import os
+import shutil
+import sys
+import threading
+
+from modules.errors import report_error_io_read, report_error_io_write
+from modules.io_json import JSON_STANDARD_OUTPUT
+from modules.logger import get_logger
+from modules.utils import create_directory_if_not_exists
+from src.modules.globals import get_metadata, CACHE_SIZE_DEFAULT
+
+LOGGER = get_logger()
+
+# Size of the chunks read from the input file when calculating its hash
+CACHE_HASH_CHUNK_SIZE = 1024 * 1024
+
+# Cache statistics of the current process
+CACHE_STATISTICS = {"hits": 0, "misses": 0, "evictions": 0}
+
+
+def get_cache_key(graph_file_path: str, compression: str = None) -> str:
+    """ Returns the cache key of a graph file, which is the SHA-256 hash of the encoder version, of the compression of
+    the JSON output (if any) and of the file bytes. Cached outputs are stored exactly as saved, so outputs with
+    different compressions have different keys.
+
+    :param graph_file_path: Path to the Graph file to be encoded.
+    :type graph_file_path: str
+    :param compression: Compression of the JSON output. If None (default), the output is not compressed.
+    :type compression: str
+    :return: Hexadecimal cache key.
+    :rtype: str
+    """
+
+    file_hash = hashlib.sha256()
+    metadata = get_metadata()
+    file_hash.update(f"{metadata['name']} {metadata['version']}\n".encode("utf-8"))
+    if compression is not None:
+        file_hash.update(f"{compression}\n".encode("utf-8"))
+
+    try:
+        with open(graph_file_path, "rb") as graph_file:
+            for chunk in iter(lambda: graph_file.read(CACHE_HASH_CHUNK_SIZE), b""):
+                file_hash.update(chunk)
+    except OSError as error:
+        file_description = f"input graph file"
+        report_error_io_read(graph_file_path, file_description, error)
+
+    return file_hash.hexdigest()
+
+
+def get_cache_entry_path(cache_key: str, cache_directory: str) -> str:
+    """ Returns the path of the cache entry with the received key.
+
+    :param cache_key: Cache key of a graph file.
+    :type cache_key: str
+    :param cache_directory: Path to the cache directory.
+    :type cache_directory: str
+    :return: Path of the cache entry.
+    :rtype: str
+    """
+
+    return os.path.join(cache_directory, cache_key + ".json")
+
+
+def get_cached_json_file(cache_key: str, cache_directory: str) -> str | None:
+    """ Returns the path of the cached JSON output with the received key, or None if it is not cached. On a hit, the
+    entry is marked as the most recently used one.
+
+    :param cache_key: Cache key of a graph file.
+    :type cache_key: str
+    :param cache_directory: Path to the cache directory.
+    :type cache_directory: str
+    :return: Path of the cached JSON file or None.
+    :rtype: str | None
+    """
+
+    cache_entry_path = get_cache_entry_path(cache_key, cache_directory)
+
+    try:
+        os.utime(cache_entry_path)
+    except OSError:
+        CACHE_STATISTICS["misses"] += 1
+        LOGGER.debug(f"Cache miss for key {cache_key}.")
+        return None
+
+    CACHE_STATISTICS["hits"] += 1
+    LOGGER.debug(f"Cache hit for key {cache_key}.")
+
+    return cache_entry_path
+
+
+def restore_cached_json_file(cached_file_path: str, output_file_path: str) -> None:
+    """ Copies a cached JSON output to the output file path (or to the standard output). The copy is written to a
+    temporary file and then renamed, as the outputs saved by the encoder (see io_json.open_json_output).
+
+    :param cached_file_path: Path of the cached JSON file.
+    :type cached_file_path: str
+    :param output_file_path: Path in which the JSON output must be saved or io_json.JSON_STANDARD_OUTPUT.
+    :type output_file_path: str
+    """
+
+    try:
+        if output_file_path == JSON_STANDARD_OUTPUT:
+            sys.stdout.flush()
+            with open(cached_file_path, "rb") as cached_file:
+                shutil.copyfileobj(cached_file, sys.stdout.buffer)
+            sys.stdout.buffer.flush()
+        else:
+            # Unique per process and thread, as concurrent encodings may restore the same output
+            temporary_output_path = f"{output_file_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            shutil.copyfile(cached_file_path, temporary_output_path)
+            os.replace(temporary_output_path, output_file_path)
+    except OSError as error:
+        file_description = f"output JSON file"
+        report_error_io_write(output_file_path, file_description, error)
+
+    LOGGER.debug(f"Cached JSON file {cached_file_path} copied to {output_file_path}.")
+
+
+def store_json_file_in_cache(output_file_path: str, cache_key: str, cache_directory: str,
+                             cache_size: int = CACHE_SIZE_DEFAULT) -> int:
+    """ Stores a copy of a generated JSON output in the cache and evicts the least recently used entries if the cache
+    exceeds its size limit. The entry is written to a temporary file and then renamed, so concurrent processes never
+    read a partially written entry.
+
+    :param output_file_path: Path of the generated JSON file.
+    :type output_file_path: str
+    :param cache_key: Cache key of the graph file that generated the output.
+    :type cache_key: str
+    :param cache_directory: Path to the cache directory.
+    :type cache_directory: str
+    :param cache_size: Maximum size of the cache directory, in megabytes.
+    :type cache_size: int
+    :return: Number of evicted entries.
+    :rtype: int
+    """
+
+    create_directory_if_not_exists(cache_directory, "cache directory")
+
+    cache_entry_path = get_cache_entry_path(cache_key, cache_directory)
+    # Unique per process and thread, as concurrent encodings may store the same entry
+    temporary_entry_path = f"{cache_entry_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+    try:
+        shutil.copyfile(output_file_path, temporary_entry_path)
+        os.replace(temporary_entry_path, cache_entry_path)
+    except OSError as error:
+        file_description = f"cache entry"
+        report_error_io_write(cache_entry_path, file_description, error)
+
+    LOGGER.debug(f"JSON file {output_file_path} stored in cache with key {cache_key}.")
+
+    return evict_cache_entries(cache_directory, cache_size)
+
+
+def get_cache_entries(cache_directory: str) -> list[os.DirEntry]:
+    """ Returns the entries of the cache directory. Temporary files and other files are ignored.
+
+    :param cache_directory: Path to the cache directory.
+    :type cache_directory: str
+    :return: List of cache entries.
+    :rtype: list[os.DirEntry]
+    """
+
+    try:
+        with os.scandir(cache_directory) as directory_entries:
+            return [entry for entry in directory_entries if entry.name.endswith(".json") and entry.is_file()]
+    except FileNotFoundError:
+        return []
+
+
+def evict_cache_entries(cache_directory: str, cache_size: int = CACHE_SIZE_DEFAULT) -> int:
+    """ Removes the least recently used entries of the cache until its total size is within the size limit.
+
+    :param cache_directory: Path to the cache directory.
+    :type cache_directory: str
+    :param cache_size: Maximum size of the cache directory, in megabytes.
+    :type cache_size: int
+    :return: Number of evicted entries.
+    :rtype: int
+    """
+
+    cache_size_limit = cache_size * 1024 * 1024
+    list_entries = []
+    total_size = 0
+
+    for entry in get_cache_entries(cache_directory):
+        try:
+            entry_stat = entry.stat()
+        except FileNotFoundError:
+            # Already evicted by another process
+            continue
+        list_entries.append((entry_stat.st_mtime, entry_stat.st_size, entry.path))
+        total_size += entry_stat.st_size
+
+    if total_size <= cache_size_limit:
+        return 0
+
+    number_evicted = 0
+    list_entries.sort()
+
+    for _, entry_size, entry_path in list_entries:
+        if total_size <= cache_size_limit:
+            break
+        try:
+            os.remove(entry_path)
+            number_evicted += 1
+        except FileNotFoundError:
+            pass
+        total_size -= entry_size
+        LOGGER.debug(f"Cache entry {entry_path} evicted.")
+
+    CACHE_STATISTICS["evictions"] += number_evicted
+
+    return number_evicted
+
+
+def log_cache_statistics(cache_directory: str, statistics: dict = None) -> None:
+    """ Logs the number of hits, misses and evictions and the current number of entries and size of the cache.
+
+    :param cache_directory: Path to the cache directory.
+    :type cache_directory: str
+    :param statistics: Dictionary with the keys 'hits', 'misses' and 'evictions'. If None (default), the statistics
+    of the current process are used.
+    :type statistics: dict
+    """
+
+    if statistics is None:
+        statistics = CACHE_STATISTICS
+
+    list_entries = get_cache_entries(cache_directory)
+    total_size = 0
+
+    for entry in list_entries:
+        try:
+            total_size += entry.stat().st_size
+        except FileNotFoundError:
+            pass
+
+    LOGGER.info(f"Cache statistics: {statistics['hits']} hits, {statistics['misses']} misses, "
+                f"{statistics['evictions']} evictions. {len(list_entries)} entries "
+                f"({round(total_size / (1024 * 1024), 2)} MB) in {cache_directory}.")
@@ -0,0 +1,361 @@
+""" Decoding of JSON files compliant with the OntoUML-Schema into graphs compliant with the OntoUML Vocabulary, which is
+the reverse of the encoding (see encoder_main).
+
+The JSON file is read by the iterative parser (see json_tokenizer), never loaded as a whole, and the triples of each
+object are created from its fields as soon as the object is read. Each key is converted into the vocabulary property it
+was encoded from, and each value into:
+    - the IRI of an individual, for nested objects, references (i.e., dictionaries with only 'id' and 'type') and the
+      string values of keys of object properties (REFERENCE_KEYS);
+    - the IRI of a vocabulary's individual (e.g., ontouml:kind), for strings in the vocabulary's namespace;
+    - a literal, otherwise. Null values are not represented.
+
+The rdf:type triple of each object is created as soon as its id, its type and its first other field are read, so
+objects are typed in the order they are found in the JSON (i.e., before their nested objects), which is the order the
+encoding needs for mounting the same JSON again. The other triples of each object are created when the object is
+closed. Objects contained by a project are linked to it by ontouml:project triples, as in the vocabulary.
+
+The order of the triples is kept in Graphs and in N-Triples and N-Quads files, which are written while the JSON file is
+read. Serializers of other formats reorder the triples (e.g., Turtle groups them by subject), so their files hold the
+same triples but may be encoded into a JSON whose references are resolved differently.
+"""
+
+import json
+from typing import Iterable, Iterator, TextIO
+
+from modules.errors import report_error_io_read, report_error_io_write
+from modules.graph_input import STREAMABLE_GRAPH_FORMATS
+from modules.io_graph import safe_write_graph_file
+from modules.io_json import open_json_file
+from modules.json_tokenizer import iterate_json_events, JSON_END_ARRAY, JSON_END_MAP, JSON_KEY, JSON_START_ARRAY, \
+    JSON_START_MAP, JSON_VALUE
+from modules.logger import get_logger
+from rdflib import Graph, Literal, RDF, URIRef
+from rdflib.term import Node
+from src.modules.globals import URI_ONTOLOGY, URI_ONTOUML
+
+LOGGER = get_logger()
+
+# Vocabulary properties whose keys were renamed in the JSON (see encoder_create.get_dictionary_key), indexed by the keys
+VOCABULARY_PROPERTY_NAMES = {"contents": "containsModelElement", "diagrams": "diagram"}
+
+# Keys of the vocabulary's object properties, whose string values are IDs of individuals
+REFERENCE_KEYS = {"attribute", "cardinality", "categorizer", "containsView", "contents", "diagrams", "general",
+                  "generalization", "isViewOf", "literal", "model", "owner", "point", "project", "propertyType",
+                  "redefinesProperty", "relationEnd", "shape", "sourceEnd", "sourceView", "specific",
+                  "subsetsProperty", "targetEnd", "targetView", "topLeftPosition"}
+
+# Types of the objects that are not linked to their project in the vocabulary
+UNLINKED_TYPES = {"Project", "Point", "Cardinality"}
+
+# Number of triples inserted into a Graph at a time
+TRIPLES_BATCH_SIZE = 10000
+
+PROJECT_PREDICATE = URIRef(URI_ONTOUML + "project")
+
+
+class ObjectFrame:
+    """ Fields of an object (or of a dictionary that is not an object) that is being read.
+
+    :ivar elem_id: Object's ID, when already read.
+    :ivar elem_type: Object's type, when already read.
+    :ivar fields: Other fields already read, as (key, value) tuples. Nested objects are represented by their IRIs.
+    :ivar has_fields: Indicates if a field other than 'id' and 'type' was found (even if it is still being read).
+    :ivar is_typed: Indicates if the object's rdf:type triple was already created.
+    """
+
+    __slots__ = ("elem_id", "elem_type", "fields", "has_fields", "is_typed")
+
+    def __init__(self):
+        self.elem_id = None
+        self.elem_type = None
+        self.fields = []
+        self.has_fields = False
+        self.is_typed = False
+
+
+def get_vocabulary_predicate(dict_key: str, predicates_cache: dict[str, URIRef]) -> URIRef:
+    """ Returns the vocabulary property from which a JSON key was encoded.
+
+    :param dict_key: Key of a JSON object.
+    :type dict_key: str
+    :param predicates_cache: Dictionary with the properties already calculated for keys.
+    :type predicates_cache: dict[str, URIRef]
+    :return: IRI of the vocabulary property.
+    :rtype: URIRef
+    """
+
+    predicate = predicates_cache.get(dict_key)
+
+    if predicate is None:
+        predicate = predicates_cache[dict_key] = URIRef(URI_ONTOUML + VOCABULARY_PROPERTY_NAMES.get(dict_key, dict_key))
+
+    return predicate
+
+
+def get_vocabulary_object(dict_key: str, dict_value) -> Node | None:
+    """ Returns the object of the triple that represents a JSON value, or None if the value is not represented.
+
+    :param dict_key: Key of the value.
+    :type dict_key: str
+    :param dict_value: Value of a JSON object's field (or an item of a list) or IRI of a nested object.
+    :return: IRI or literal that represents the value, or None for null values.
+    :rtype: Node | None
+    """
+
+    if dict_value is None or type(dict_value) is URIRef:
+        return dict_value
+
+    if type(dict_value) is str:
+        if dict_key in REFERENCE_KEYS:
+            return URIRef(URI_ONTOLOGY + dict_value)
+        if dict_value.startswith(URI_ONTOUML):
+            return URIRef(dict_value)
+
+    return Literal(dict_value)
+
+
+def create_object_triples(object_frame: ObjectFrame, subject: URIRef, project: URIRef | None,
+                          predicates_cache: dict[str, URIRef]) -> Iterator[tuple[Node, Node, Node]]:
+    """ Yields the triples of a closed object's fields (and of its link to its project), but for its rdf:type triple.
+
+    :param object_frame: Fields of the object.
+    :type object_frame: ObjectFrame
+    :param subject: IRI of the object.
+    :type subject: URIRef
+    :param project: IRI of the project that contains the object, or None if unknown.
+    :type project: URIRef | None
+    :param predicates_cache: Dictionary with the properties already calculated for keys.
+    :type predicates_cache: dict[str, URIRef]
+    :return: Iterator over the object's triples.
+    :rtype: Iterator[tuple[Node, Node, Node]]
+    """
+
+    for dict_key, dict_value in object_frame.fields:
+        predicate = get_vocabulary_predicate(dict_key, predicates_cache)
+
+        for item in dict_value if type(dict_value) is list else (dict_value,):
+            triple_object = get_vocabulary_object(dict_key, item)
+            if triple_object is not None:
+                yield subject, predicate, triple_object
+
+    if project is not None and project != subject and object_frame.elem_type not in UNLINKED_TYPES:
+        yield subject, PROJECT_PREDICATE, project
+
+
+def decode_json_events_to_triples(json_events: Iterable[tuple[str, object]]) -> Iterator[tuple[Node, Node, Node]]:
+    """ Yields the triples of the graph represented by the events of a JSON compliant with the OntoUML-Schema.
+
+    Only the objects that are open (i.e., the current object and the objects that contain it) are kept in memory. The
+    project that contains the objects is the upper level object, if its id and type are read before its nested objects
+    are closed (as in the OntoUML-Schema's order of keys).
+
+    :param json_events: Events of the JSON document (see json_tokenizer.iterate_json_events).
+    :type json_events: Iterable[tuple[str, object]]
+    :return: Iterator over the graph's triples.
+    :rtype: Iterator[tuple[Node, Node, Node]]
+    """
+
+    predicates_cache = {}
+
+    # Open dictionaries and lists, and the keys under which their current values are read
+    open_containers = []
+    current_keys = []
+    project = None
+
+    for event, event_value in json_events:
+        container = open_containers[-1] if open_containers else None
+
+        if event == JSON_KEY:
+            current_keys[-1] = event_value
+            continue
+
+        if event == JSON_END_MAP or event == JSON_END_ARRAY:
+            current_keys.pop()
+            closed_container = open_containers.pop()
+
+            if event == JSON_END_MAP:
+                # Dictionaries without ID are not objects, and are not represented
+                if closed_container.elem_id is None:
+                    continue
+                subject = URIRef(URI_ONTOLOGY + closed_container.elem_id)
+                if closed_container.is_typed:
+                    yield from create_object_triples(closed_container, subject, project, predicates_cache)
+                closed_container = subject
+
+            if type(open_containers[-1] if open_containers else None) is ObjectFrame:
+                open_containers[-1].fields.append((current_keys[-1], closed_container))
+            elif open_containers:
+                open_containers[-1].append(closed_container)
+            continue
+
+        # Values and beginnings of dictionaries and lists, which are (the beginnings of) values of the container
+        if type(container) is ObjectFrame:
+            dict_key = current_keys[-1]
+            if event == JSON_VALUE and dict_key == "id" and type(event_value) is str:
+                container.elem_id = event_value
+            elif event == JSON_VALUE and dict_key == "type" and type(event_value) is str:
+                container.elem_type = event_value
+            else:
+                container.has_fields = True
+                if event == JSON_VALUE:
+                    container.fields.append((dict_key, event_value))
+
+            # Dictionaries with only 'id' and 'type' are references, so objects are typed when their first other field
+            # is read
+            if container.has_fields and not container.is_typed and container.elem_id is not None and \
+                    container.elem_type is not None:
+                container.is_typed = True
+                subject = URIRef(URI_ONTOLOGY + container.elem_id)
+                if container is open_containers[0] and container.elem_type == "Project":
+                    project = subject
+                yield subject, RDF.type, URIRef(URI_ONTOUML + container.elem_type)
+
+        elif container is not None and event == JSON_VALUE:
+            container.append(event_value)
+
+        if event == JSON_START_MAP:
+            open_containers.append(ObjectFrame())
+            current_keys.append(None)
+        elif event == JSON_START_ARRAY:
+            open_containers.append([])
+            current_keys.append(None)
+
+
+def decode_json_file_to_triples(json_file_path: str) -> Iterator[tuple[Node, Node, Node]]:
+    """ Yields the triples of the graph represented by a JSON file compliant with the OntoUML-Schema, reading the file
+    while the triples are consumed. Compressed JSON files are decompressed while read.
+
+    :param json_file_path: Path to the JSON file to be decoded.
+    :type json_file_path: str
+    :return: Iterator over the graph's triples.
+    :rtype: Iterator[tuple[Node, Node, Node]]
+    :raises json.JSONDecodeError: If the file is not valid JSON.
+    """
+
+    try:
+        read_file = open_json_file(json_file_path)
+    except OSError as error:
+        file_description = f"input json file"
+        report_error_io_read(json_file_path, file_description, error)
+
+    with read_file:
+        yield from decode_json_events_to_triples(iterate_json_events(read_file))
+
+
+def decode_json_file_to_graph(json_file_path: str, ontology_graph: Graph = None) -> Graph:
+    """ Decodes a JSON file compliant with the OntoUML-Schema into a Graph compliant with the OntoUML Vocabulary. The
+    triples are inserted in batches.
+
+    :param json_file_path: Path to the JSON file to be decoded.
+    :type json_file_path: str
+    :param ontology_graph: Graph that receives the triples. If None (default), a new in-memory Graph is created.
+    :type ontology_graph: Graph
+    :return: Graph with the decoded triples.
+    :rtype: Graph
+    """
+
+    if ontology_graph is None:
+        ontology_graph = Graph()
+
+    triples_batch = []
+
+    for triple in decode_json_file_to_triples(json_file_path):
+        triples_batch.append((*triple, ontology_graph))
+        if len(triples_batch) >= TRIPLES_BATCH_SIZE:
+            ontology_graph.addN(triples_batch)
+            triples_batch.clear()
+
+    ontology_graph.addN(triples_batch)
+
+    return ontology_graph
+
+
+def get_ntriples_term(term: Node) -> str:
+    """ Returns the N-Triples representation of a decoded term.
+
+    :param term: IRI or literal.
+    :type term: Node
+    :return: Term's representation in a N-Triples statement.
+    :rtype: str
+    """
+
+    if type(term) is URIRef:
+        return f"<{term}>"
+
+    # JSON strings escape the same characters that must be escaped in N-Triples strings
+    lexical_form = json.dumps(str(term), ensure_ascii=False)
+
+    if term.language:
+        return f"{lexical_form}@{term.language}"
+    if term.datatype:
+        return f"{lexical_form}^^<{term.datatype}>"
+
+    return lexical_form
+
+
+def write_ntriples_file(graph_triples: Iterable[tuple[Node, Node, Node]], write_file: TextIO) -> int:
+    """ Writes the received triples as N-Triples statements, in the received order.
+
+    :param graph_triples: Triples to be written.
+    :type graph_triples: Iterable[tuple[Node, Node, Node]]
+    :param write_file: Opened text file in which the statements are written.
+    :type write_file: TextIO
+    :return: Number of written triples.
+    :rtype: int
+    """
+
+    terms_cache = {}
+    number_triples = 0
+    statements = []
+
+    for triple in graph_triples:
+        terms = []
+        for term in triple:
+            ntriples_term = terms_cache.get(term) if type(term) is URIRef else None
+            if ntriples_term is None:
+                ntriples_term = get_ntriples_term(term)
+                if type(term) is URIRef:
+                    terms_cache[term] = ntriples_term
+            terms.append(ntriples_term)
+
+        statements.append(f"{terms[0]} {terms[1]} {terms[2]} .\n")
+        number_triples += 1
+
+        if len(statements) >= TRIPLES_BATCH_SIZE:
+            write_file.write("".join(statements))
+            statements.clear()
+
+    write_file.write("".join(statements))
+
+    return number_triples
+
+
+def decode_json_file_to_graph_file(json_file_path: str, graph_file_path: str, graph_format: str = "turtle") -> int:
+    """ Decodes a JSON file compliant with the OntoUML-Schema into a graph file compliant with the OntoUML Vocabulary.
+    N-Triples and N-Quads files are written while the JSON file is read, without creating a Graph.
+
+    :param json_file_path: Path to the JSON file to be decoded.
+    :type json_file_path: str
+    :param graph_file_path: Path in which the graph file will be saved.
+    :type graph_file_path: str
+    :param graph_format: rdflib serializer format of the graph file (e.g., 'turtle' or 'nt').
+    :type graph_format: str
+    :return: Number of decoded triples.
+    :rtype: int
+    """
+
+    if graph_format in STREAMABLE_GRAPH_FORMATS:
+        try:
+            with open(graph_file_path, "w", encoding="utf-8") as write_file:
+                number_triples = write_ntriples_file(decode_json_file_to_triples(json_file_path), write_file)
+        except OSError as error:
+            file_description = f"output graph file"
+            report_error_io_write(graph_file_path, file_description, error)
+    else:
+        ontology_graph = decode_json_file_to_graph(json_file_path)
+        number_triples = len(ontology_graph)
+        safe_write_graph_file(ontology_graph, graph_file_path, graph_format)
+
+    LOGGER.debug(f"{number_triples} triples decoded from {json_file_path} into {graph_file_path}.")
+
+    return number_triples
@@ -1,57 +1,43 @@
 """ Functions that mount dictionaries that will be part of the generated JSON. """
 
-from rdflib import Graph, URIRef
+import sys
+from typing import Iterable
 
-from src.modules.encoder.sparql_queries import QUERY_FUTURE_OBJECTS
-from src.modules.errors import report_error_requirement_not_met
-from src.modules.globals import URI_ONTOUML, URI_ONTOLOGY
-
-
-def return_key_pattern(object_type: str) -> list[str]:
-    """ Receives an object type and returns the corresponding list of keys.
-
-    :param object_type: Type of object to have its keys returned.
-    :type object_type: str
-    :return: List of keys for the given object type.
-    :rtype: list[str]
-    """
-
-    # Individual lists for each object type
-    keys_project = ["id", "name", "description", "type", "model", "diagrams"]
-    keys_package = ["id", "name", "description", "type", "propertyAssignments", "contents"]
-    keys_diagram = ["id", "name", "description", "type", "owner", "id", "type", "contents"]
+from rdflib import Graph, Literal, URIRef, RDF
+from rdflib.plugins.stores.memory import Memory
+from rdflib.term import Node
 
-    # General dictionary
-    json_keys = {"Project": keys_project, "Package": keys_package, "Diagram": keys_diagram}
-
-    # If key not found, report error.
-    if object_type not in json_keys.keys():
-        report_error_requirement_not_met("Element type not found in list of keys.")
-
-    return json_keys[object_type]
+from modules.encoder.encoder_model import create_ontouml_object, OntoUMLObject
+from modules.encoder.encoder_types_treatment import treat_object_type
+from src.modules.globals import URI_ONTOUML, URI_ONTOLOGY
 
 
-def get_future_objects(ontology_graph: Graph) -> list[(URIRef, URIRef)]:
-    """ Queries the ontology_graph to find individuals that will become objects in the JSON.
+def get_future_objects(ontology_graph: Graph) -> (list[(URIRef, URIRef)], dict):
+    """ Scans the ontology_graph's rdf:type triples to find individuals that will become objects in the JSON.
+    Only individuals from the ontology's namespace that have types from the OntoUML Vocabulary's namespace are returned.
+    The number of objects of each type is counted at the same time.
 
     :param ontology_graph: Graph compliant with the OntoUML Vocabulary loaded from file.
     :type ontology_graph: Graph
-    :return: A list of tuples containing an object's URIRef id and URIRef type that later will become an object.
-    :rtype: list[(URIRef, URIRef)]
+    :return: A list of tuples containing an object's URIRef id and URIRef type that later will become an object and a
+    dictionary with the types (without prefix) and their respective number of occurrences.
+    :rtype: (list[(URIRef, URIRef)], dict)
     """
 
     list_future_objects = []
+    available_types = {}
 
-    query_future_objects = ontology_graph.query(QUERY_FUTURE_OBJECTS)
-
-    for row in query_future_objects:
-        if (URI_ONTOLOGY not in row.elem_uri) or (URI_ONTOUML not in row.elem_type):
+    for elem_uri, elem_type in ontology_graph.subject_objects(RDF.type):
+        if not elem_uri.startswith(URI_ONTOLOGY) or not elem_type.startswith(URI_ONTOUML):
             continue
-        else:
-            future_object = (row.elem_uri, row.elem_type)
-            list_future_objects.append(future_object)
 
-    return list_future_objects
+        list_future_objects.append((elem_uri, elem_type))
+
+        # Counting different types of objects
+        type_name = elem_type[len(URI_ONTOUML):]
+        available_types[type_name] = available_types.get(type_name, 0) + 1
+
+    return list_future_objects, available_types
 
 
 def get_json_schema_dict_key(input_dict_key: str) -> str:
@@ -73,108 +59,309 @@ def get_json_schema_dict_key(input_dict_key: str) -> str:
     return updated_dict_key
 
 
-def create_individual_object_dictionary(uri_elem_id: URIRef, uri_elem_type: URIRef, ontology_graph: Graph) -> dict:
-    """ Creates a single dictionary with all known data for a given object.
-    The known data is queried from the ontology_graph.
+def get_dictionary_key(uri_predicate: URIRef):
+    """ Receives a predicate from the Graph and returns the corresponding key to be used in the object's dictionary.
+    Returns None if the predicate is not represented in the JSON.
+
+    :param uri_predicate: URI of the predicate to have its key returned.
+    :type uri_predicate: URIRef
+    :return: Dictionary key for the given predicate or None if the predicate must be ignored.
+    :rtype: str
+    """
+
+    mapped_elements = {"diagram": "diagrams"}
+
+    # CONDITION 1: The predicate must be defined in the OntoUML Vocabulary
+    if URI_ONTOUML not in uri_predicate:
+        return None
+
+    # CONDITION 2: the object property 'project' is not available in the JSON representation
+    if "project" in uri_predicate.toPython():
+        return None
+
+    dict_key = get_json_schema_dict_key(uri_predicate.toPython().replace(URI_ONTOUML, ""))
+
+    # Treating cases where the vocabulary property has different name from JSON field
+    if dict_key in mapped_elements:
+        dict_key = mapped_elements[dict_key]
+
+    return sys.intern(dict_key)
+
+
+def get_dictionary_value(uri_object, values_cache: dict):
+    """ Receives an object from the Graph and returns the corresponding value to be used in the object's dictionary.
+    IRIs are stripped of their prefix only once and the resulting strings are shared by all their occurrences.
+
+    :param uri_object: Object of a triple (URIRef, BNode, or Literal).
+    :param values_cache: Dictionary with the values already calculated for IRIs and blank nodes.
+    :type values_cache: dict
+    :return: Value to be used in the object's dictionary.
+    """
+
+    # Literals are not cached, as they are usually unique
+    if type(uri_object) is Literal:
+        return uri_object.toPython().replace(URI_ONTOLOGY, "")
+
+    dict_value = values_cache.get(uri_object)
+    if dict_value is None:
+        dict_value = values_cache[uri_object] = sys.intern(uri_object.toPython().replace(URI_ONTOLOGY, ""))
+
+    return dict_value
+
+
+def add_property_to_bucket(properties_bucket: list[(str, object)], uri_predicate: URIRef, uri_object,
+                           keys_cache: dict, values_cache: dict) -> None:
+    """ Adds the property represented by a predicate and an object to an object's properties bucket.
+    Predicates that are not represented in the JSON are ignored.
+
+    :param properties_bucket: List of the object's properties as (dict_key, dict_value) tuples.
+    :type properties_bucket: list[(str, object)]
+    :param uri_predicate: Predicate of the triple.
+    :type uri_predicate: URIRef
+    :param uri_object: Object of the triple.
+    :param keys_cache: Dictionary with the keys already calculated for predicates.
+    :type keys_cache: dict
+    :param values_cache: Dictionary with the values already calculated for IRIs and blank nodes.
+    :type values_cache: dict
+    """
+
+    dict_key = keys_cache.get(uri_predicate, keys_cache)
+    if dict_key is keys_cache:
+        dict_key = keys_cache[uri_predicate] = get_dictionary_key(uri_predicate)
+
+    if dict_key is not None:
+        properties_bucket.append((dict_key, get_dictionary_value(uri_object, values_cache)))
+
+
+def create_properties_buckets(ontology_graph: Graph, list_of_future_objects: list[(URIRef, URIRef)],
+                              values_cache: dict, bulk_extraction: bool = False) -> dict[URIRef, list[(str, object)]]:
+    """ Groups by subject the properties of the future objects. Each property is represented as a (dict_key, dict_value)
+    tuple. Predicates and IRIs are converted only once per distinct term.
+
+    By default, the properties of each object are obtained from the graph's subject index, in the order provided by the
+    graph. In bulk extraction mode, all the graph's triples are iterated only once, which is faster for stores in which
+    each query has a high cost (e.g., persistent stores). A full iteration may interleave the properties of an object
+    with different keys, but keeps the order of the values of each key, which is the only order that affects the
+    created objects (see encoder_model.create_ontouml_object). Hence, both modes create the same objects.
 
-    :param uri_elem_id: URI of the object's ID to have its dictionary created.
-    :type uri_elem_id: URIRef
-    :param uri_elem_type: URI of the object's type to have its dictionary created.
-    :type uri_elem_type: URIRef
     :param ontology_graph: Graph compliant with the OntoUML Vocabulary loaded from file.
     :type ontology_graph: Graph
-    :return: New object's dictionary with its data.
-    :rtype: dict
+    :param list_of_future_objects: List of tuples containing an object's URIRef id and URIRef type.
+    :type list_of_future_objects: list[(URIRef, URIRef)]
+    :param values_cache: Dictionary with the values already calculated for IRIs and blank nodes.
+    :type values_cache: dict
+    :param bulk_extraction: Indicates if all triples must be obtained in a single iteration over the graph.
+    :type bulk_extraction: bool
+    :return: Dictionary with the future objects' URIs as keys and lists of their properties as values.
+    :rtype: dict[URIRef, list[(str, object)]]
     """
 
-    elem_id = uri_elem_id.toPython().replace(URI_ONTOLOGY, "")
-    elem_type = uri_elem_type.toPython().replace(URI_ONTOUML, "")
+    properties_buckets = {uri_elem_id: [] for uri_elem_id, _ in list_of_future_objects}
+    keys_cache = {}
 
-    object_dictionary = {"id": elem_id, "type": elem_type}
-    json_field_list = ["contents", "diagrams"]
-    mapped_elements = {"diagram": "diagrams"}
+    if not bulk_extraction:
+        for uri_elem_id, properties_bucket in properties_buckets.items():
+            for p, o in ontology_graph.predicate_objects(uri_elem_id):
+                add_property_to_bucket(properties_bucket, p, o, keys_cache, values_cache)
 
-    for s, p, o in ontology_graph.triples((uri_elem_id, None, None)):
+        return properties_buckets
 
-        # CONDITION 1: The predicate must be defined in the OntoUML Vocabulary
-        if URI_ONTOUML not in p:
-            continue
+    for s, p, o in ontology_graph.triples((None, None, None)):
+        properties_bucket = properties_buckets.get(s)
+        if properties_bucket is not None:
+            add_property_to_bucket(properties_bucket, p, o, keys_cache, values_cache)
 
-        # CONDITION 2: the object property 'project' is not available in the JSON representation
-        if "project" in p.toPython():
-            continue
+    return properties_buckets
 
-        dict_key = get_json_schema_dict_key(p.toPython().replace(URI_ONTOUML, ""))
-        dict_value = o.toPython().replace(URI_ONTOLOGY, "")
 
-        # Treating cases where the vocabulary property has different name from JSON field
-        if dict_key in mapped_elements:
-            dict_key = mapped_elements[dict_key]
+def create_objects_types_index(list_of_future_objects: list[(URIRef, URIRef)], values_cache: dict) -> dict[str, str]:
+    """ Creates the index of the types of the future objects, used for resolving references to them while the objects
+    are created (see encoder_types_treatment). If an individual has more than one type, its last type is indexed.
 
-        if dict_key in json_field_list:
-            # If not initialized yet, first initialize
-            if dict_key not in object_dictionary:
-                object_dictionary[dict_key] = [dict_value]
-            # Else just add new element
-            else:
-                object_dictionary[dict_key].append(dict_value)
-        else:
-            object_dictionary[dict_key] = dict_value
+    :param list_of_future_objects: List of tuples containing an object's URIRef id and URIRef type.
+    :type list_of_future_objects: list[(URIRef, URIRef)]
+    :param values_cache: Dictionary with the values already calculated for IRIs and blank nodes.
+    :type values_cache: dict
+    :return: Types of the future objects (without prefix), indexed by their IDs.
+    :rtype: dict[str, str]
+    """
 
-    return object_dictionary
+    objects_types = {}
 
+    for uri_elem_id, uri_elem_type in list_of_future_objects:
+        elem_id = get_dictionary_value(uri_elem_id, values_cache)
+        objects_types[elem_id] = sys.intern(uri_elem_type.toPython().replace(URI_ONTOUML, ""))
+
+    return objects_types
+
+
+def create_dictionaries_from_buckets(list_of_future_objects: list[(URIRef, URIRef)],
+                                     properties_buckets: dict[URIRef, list[(str, object)]],
+                                     values_cache: dict, objects_types: dict[str, str] = None,
+                                     list_dictionaries: list = None) -> list[OntoUMLObject]:
+    """ Creates the individual data dictionaries of the future objects from their properties buckets. Each dictionary
+    is the compact intermediate representation of its object (see encoder_model), completed with null values and
+    treated by the handler of its type (see encoder_types_treatment).
+
+    :param list_of_future_objects: List of tuples containing an object's URIRef id and URIRef type.
+    :type list_of_future_objects: list[(URIRef, URIRef)]
+    :param properties_buckets: Dictionary with the future objects' URIs as keys and lists of their properties as values
+    (or any object that returns the properties of a future object when indexed by its URI).
+    :type properties_buckets: dict[URIRef, list[(str, object)]]
+    :param values_cache: Dictionary with the values already calculated for IRIs and blank nodes.
+    :type values_cache: dict
+    :param objects_types: Types of all objects, indexed by their IDs. If None (default), it is created from the received
+    future objects, which must then be all the graph's future objects.
+    :type objects_types: dict[str, str]
+    :param list_dictionaries: Container to which the dictionaries are appended (e.g., a SpilledDictionaries). If None
+    (default), a new list is created.
+    :type list_dictionaries: list
+    :return: List of individual dictionaries to be later mounted (i.e., the received container, if any).
+    :rtype: list[OntoUMLObject]
+    """
 
-def fill_json_objects(object_dict: dict, object_type: str) -> dict:
-    """ Fills objects' keys with null values (None) when they are not available.
+    if objects_types is None:
+        objects_types = create_objects_types_index(list_of_future_objects, values_cache)
 
-    :param object_dict: Object dictionary containing only known data.
-    :type object_dict: dict
-    :param object_type: Type of the object dictionary.
-    :type object_type: str
-    :return: Updated object dictionary, now with null (None) values for empty fields.
-    :rtype: dict
-    """
+    if list_dictionaries is None:
+        list_dictionaries = []
 
-    keys_list = return_key_pattern(object_type)
+    for uri_elem_id, uri_elem_type in list_of_future_objects:
+        elem_id = get_dictionary_value(uri_elem_id, values_cache)
+        elem_type = sys.intern(uri_elem_type.toPython().replace(URI_ONTOUML, ""))
 
-    # SPECIFIC CASE
-    # If any specific case is found, it must be treated here.
+        ontouml_object = create_ontouml_object(elem_id, elem_type, properties_buckets[uri_elem_id])
 
-    # Specific Case 1: Issue XX opened.
-    # if (object_dict["type"]=="Diagram") and ("contents" not in object_dict):
-    #     object_dict["contents"] = []
+        # Treating specific types
+        treat_object_type(ontouml_object, objects_types)
 
-    # GENERAL CASE
-    for key in keys_list:
-        # If the key is not found in the received dictionary, it will receive this new key with value None
-        if key not in object_dict.keys():
-            object_dict[key] = None
+        list_dictionaries.append(ontouml_object)
 
-    return object_dict
+    return list_dictionaries
 
 
-def create_data_dictionaries(ontology_graph: Graph) -> list[(dict, str)]:
-    """ Create a list of individual data dictionaries for each future JSON object.
+def create_data_dictionaries(ontology_graph: Graph, bulk_extraction: bool = None) -> (list[OntoUMLObject], dict):
+    """ Create a list of individual (and already treated) data dictionaries for each future JSON object. Also returns
+    the number of occurrences of each object type, obtained while searching for the future objects.
 
     :param ontology_graph: Graph compliant with the OntoUML Vocabulary loaded from file.
     :type ontology_graph: Graph
-    :return: List of individual dictionaries to be later filled and mounted.
-    :rtype: list[dict]
+    :param bulk_extraction: Indicates if all triples must be obtained in a single iteration over the graph (see
+    create_properties_buckets). If None (default), it is used only for graphs that are not kept in memory.
+    :type bulk_extraction: bool
+    :return: List of individual dictionaries to be later filled and mounted and dictionary with types and respective
+    number of occurrences.
+    :rtype: (list[OntoUMLObject], dict)
     """
 
-    list_dictionaries = []
+    values_cache = {}
+
+    if bulk_extraction is None:
+        bulk_extraction = not isinstance(ontology_graph.store, Memory)
 
     # Querying elements to become future dictionaries.
     # list_of_future_objects is a list[(URIRef1, URIRef2)], where URIRef1 is the element's ID and URIRef2 is its type.
-    list_of_future_objects = get_future_objects(ontology_graph)
+    list_of_future_objects, available_types = get_future_objects(ontology_graph)
 
-    for uri_elem_id, uri_elem_type in list_of_future_objects:
-        # Getting dictionary properties
-        object_dictionary = create_individual_object_dictionary(uri_elem_id, uri_elem_type, ontology_graph)
+    # Getting all dictionaries properties
+    properties_buckets = create_properties_buckets(ontology_graph, list_of_future_objects, values_cache,
+                                                   bulk_extraction)
 
-        # Complete dictionaries with null values
-        elem_type = uri_elem_type.toPython().replace(URI_ONTOUML, "")
-        object_dictionary = fill_json_objects(object_dictionary, elem_type)
-        list_dictionaries.append(object_dictionary)
+    list_dictionaries = create_dictionaries_from_buckets(list_of_future_objects, properties_buckets, values_cache)
 
-    return list_dictionaries
+    return list_dictionaries, available_types
+
+
+def group_graph_triples(graph_triples: Iterable[tuple[Node, Node, Node]],
+                        keys_cache: dict) -> (Graph, dict[URIRef, dict[URIRef, dict]]):
+    """ Consumes a stream of triples keeping only the ones that may be part of the JSON. The rdf:type triples are kept
+    in a (small) types graph and the other triples are grouped by subject in the same order they would have in a Graph.
+
+    The grouped triples are represented as nested dictionaries (subject -> predicate -> object -> None), which keep the
+    graph's order of predicates and objects and ignore repeated triples.
+
+    :param graph_triples: Triples of a graph compliant with the OntoUML Vocabulary.
+    :type graph_triples: Iterable[tuple[Node, Node, Node]]
+    :param keys_cache: Dictionary with the keys already calculated for predicates.
+    :type keys_cache: dict
+    :return: Graph containing only the rdf:type triples and dictionary with the grouped triples of each subject.
+    :rtype: (Graph, dict[URIRef, dict[URIRef, dict]])
+    """
+
+    types_graph = Graph()
+    subjects_properties = {}
+
+    for s, p, o in graph_triples:
+
+        if p == RDF.type:
+            types_graph.add((s, p, o))
+            continue
+
+        # Only individuals from the ontology's namespace can become objects
+        if not s.startswith(URI_ONTOLOGY):
+            continue
+
+        dict_key = keys_cache.get(p, keys_cache)
+        if dict_key is keys_cache:
+            dict_key = keys_cache[p] = get_dictionary_key(p)
+        if dict_key is None:
+            continue
+
+        subjects_properties.setdefault(s, {}).setdefault(p, {})[o] = None
+
+    return types_graph, subjects_properties
+
+
+def create_grouped_properties_bucket(subject_properties: dict[URIRef, dict], keys_cache: dict,
+                                     values_cache: dict) -> list[(str, object)]:
+    """ Creates the properties bucket of an object from its grouped triples.
+
+    :param subject_properties: Dictionary with the object's predicates as keys and dictionaries of objects as values.
+    :type subject_properties: dict[URIRef, dict]
+    :param keys_cache: Dictionary with the keys already calculated for predicates.
+    :type keys_cache: dict
+    :param values_cache: Dictionary with the values already calculated for IRIs and blank nodes.
+    :type values_cache: dict
+    :return: List of the object's properties as (dict_key, dict_value) tuples.
+    :rtype: list[(str, object)]
+    """
+
+    properties_bucket = []
+
+    for p, objects in subject_properties.items():
+        for o in objects:
+            add_property_to_bucket(properties_bucket, p, o, keys_cache, values_cache)
+
+    return properties_bucket
+
+
+def create_streamed_data_dictionaries(graph_triples: Iterable[tuple[Node, Node, Node]]) -> (list[OntoUMLObject], dict):
+    """ Create a list of individual data dictionaries for each future JSON object from a stream of triples, without
+    loading the whole graph into memory.
+
+    While the triples are consumed, only the ones that may be part of the JSON are kept, grouped by subject in the same
+    order they would have in a Graph. The rdf:type triples are kept in a (small) types graph, which is used to find
+    the future objects.
+
+    :param graph_triples: Triples of a graph compliant with the OntoUML Vocabulary.
+    :type graph_triples: Iterable[tuple[Node, Node, Node]]
+    :return: List of individual dictionaries to be later mounted and dictionary with types and respective number of
+    occurrences.
+    :rtype: (list[OntoUMLObject], dict)
+    """
+
+    keys_cache = {}
+    values_cache = {}
+
+    types_graph, subjects_properties = group_graph_triples(graph_triples, keys_cache)
+
+    list_of_future_objects, available_types = get_future_objects(types_graph)
+
+    properties_buckets = {}
+    for uri_elem_id, _ in list_of_future_objects:
+        properties_buckets[uri_elem_id] = create_grouped_properties_bucket(subjects_properties.pop(uri_elem_id, {}),
+                                                                           keys_cache, values_cache)
+
+    list_dictionaries = create_dictionaries_from_buckets(list_of_future_objects, properties_buckets, values_cache)
+
+    return list_dictionaries, available_types
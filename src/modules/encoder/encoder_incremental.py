@@ -0,0 +1,469 @@
+""" Incremental encoding of graphs that change by a few triples at a time (e.g., models re-exported on every save).
+
+An encoding state keeps the graph's triples that may be part of the JSON, the individual (unmounted) dictionary of each
+object, the index of which dictionaries reference each ID (containment index) and the mounted dictionaries. When a
+delta of removed and added triples is applied, only the dictionaries of the affected objects are created again, and
+only them and their ancestors are mounted again. The other mounted dictionaries are reused as they are, so the
+returned JSON shares its unchanged subtrees with the previously returned ones, which are never modified.
+
+The state mimics the order of rdflib's in-memory store, so the result of applying a delta is always equal to the
+result of encoding again the whole graph after calling Graph.remove and Graph.add with the same triples. While the
+graph has shared references (see has_shared_references in encoder_mount), its mounting is replayed as a whole and no
+mounted dictionary is reused.
+"""
+
+from typing import Iterable
+
+from rdflib import Graph, RDF, URIRef
+from rdflib.term import Node
+
+from modules.encoder.encoder_create import get_future_objects, group_graph_triples, get_dictionary_key, \
+    get_dictionary_value, create_grouped_properties_bucket, create_objects_types_index
+from modules.encoder.encoder_model import create_ontouml_object, OntoUMLObject
+from modules.encoder.encoder_mount import get_root_dictionary, index_dictionaries, iterate_searched_values, \
+    mount_dictionary, mount_indexed_dictionaries
+from modules.encoder.encoder_mount_shared import mount_shared_json_dictionary
+from modules.encoder.encoder_types_treatment import treat_object_type, TYPE_HANDLERS
+from modules.io_graph import get_graph_triples_in_index_order
+from src.modules.globals import URI_ONTOLOGY, URI_ONTOUML
+
+
+class EncodingState:
+    """ State of a graph's encoding, used for re-encoding it incrementally.
+
+    :ivar types_graph: Graph containing only the rdf:type triples.
+    :ivar subjects_properties: Nested dictionaries (subject -> predicate -> object -> None) with the other triples.
+    :ivar keys_cache: Dictionary with the keys already calculated for predicates.
+    :ivar values_cache: Dictionary with the values already calculated for IRIs and blank nodes.
+    :ivar object_dictionaries: Individual dictionary of each future object, indexed by its (URI, type URI) tuple.
+    :ivar available_types: Dictionary with types and respective number of occurrences.
+    :ivar objects_types: Types of all objects, indexed by their IDs.
+    :ivar list_dictionaries: List with all individual object dictionaries in mounting order.
+    :ivar dictionaries_index: Index with the position of each ID, without the upper level dictionary's ID.
+    :ivar root_id: ID of the upper level dictionary.
+    :ivar references_index: Containment index. Maps each referenced value to the IDs of the dictionaries that hold it
+    and the number of times it is held.
+    :ivar searched_references: Number of times each value is verified by the mounting (see iterate_searched_values).
+    :ivar repeated_references: Values verified more than once by the mounting.
+    :ivar mounted_dictionaries: Mounted dictionaries, indexed by their IDs.
+    :ivar json_data: Last encoded JSON dictionary.
+    """
+
+    def __init__(self, types_graph: Graph, subjects_properties: dict[URIRef, dict], keys_cache: dict):
+        self.types_graph = types_graph
+        self.subjects_properties = subjects_properties
+        self.keys_cache = keys_cache
+        self.values_cache = {}
+        self.object_dictionaries = {}
+        self.available_types = {}
+        self.objects_types = {}
+        self.list_dictionaries = []
+        self.dictionaries_index = {}
+        self.root_id = None
+        self.references_index = {}
+        self.searched_references = {}
+        self.repeated_references = set()
+        self.mounted_dictionaries = {}
+        self.json_data = None
+
+
+def get_dictionary_references(dictionary: dict) -> list[str]:
+    """ Returns all string values of a dictionary that may reference other dictionaries, including the ones in nested
+    lists and dictionaries. The dictionary's own ID is not returned.
+
+    :param dictionary: Individual object dictionary.
+    :type dictionary: dict
+    :return: List of values that may be references.
+    :rtype: list[str]
+    """
+
+    list_references = []
+    pending_values = [value for key, value in dictionary.items() if key != 'id']
+
+    while pending_values:
+        value = pending_values.pop()
+        if type(value) is str:
+            list_references.append(value)
+        elif type(value) is list:
+            pending_values.extend(value)
+        elif type(value) is dict:
+            pending_values.extend(value.values())
+
+    return list_references
+
+
+def update_references_index(references_index: dict[str, dict[str, int]], dictionary: dict, increment: int) -> None:
+    """ Adds (increment=1) or removes (increment=-1) the references held by a dictionary to or from the references
+    index.
+
+    :param references_index: Maps each referenced value to the IDs of the dictionaries that hold it.
+    :type references_index: dict[str, dict[str, int]]
+    :param dictionary: Individual object dictionary.
+    :type dictionary: dict
+    :param increment: 1 for adding the dictionary's references or -1 for removing them.
+    :type increment: int
+    """
+
+    holder_id = dictionary['id']
+
+    for reference in get_dictionary_references(dictionary):
+        holders = references_index.setdefault(reference, {})
+        holders[holder_id] = holders.get(holder_id, 0) + increment
+        if not holders[holder_id]:
+            del holders[holder_id]
+            if not holders:
+                del references_index[reference]
+
+
+def update_searched_references(encoding_state: EncodingState, dictionary: dict, increment: int) -> None:
+    """ Adds (increment=1) or removes (increment=-1) the values of a dictionary that are verified by the mounting to or
+    from the encoding state's counts, which are used for detecting shared references.
+
+    :param encoding_state: Encoding state of the graph.
+    :type encoding_state: EncodingState
+    :param dictionary: Individual object dictionary.
+    :type dictionary: dict
+    :param increment: 1 for adding the dictionary's values or -1 for removing them.
+    :type increment: int
+    """
+
+    searched_references = encoding_state.searched_references
+
+    for value in iterate_searched_values(dictionary):
+        count = searched_references.get(value, 0) + increment
+        if count:
+            searched_references[value] = count
+        else:
+            del searched_references[value]
+
+        if count > 1:
+            encoding_state.repeated_references.add(value)
+        else:
+            encoding_state.repeated_references.discard(value)
+
+
+def create_object_dictionary(encoding_state: EncodingState, uri_elem_id: URIRef, uri_elem_type: URIRef,
+                             objects_types: dict[str, str]) -> OntoUMLObject:
+    """ Creates the individual (treated) dictionary of an object from the triples kept in the encoding state.
+
+    :param encoding_state: Encoding state of the graph.
+    :type encoding_state: EncodingState
+    :param uri_elem_id: URI of the object.
+    :type uri_elem_id: URIRef
+    :param uri_elem_type: URI of the object's type.
+    :type uri_elem_type: URIRef
+    :param objects_types: Types of all objects, indexed by their IDs.
+    :type objects_types: dict[str, str]
+    :return: New object's dictionary, completed with null values.
+    :rtype: OntoUMLObject
+    """
+
+    elem_id = get_dictionary_value(uri_elem_id, encoding_state.values_cache)
+    elem_type = uri_elem_type.toPython().replace(URI_ONTOUML, "")
+
+    properties_bucket = create_grouped_properties_bucket(encoding_state.subjects_properties.get(uri_elem_id, {}),
+                                                         encoding_state.keys_cache, encoding_state.values_cache)
+
+    ontouml_object = create_ontouml_object(elem_id, elem_type, properties_bucket)
+    treat_object_type(ontouml_object, objects_types)
+
+    return ontouml_object
+
+
+def update_object_dictionaries(encoding_state: EncodingState, changed_subjects: set[URIRef],
+                               dependent_ids: set[str], is_retyped: bool = True) -> set[str]:
+    """ Updates the list of individual dictionaries after a change of the encoding state's triples. Dictionaries are
+    only created for new objects, for objects whose triples changed, and for objects with a type handler (e.g.,
+    diagrams) that reference objects whose types changed, as their handlers must resolve these references again.
+
+    :param encoding_state: Encoding state of the graph.
+    :type encoding_state: EncodingState
+    :param changed_subjects: Subjects whose properties changed.
+    :type changed_subjects: set[URIRef]
+    :param dependent_ids: IDs of the dictionaries that hold references to objects whose types changed.
+    :type dependent_ids: set[str]
+    :param is_retyped: Indicates if any rdf:type triple changed. If not, the future objects do not need to be searched
+    again, as they are the same.
+    :type is_retyped: bool
+    :return: IDs of the created dictionaries.
+    :rtype: set[str]
+    """
+
+    previous_dictionaries = encoding_state.object_dictionaries
+
+    if is_retyped:
+        list_of_future_objects, available_types = get_future_objects(encoding_state.types_graph)
+        objects_types = create_objects_types_index(list_of_future_objects, encoding_state.values_cache)
+        object_dictionaries = {}
+    else:
+        list_of_future_objects = [(uri_elem_id, uri_elem_type) for uri_elem_id in changed_subjects
+                                  for uri_elem_type in encoding_state.types_graph.objects(uri_elem_id, RDF.type)
+                                  if (uri_elem_id, uri_elem_type) in previous_dictionaries]
+        available_types = encoding_state.available_types
+        objects_types = encoding_state.objects_types
+        object_dictionaries = previous_dictionaries.copy()
+
+    list_replaced_dictionaries = []
+    list_created_dictionaries = []
+
+    for uri_elem_id, uri_elem_type in list_of_future_objects:
+        object_dictionary = previous_dictionaries.get((uri_elem_id, uri_elem_type))
+
+        if object_dictionary is None or uri_elem_id in changed_subjects or \
+                (object_dictionary['type'] in TYPE_HANDLERS and object_dictionary['id'] in dependent_ids):
+            if object_dictionary is not None:
+                list_replaced_dictionaries.append(object_dictionary)
+            object_dictionary = create_object_dictionary(encoding_state, uri_elem_id, uri_elem_type, objects_types)
+            list_created_dictionaries.append(object_dictionary)
+
+        object_dictionaries[(uri_elem_id, uri_elem_type)] = object_dictionary
+
+    # The state is only modified after all dictionaries are successfully created
+    if is_retyped:
+        for object_key, object_dictionary in previous_dictionaries.items():
+            if object_key not in object_dictionaries:
+                list_replaced_dictionaries.append(object_dictionary)
+
+    for object_dictionary in list_replaced_dictionaries:
+        update_references_index(encoding_state.references_index, object_dictionary, -1)
+        update_searched_references(encoding_state, object_dictionary, -1)
+
+    for object_dictionary in list_created_dictionaries:
+        update_references_index(encoding_state.references_index, object_dictionary, 1)
+        update_searched_references(encoding_state, object_dictionary, 1)
+
+    encoding_state.object_dictionaries = object_dictionaries
+    encoding_state.list_dictionaries = list(object_dictionaries.values())
+    encoding_state.available_types = available_types
+    encoding_state.objects_types = objects_types
+
+    return {object_dictionary['id'] for object_dictionary in list_created_dictionaries}
+
+
+def get_holders_closure(references_index: dict[str, dict[str, int]], list_ids: Iterable[str]) -> set[str]:
+    """ Returns the received IDs and the IDs of all dictionaries that directly or indirectly hold references to them.
+
+    :param references_index: Maps each referenced value to the IDs of the dictionaries that hold it.
+    :type references_index: dict[str, dict[str, int]]
+    :param list_ids: IDs whose holders are searched.
+    :type list_ids: Iterable[str]
+    :return: Set with the received IDs and the IDs of their holders.
+    :rtype: set[str]
+    """
+
+    closure_ids = set(list_ids)
+    pending_ids = list(closure_ids)
+
+    while pending_ids:
+        for holder_id in references_index.get(pending_ids.pop(), ()):
+            if holder_id not in closure_ids:
+                closure_ids.add(holder_id)
+                pending_ids.append(holder_id)
+
+    return closure_ids
+
+
+def mount_encoding_state(encoding_state: EncodingState, dirty_ids: set[str] = None, is_reordered: bool = True) -> dict:
+    """ Mounts the JSON dictionary of the encoding state. If dirty_ids is None, all dictionaries are mounted. Otherwise,
+    only the dictionaries with the received IDs are mounted again and the others are reused.
+
+    :param encoding_state: Encoding state of the graph.
+    :type encoding_state: EncodingState
+    :param dirty_ids: IDs of the dictionaries that must be mounted again.
+    :type dirty_ids: set[str]
+    :param is_reordered: Indicates if dictionaries were added, removed or moved. If not, the previous index is reused.
+    :type is_reordered: bool
+    :return: Single dictionary with all graph's content in a format to be encoded into a JSON file.
+    :rtype: dict
+    """
+
+    list_dictionaries = encoding_state.list_dictionaries
+    root_dictionary = get_root_dictionary(list_dictionaries)
+
+    if dirty_ids is not None and not is_reordered:
+        dictionaries_index = encoding_state.dictionaries_index
+    else:
+        dictionaries_index = index_dictionaries(list_dictionaries)
+
+        # The upper level dictionary is never used to replace a reference
+        del dictionaries_index[root_dictionary['id']]
+
+    # Repeated IDs and references to the same ID are shared references (see has_shared_references in encoder_mount)
+    if len(dictionaries_index) + 1 < len(list_dictionaries) or \
+            any(value in dictionaries_index for value in encoding_state.repeated_references):
+        encoding_state.mounted_dictionaries = {}
+        encoding_state.dictionaries_index = dictionaries_index
+
+        # No mounted dictionary is kept, so all of them are mounted in the next delta
+        encoding_state.root_id = None
+
+        encoding_state.json_data = mount_shared_json_dictionary(list_dictionaries, root_dictionary)
+        return encoding_state.json_data
+
+    # Positions of all dictionaries are changed when the upper level dictionary changes
+    if dirty_ids is None or root_dictionary['id'] != encoding_state.root_id:
+        encoding_state.mounted_dictionaries = {}
+        positions = range(len(list_dictionaries))
+    else:
+        for elem_id in encoding_state.dictionaries_index.keys() - dictionaries_index.keys():
+            encoding_state.mounted_dictionaries.pop(elem_id, None)
+        positions = [dictionaries_index[elem_id] for elem_id in dirty_ids if elem_id in dictionaries_index]
+
+    mount_indexed_dictionaries(list_dictionaries, positions, dictionaries_index, encoding_state.mounted_dictionaries)
+
+    encoding_state.dictionaries_index = dictionaries_index
+    encoding_state.root_id = root_dictionary['id']
+
+    # The upper level dictionary can reference any other dictionary
+    encoding_state.json_data = mount_dictionary(root_dictionary, -1, set(), dictionaries_index,
+                                                encoding_state.mounted_dictionaries)
+
+    return encoding_state.json_data
+
+
+def encode_whole_state(encoding_state: EncodingState) -> dict:
+    """ Creates and mounts again all dictionaries of the encoding state.
+
+    :param encoding_state: Encoding state of the graph.
+    :type encoding_state: EncodingState
+    :return: Single dictionary with all graph's content in a format to be encoded into a JSON file.
+    :rtype: dict
+    """
+
+    encoding_state.json_data = None
+    encoding_state.object_dictionaries = {}
+    encoding_state.references_index = {}
+    encoding_state.searched_references = {}
+    encoding_state.repeated_references = set()
+
+    update_object_dictionaries(encoding_state, set(), set())
+
+    return mount_encoding_state(encoding_state)
+
+
+def create_encoding_state(graph_triples: Iterable[tuple[Node, Node, Node]]) -> EncodingState:
+    """ Encodes a stream of triples of a graph compliant with the OntoUML Vocabulary, keeping the state needed for
+    re-encoding it incrementally. The encoded JSON dictionary is available in the state's json_data attribute.
+
+    :param graph_triples: Triples of a graph compliant with the OntoUML Vocabulary.
+    :type graph_triples: Iterable[tuple[Node, Node, Node]]
+    :return: Encoding state of the graph.
+    :rtype: EncodingState
+    """
+
+    keys_cache = {}
+    types_graph, subjects_properties = group_graph_triples(graph_triples, keys_cache)
+
+    encoding_state = EncodingState(types_graph, subjects_properties, keys_cache)
+    encode_whole_state(encoding_state)
+
+    return encoding_state
+
+
+def create_graph_encoding_state(ontology_graph: Graph) -> EncodingState:
+    """ Encodes a Graph compliant with the OntoUML Vocabulary, keeping the state needed for re-encoding it
+    incrementally. The encoded JSON dictionary is available in the state's json_data attribute.
+
+    :param ontology_graph: Graph compliant with the OntoUML Vocabulary loaded from file.
+    :type ontology_graph: Graph
+    :return: Encoding state of the graph.
+    :rtype: EncodingState
+    """
+
+    return create_encoding_state(get_graph_triples_in_index_order(ontology_graph))
+
+
+def update_state_triples(encoding_state: EncodingState, graph_triples: Iterable[tuple[Node, Node, Node]],
+                         is_addition: bool, changed_subjects: set[URIRef], retyped_subjects: set[URIRef]) -> None:
+    """ Adds or removes triples from the encoding state, registering the subjects whose properties or types changed.
+    As in rdflib's in-memory store, removing all objects of a predicate keeps the predicate's original position.
+
+    :param encoding_state: Encoding state of the graph.
+    :type encoding_state: EncodingState
+    :param graph_triples: Triples to be added or removed.
+    :type graph_triples: Iterable[tuple[Node, Node, Node]]
+    :param is_addition: True if the triples must be added. False if they must be removed.
+    :type is_addition: bool
+    :param changed_subjects: Set updated with the subjects whose properties changed.
+    :type changed_subjects: set[URIRef]
+    :param retyped_subjects: Set updated with the subjects whose types changed.
+    :type retyped_subjects: set[URIRef]
+    """
+
+    for s, p, o in graph_triples:
+
+        if p == RDF.type:
+            if ((s, p, o) in encoding_state.types_graph) != is_addition:
+                if is_addition:
+                    encoding_state.types_graph.add((s, p, o))
+                else:
+                    encoding_state.types_graph.remove((s, p, o))
+                retyped_subjects.add(s)
+            continue
+
+        # Only individuals from the ontology's namespace can become objects
+        if not s.startswith(URI_ONTOLOGY):
+            continue
+
+        dict_key = encoding_state.keys_cache.get(p, encoding_state.keys_cache)
+        if dict_key is encoding_state.keys_cache:
+            dict_key = encoding_state.keys_cache[p] = get_dictionary_key(p)
+        if dict_key is None:
+            continue
+
+        if is_addition:
+            objects = encoding_state.subjects_properties.setdefault(s, {}).setdefault(p, {})
+            if o not in objects:
+                objects[o] = None
+                changed_subjects.add(s)
+        else:
+            objects = encoding_state.subjects_properties.get(s, {}).get(p, {})
+            if o in objects:
+                del objects[o]
+                changed_subjects.add(s)
+
+
+def encode_graph_delta(encoding_state: EncodingState, added_triples: Iterable[tuple[Node, Node, Node]] = (),
+                       removed_triples: Iterable[tuple[Node, Node, Node]] = ()) -> dict:
+    """ Applies a delta to the graph represented by the encoding state and returns the updated JSON dictionary. The
+    removed triples are applied before the added ones.
+
+    :param encoding_state: Encoding state of the graph, which is updated.
+    :type encoding_state: EncodingState
+    :param added_triples: Triples added to the graph.
+    :type added_triples: Iterable[tuple[Node, Node, Node]]
+    :param removed_triples: Triples removed from the graph.
+    :type removed_triples: Iterable[tuple[Node, Node, Node]]
+    :return: JSON compliant with the OntoUML-Schema obtained from the updated graph.
+    :rtype: dict
+    """
+
+    changed_subjects = set()
+    retyped_subjects = set()
+
+    update_state_triples(encoding_state, removed_triples, False, changed_subjects, retyped_subjects)
+    update_state_triples(encoding_state, added_triples, True, changed_subjects, retyped_subjects)
+
+    # If the previous encoding failed, the state's dictionaries may be outdated
+    if encoding_state.json_data is None:
+        return encode_whole_state(encoding_state)
+
+    if not changed_subjects and not retyped_subjects:
+        return encoding_state.json_data
+
+    # Cleared first, so that a failed update is not mistaken by an up-to-date encoding
+    encoding_state.json_data = None
+
+    # Objects whose types changed are created, removed or moved, so their holders must resolve their references again
+    retyped_ids = {get_dictionary_value(s, encoding_state.values_cache) for s in retyped_subjects}
+    dependent_ids = set()
+    for elem_id in retyped_ids:
+        dependent_ids.update(encoding_state.references_index.get(elem_id, ()))
+
+    is_retyped = bool(retyped_subjects)
+    created_ids = update_object_dictionaries(encoding_state, changed_subjects, dependent_ids, is_retyped)
+
+    # Mount again the changed dictionaries and all their ancestors
+    dirty_ids = get_holders_closure(encoding_state.references_index, created_ids | retyped_ids | dependent_ids)
+
+    return mount_encoding_state(encoding_state, dirty_ids, is_retyped)
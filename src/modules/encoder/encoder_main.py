@@ -1,28 +1,279 @@
 """ Encoding functions for the diverse types of objects that are part of the OntoUML-Schema. """
 
-from modules.encoder.encoder_create import create_data_dictionaries
+import io
+from typing import Iterable, Iterator
+
+from modules.encoder.encoder_create import create_data_dictionaries, create_streamed_data_dictionaries
 from modules.encoder.encoder_mount import mount_json_dictionary
-from modules.encoder.encoder_types_treatment import treat_dictionary_types
+from modules.encoder.encoder_spill import create_spilled_data_dictionaries, \
+    create_spilled_streamed_data_dictionaries, write_spilled_json_file, SpilledDictionaries, MEMORY_BUDGET_UNIT
+from modules.graph_input import STREAMABLE_GRAPH_FORMATS
+from modules.instrumentation import create_instrumentation_report, finish_instrumentation_report, measure_stage
+from modules.io_graph import load_all_graph_safely, load_graph_snapshot_safely, is_streamable_graph_file, \
+    stream_graph_triples, GRAPH_SNAPSHOT_BACKEND, GRAPH_STORE_BACKEND_DEFAULT
+from modules.ntriples_tokenizer import tokenize_graph_lines
 from rdflib import Graph
+from rdflib.term import Node
+
+
+def count_graph_triples(graph_triples: Iterable[tuple[Node, Node, Node]],
+                        stage_counts: dict) -> Iterator[tuple[Node, Node, Node]]:
+    """ Yields the received triples, counting them in the stage_counts' 'triples' key.
+
+    :param graph_triples: Triples to be counted.
+    :type graph_triples: Iterable[tuple[Node, Node, Node]]
+    :param stage_counts: Counts of the stage that consumes the triples.
+    :type stage_counts: dict
+    :return: Iterator over the received triples.
+    :rtype: Iterator[tuple[Node, Node, Node]]
+    """
+
+    stage_counts["triples"] = 0
 
+    for triple in graph_triples:
+        stage_counts["triples"] += 1
+        yield triple
 
-def encode_graph_to_json(ontology_graph: Graph) -> dict:
+
+def encode_graph_to_json(ontology_graph: Graph, instrumentation_report: dict = None) -> dict:
     """ Receives a Graph compliant with the OntoUML Vocabulary and encode it into a
     JSON compliant with the OntoUML-Schema.
 
     :param ontology_graph: Graph compliant with the OntoUML Vocabulary loaded from file.
     :type ontology_graph: Graph
+    :param instrumentation_report: Report in which the stages are measured. If None (default), they are not measured.
+    :type instrumentation_report: dict
     :return: JSON compliant with the OntoUML-Schema obtained from the received Graph.
     :rtype: dict
     """
 
     # Creating a list of individual dictionaries to be later mounted into a single dictionary using the compositions
-    list_dictionaries = create_data_dictionaries(ontology_graph)
+    with measure_stage(instrumentation_report, "create_data_dictionaries") as stage_counts:
+        list_dictionaries, available_types = create_data_dictionaries(ontology_graph)
+        stage_counts["objects"] = len(list_dictionaries)
+        stage_counts["types"] = available_types
 
-    # Treating specific types
-    treat_dictionary_types(list_dictionaries, ontology_graph)
+    # Mount dictionaries into a single dictionary using the compositions
+    with measure_stage(instrumentation_report, "mount_json_dictionary") as stage_counts:
+        json_data = mount_json_dictionary(list_dictionaries)
+        stage_counts["objects"] = len(list_dictionaries)
+
+    return json_data
+
+
+def encode_streamed_graph_to_json(graph_triples: Iterable[tuple[Node, Node, Node]],
+                                  instrumentation_report: dict = None) -> dict:
+    """ Receives a stream of triples of a graph compliant with the OntoUML Vocabulary and encode it into a
+    JSON compliant with the OntoUML-Schema, without loading the whole graph into memory.
+
+    As the triples are read while the dictionaries are created, reading and creation are measured as a single stage.
+
+    :param graph_triples: Triples of a graph compliant with the OntoUML Vocabulary (e.g., read from a N-Triples file).
+    :type graph_triples: Iterable[tuple[Node, Node, Node]]
+    :param instrumentation_report: Report in which the stages are measured. If None (default), they are not measured.
+    :type instrumentation_report: dict
+    :return: JSON compliant with the OntoUML-Schema obtained from the received triples.
+    :rtype: dict
+    """
+
+    # Creating a list of individual dictionaries while the triples are consumed
+    with measure_stage(instrumentation_report, "stream_and_create_data_dictionaries") as stage_counts:
+        if instrumentation_report is not None:
+            graph_triples = count_graph_triples(graph_triples, stage_counts)
+        list_dictionaries, available_types = create_streamed_data_dictionaries(graph_triples)
+        stage_counts["objects"] = len(list_dictionaries)
+        stage_counts["types"] = available_types
 
     # Mount dictionaries into a single dictionary using the compositions
-    json_data = mount_json_dictionary(list_dictionaries)
+    with measure_stage(instrumentation_report, "mount_json_dictionary") as stage_counts:
+        json_data = mount_json_dictionary(list_dictionaries)
+        stage_counts["objects"] = len(list_dictionaries)
 
     return json_data
+
+
+def encode_graph_file_to_json(graph_file_path: str, store_directory: str = None,
+                              store_backend: str = GRAPH_STORE_BACKEND_DEFAULT,
+                              instrumentation_report: dict = None, parallel_workers: int = None) -> dict:
+    """ Reads a graph file compliant with the OntoUML Vocabulary and encode it into a JSON compliant with the
+    OntoUML-Schema. The file may be compressed (see graph_input). Line-based formats are encoded while read, without
+    loading the whole Graph.
+
+    If a store directory is provided, the graph is loaded into (or reused from) a persistent store instead. When the
+    store backend is GRAPH_SNAPSHOT_BACKEND, the triples are read from (or written into and then read from) the graph
+    file's memory-mapped binary snapshot and encoded while read, without parsing the file. If a number of parallel
+    workers is provided, the whole Graph is loaded and its package subtrees are encoded in parallel (see
+    encoder_parallel).
+
+    :param graph_file_path: Path to the Graph file to be encoded.
+    :type graph_file_path: str
+    :param store_directory: Directory of the persistent stores. If None (default), no persistent store is used.
+    :type store_directory: str
+    :param store_backend: Name of the rdflib store plugin used for the persistent store.
+    :type store_backend: str
+    :param instrumentation_report: Report in which the stages are measured. If None (default), they are not measured.
+    :type instrumentation_report: dict
+    :param parallel_workers: Maximum number of worker processes used for encoding the graph. If None (default), the
+    graph is encoded by the current process.
+    :type parallel_workers: int
+    :return: JSON compliant with the OntoUML-Schema obtained from the received Graph file.
+    :rtype: dict
+    """
+
+    if store_directory is None and parallel_workers is None and is_streamable_graph_file(graph_file_path):
+        return encode_streamed_graph_to_json(stream_graph_triples(graph_file_path), instrumentation_report)
+
+    if store_directory is not None and store_backend == GRAPH_SNAPSHOT_BACKEND and parallel_workers is None:
+        with measure_stage(instrumentation_report, "load_snapshot") as stage_counts:
+            graph_snapshot = load_graph_snapshot_safely(graph_file_path, store_directory)
+            stage_counts["triples"] = len(graph_snapshot)
+
+        try:
+            return encode_streamed_graph_to_json(graph_snapshot.triples(), instrumentation_report)
+        finally:
+            graph_snapshot.close()
+
+    # Load Graph
+    with measure_stage(instrumentation_report, "load") as stage_counts:
+        ontology_graph = load_all_graph_safely(graph_file_path, store_directory, store_backend)
+        if instrumentation_report is not None:
+            stage_counts["triples"] = len(ontology_graph)
+
+    # Encode Graph into JSON dictionary
+    try:
+        if parallel_workers is not None:
+            # Imported only when needed, as the parallel encoding module depends on this one
+            from modules.encoder.encoder_parallel import encode_graph_to_json_parallel
+            return encode_graph_to_json_parallel(ontology_graph, parallel_workers, instrumentation_report)
+
+        return encode_graph_to_json(ontology_graph, instrumentation_report)
+    finally:
+        ontology_graph.close()
+
+
+def encode_graph_file_to_json_file(graph_file_path: str, json_path: str, memory_budget: int,
+                                   store_directory: str = None, store_backend: str = GRAPH_STORE_BACKEND_DEFAULT,
+                                   instrumentation_report: dict = None, spill_directory: str = None,
+                                   compression: str = None) -> None:
+    """ Reads a graph file compliant with the OntoUML Vocabulary and encode it into a JSON file compliant with the
+    OntoUML-Schema, keeping the intermediate objects within a memory budget (see encoder_spill). The written file is
+    identical to the one saved from encode_graph_file_to_json's result, but the JSON dictionary is never in memory.
+
+    The graph is read as in encode_graph_file_to_json (i.e., streamed, from a persistent store or from a snapshot).
+    For graphs larger than the working memory, a persistent store must also be used.
+
+    :param graph_file_path: Path to the Graph file to be encoded.
+    :type graph_file_path: str
+    :param json_path: Path in which the JSON file will be saved (or io_json.JSON_STANDARD_OUTPUT).
+    :type json_path: str
+    :param memory_budget: Maximum size of the intermediate objects kept in memory, in megabytes. The objects that
+    exceed it are spilled into a temporary file.
+    :type memory_budget: int
+    :param store_directory: Directory of the persistent stores. If None (default), no persistent store is used.
+    :type store_directory: str
+    :param store_backend: Name of the rdflib store plugin used for the persistent store.
+    :type store_backend: str
+    :param instrumentation_report: Report in which the stages are measured. If None (default), they are not measured.
+    :type instrumentation_report: dict
+    :param spill_directory: Directory of the temporary file of the spilled objects. If None (default), the system's
+    temporary directory is used.
+    :type spill_directory: str
+    :param compression: Compression of the JSON file ('gzip', 'bz2' or 'xz'). If None (default), it is not compressed.
+    :type compression: str
+    """
+
+    spilled_dictionaries = SpilledDictionaries(memory_budget * MEMORY_BUDGET_UNIT, spill_directory)
+
+    try:
+        if store_directory is None and is_streamable_graph_file(graph_file_path):
+            with measure_stage(instrumentation_report, "stream_and_create_spilled_dictionaries") as stage_counts:
+                graph_triples = stream_graph_triples(graph_file_path)
+                if instrumentation_report is not None:
+                    graph_triples = count_graph_triples(graph_triples, stage_counts)
+                available_types = create_spilled_streamed_data_dictionaries(graph_triples, spilled_dictionaries)
+
+        elif store_directory is not None and store_backend == GRAPH_SNAPSHOT_BACKEND:
+            with measure_stage(instrumentation_report, "load_snapshot") as stage_counts:
+                graph_snapshot = load_graph_snapshot_safely(graph_file_path, store_directory)
+                stage_counts["triples"] = len(graph_snapshot)
+
+            try:
+                with measure_stage(instrumentation_report, "stream_and_create_spilled_dictionaries") as stage_counts:
+                    available_types = create_spilled_streamed_data_dictionaries(graph_snapshot.triples(),
+                                                                                spilled_dictionaries)
+            finally:
+                graph_snapshot.close()
+
+        else:
+            with measure_stage(instrumentation_report, "load") as stage_counts:
+                ontology_graph = load_all_graph_safely(graph_file_path, store_directory, store_backend)
+                if instrumentation_report is not None:
+                    stage_counts["triples"] = len(ontology_graph)
+
+            try:
+                with measure_stage(instrumentation_report, "create_spilled_dictionaries") as stage_counts:
+                    available_types = create_spilled_data_dictionaries(ontology_graph, spilled_dictionaries)
+            finally:
+                ontology_graph.close()
+
+        # The counts of the creation stage are kept by the report, so they can be filled after the stage is measured
+        stage_counts["objects"] = len(spilled_dictionaries)
+        stage_counts["types"] = available_types
+        stage_counts["spilled_objects"] = spilled_dictionaries.spilled_records
+
+        # Mount the dictionaries while they are written
+        with measure_stage(instrumentation_report, "mount_and_save") as stage_counts:
+            write_spilled_json_file(spilled_dictionaries, json_path, compression=compression)
+            stage_counts["objects"] = len(spilled_dictionaries)
+    finally:
+        spilled_dictionaries.close()
+
+
+def encode_graph_data_to_json(graph_data: str | bytes, graph_format: str = "turtle") -> dict:
+    """ Parses a graph compliant with the OntoUML Vocabulary received as a string (e.g., a request's payload) and
+    encode it into a JSON compliant with the OntoUML-Schema. N-Triples and N-Quads graphs are encoded while tokenized.
+
+    :param graph_data: Content of the graph.
+    :type graph_data: str | bytes
+    :param graph_format: rdflib parser format of the graph's content (e.g., 'turtle' or 'nt').
+    :type graph_format: str
+    :return: JSON compliant with the OntoUML-Schema obtained from the received graph.
+    :rtype: dict
+    """
+
+    if graph_format in STREAMABLE_GRAPH_FORMATS:
+        if isinstance(graph_data, bytes):
+            graph_data = graph_data.decode("utf-8")
+        graph_lines = io.StringIO(graph_data, newline=None)
+        return encode_streamed_graph_to_json(tokenize_graph_lines(graph_lines, STREAMABLE_GRAPH_FORMATS[graph_format]))
+
+    ontology_graph = Graph()
+    ontology_graph.parse(data=graph_data, format=graph_format)
+
+    return encode_graph_to_json(ontology_graph)
+
+
+def encode_graph_file_to_json_instrumented(graph_file_path: str, store_directory: str = None,
+                                           store_backend: str = GRAPH_STORE_BACKEND_DEFAULT) -> (dict, dict):
+    """ Reads a graph file compliant with the OntoUML Vocabulary and encode it into a JSON compliant with the
+    OntoUML-Schema, measuring each stage of the encoding.
+
+    :param graph_file_path: Path to the Graph file to be encoded.
+    :type graph_file_path: str
+    :param store_directory: Directory of the persistent stores. If None (default), no persistent store is used.
+    :type store_directory: str
+    :param store_backend: Name of the rdflib store plugin used for the persistent store.
+    :type store_backend: str
+    :return: JSON compliant with the OntoUML-Schema obtained from the received Graph file and finished instrumentation
+    report.
+    :rtype: (dict, dict)
+    """
+
+    instrumentation_report = create_instrumentation_report()
+
+    try:
+        json_data = encode_graph_file_to_json(graph_file_path, store_directory, store_backend, instrumentation_report)
+    finally:
+        finish_instrumentation_report(instrumentation_report)
+
+    return json_data, instrumentation_report
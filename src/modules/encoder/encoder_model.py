@@ -0,0 +1,235 @@
+""" Compact intermediate representation of the objects that are part of the OntoUML-Schema.
+
+Each object is an instance of the class of its OntoUML type, which stores its fields in __slots__ instead of in a
+dictionary per object. Which fields an object has, and in which order they are output, is described by its key schema:
+a tuple of keys in the order of the OntoUML-Schema, shared by all objects of the same type with the same fields. Key
+schemas are created only once and also provide a precompiled getter of their fields' values.
+
+Objects can be read (and their existing fields modified) as dictionaries, so they can be mounted and treated as the
+dictionaries they replace. They are only converted into dictionaries when mounted, just before being output as JSON.
+Fields that are not declared by the object's class are kept in a dictionary created only for the objects that have
+them.
+"""
+
+from operator import attrgetter
+from typing import Iterator
+
+from src.modules.errors import report_error_requirement_not_met
+
+# Fields whose values are lists of references, even when a single reference is found
+LIST_FIELDS = frozenset({"contents", "diagrams"})
+
+
+class KeySchema:
+    """ Ordered keys of the objects of a class that have the same fields in the same order.
+
+    :ivar object_class: Class of the objects that use the schema.
+    :ivar keys: Keys of the objects' fields, in output order.
+    :ivar key_set: Keys of the objects' fields, for membership tests.
+    :ivar get_values: Returns the tuple of an object's values, in the order of the keys.
+    """
+
+    __slots__ = ("object_class", "keys", "key_set", "get_values")
+
+    def __init__(self, object_class: type, keys: tuple[str, ...]):
+        self.object_class = object_class
+        self.keys = keys
+        self.key_set = frozenset(keys)
+
+        # Schemas always have more than one key (at least id and type), so the attrgetter always returns a tuple
+        if self.key_set <= object_class.FIELDS:
+            self.get_values = attrgetter(*keys)
+        else:
+            self.get_values = lambda ontouml_object: tuple(ontouml_object[key] for key in keys)
+
+    def __reduce__(self):
+        return get_key_schema, (self.object_class, self.keys)
+
+
+# Key schemas already created, indexed by their class and keys
+KEY_SCHEMAS: dict[tuple[type, tuple[str, ...]], KeySchema] = {}
+
+
+def get_key_schema(object_class: type, keys: tuple[str, ...]) -> KeySchema:
+    """ Returns the shared key schema of the objects of a class with the received keys, creating it if necessary.
+
+    :param object_class: Class of the objects that use the schema.
+    :type object_class: type
+    :param keys: Keys of the objects' fields, in output order.
+    :type keys: tuple[str, ...]
+    :return: Shared key schema.
+    :rtype: KeySchema
+    """
+
+    key_schema = KEY_SCHEMAS.get((object_class, keys))
+
+    if key_schema is None:
+        key_schema = KEY_SCHEMAS[(object_class, keys)] = KeySchema(object_class, keys)
+
+    return key_schema
+
+
+class OntoUMLObject:
+    """ Base class of the objects' intermediate representation, which can be read as a dictionary.
+
+    Subclasses declare their fields in __slots__ and in FIELDS, and the keys that are always output (with None when
+    they are not found in the graph) in KEY_PATTERN.
+    """
+
+    __slots__ = ("key_schema", "other_fields")
+
+    FIELDS: frozenset = frozenset()
+    KEY_PATTERN: tuple[str, ...] = ()
+
+    def __getitem__(self, key: str):
+        # Only the declared fields that are in the object's key schema have values assigned
+        if key in self.FIELDS:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        if self.other_fields is None:
+            raise KeyError(key)
+        return self.other_fields[key]
+
+    def __setitem__(self, key: str, value) -> None:
+        if key not in self.key_schema.key_set:
+            self.key_schema = get_key_schema(type(self), self.key_schema.keys + (key,))
+        if key in self.FIELDS:
+            setattr(self, key, value)
+        else:
+            if self.other_fields is None:
+                self.other_fields = {}
+            self.other_fields[key] = value
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.key_schema.key_set
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.key_schema.keys)
+
+    def __len__(self) -> int:
+        return len(self.key_schema.keys)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+    def get(self, key: str, default=None):
+        return self[key] if key in self.key_schema.key_set else default
+
+    def keys(self) -> tuple[str, ...]:
+        return self.key_schema.keys
+
+    def values(self) -> tuple:
+        return self.key_schema.get_values(self)
+
+    def items(self) -> Iterator[tuple[str, object]]:
+        return zip(self.key_schema.keys, self.key_schema.get_values(self))
+
+    def to_dict(self) -> dict:
+        return dict(self.items())
+
+
+class Project(OntoUMLObject):
+    __slots__ = ("id", "name", "description", "type", "model", "diagrams")
+    FIELDS = frozenset(__slots__)
+    KEY_PATTERN = __slots__
+
+
+class Package(OntoUMLObject):
+    __slots__ = ("id", "name", "description", "type", "propertyAssignments", "contents")
+    FIELDS = frozenset(__slots__)
+    KEY_PATTERN = __slots__
+
+
+class Diagram(OntoUMLObject):
+    __slots__ = ("id", "name", "description", "type", "owner", "contents")
+    FIELDS = frozenset(__slots__)
+    KEY_PATTERN = __slots__
+
+
+# Classes of the objects, indexed by their OntoUML types
+OBJECT_CLASSES = {"Project": Project, "Package": Package, "Diagram": Diagram}
+
+
+def get_object_class(object_type: str) -> type:
+    """ Receives an object type and returns the class of its intermediate representation.
+
+    :param object_type: Type of object to have its class returned.
+    :type object_type: str
+    :return: Class of the objects of the given type.
+    :rtype: type
+    """
+
+    object_class = OBJECT_CLASSES.get(object_type)
+
+    # If class not found, report error.
+    if object_class is None:
+        report_error_requirement_not_met("Element type not found in list of keys.")
+
+    return object_class
+
+
+def create_ontouml_object(elem_id: str, elem_type: str, properties_bucket: list[(str, object)]) -> OntoUMLObject:
+    """ Creates the intermediate representation of an object with all its known data, obtained from the object's
+    properties bucket. The keys of the object's type that are not known receive null values (None).
+
+    The object's keys are output in the order defined by the OntoUML-Schema (i.e., the type's key pattern), followed
+    by the known keys that are not part of the key pattern in alphabetical order. Hence, the output of an object does
+    not depend on the order in which its properties are found in the graph.
+
+    :param elem_id: ID of the object to be created.
+    :type elem_id: str
+    :param elem_type: Type of the object to be created.
+    :type elem_type: str
+    :param properties_bucket: List of the object's properties as (dict_key, dict_value) tuples.
+    :type properties_bucket: list[(str, object)]
+    :return: New object with its data.
+    :rtype: OntoUMLObject
+    """
+
+    object_class = get_object_class(elem_type)
+    object_fields = object_class.FIELDS
+    ontouml_object = object_class.__new__(object_class)
+    ontouml_object.other_fields = None
+    ontouml_object.id = elem_id
+    ontouml_object.type = elem_type
+
+    known_keys = {"id", "type"}
+    other_fields = None
+
+    for dict_key, dict_value in properties_bucket:
+        is_new_key = dict_key not in known_keys
+
+        if is_new_key:
+            known_keys.add(dict_key)
+
+        if dict_key in object_fields:
+            if dict_key not in LIST_FIELDS:
+                setattr(ontouml_object, dict_key, dict_value)
+            elif is_new_key:
+                setattr(ontouml_object, dict_key, [dict_value])
+            else:
+                getattr(ontouml_object, dict_key).append(dict_value)
+        else:
+            if other_fields is None:
+                other_fields = ontouml_object.other_fields = {}
+            if dict_key not in LIST_FIELDS:
+                other_fields[dict_key] = dict_value
+            elif is_new_key:
+                other_fields[dict_key] = [dict_value]
+            else:
+                other_fields[dict_key].append(dict_value)
+
+    # Complete the object with null values
+    for key in object_class.KEY_PATTERN:
+        if key not in known_keys:
+            setattr(ontouml_object, key, None)
+
+    object_keys = object_class.KEY_PATTERN
+    if not known_keys.issubset(object_keys):
+        object_keys += tuple(sorted(known_keys.difference(object_keys)))
+
+    ontouml_object.key_schema = get_key_schema(object_class, object_keys)
+
+    return ontouml_object
@@ -1,105 +1,377 @@
-""" Functions relad to mounting the final dictionary. """
+""" Functions related to mounting the final dictionary.
 
+The mounting is performed in a single bottom-up pass over an index of all dictionaries. Every reference to an ID is
+replaced by the (already mounted) dictionary that has that ID, respecting the order in which the dictionaries were
+created: a reference is only resolved if its referenced dictionary comes after the dictionary that holds the
+reference. Resolved list items are placed after the unresolved ones, in creation order.
+
+The single pass places each dictionary at most once, which gives the same result as the former mounting (that searched
+the whole mounted dictionary once for each ID) only when no reference is shared. Dictionaries with shared references
+(see has_shared_references) are mounted by replaying the former mounting (see encoder_mount_shared).
+
+The received dictionaries are never modified, and no defensive copies of them are made: each individual object is
+converted into a dictionary exactly once and is placed in the tree by reference, while nested dictionaries and lists
+are only copied if some of their values are replaced (copy on write). Thus, the mounted dictionary may share the
+unmodified nested dictionaries and lists of the received dictionaries, and must not be modified while they are in use
+(e.g., by an incremental encoding state).
+"""
+
+from typing import Iterable, Iterator
+
+from modules.encoder.encoder_mount_shared import mount_shared_json_dictionary
 from modules.errors import report_error_requirement_not_met
 
 
-def copy_dictionary_from_id(element_id: str, list_dictionaries: list[dict]) -> dict:
-    """ From a given ID, returns a copy of its corresponding dictionary from the list of dictionaries.
-    This operation does not remove the dictionary from the list of dictionaries.
-    If ID not found, calls error function.
+def index_dictionaries(list_dictionaries: list[dict]) -> dict[str, int]:
+    """ Creates an index that maps each ID to the position of its first dictionary in the list of dictionaries.
+
+    :param list_dictionaries: List of all available dictionaries.
+    :type list_dictionaries: list[dict]
+    :return: Dictionary with IDs as keys and their positions in list_dictionaries as values.
+    :rtype: dict[str, int]
+    """
+
+    dictionaries_index = {}
+
+    for position, dictionary in enumerate(list_dictionaries):
+        dictionaries_index.setdefault(dictionary['id'], position)
+
+    return dictionaries_index
+
+
+def get_root_dictionary(list_dictionaries: list[dict]) -> dict:
+    """ Returns the upper level dictionary, which is the first dictionary of type 'Project'. For the rare cases when
+    there is no Project, the first dictionary of the list is returned. If the list is empty, calls error function.
 
-    :param element_id: ID of the object to have its dictionary to be returned.
-    :type element_id: str
     :param list_dictionaries: List of all available dictionaries.
     :type list_dictionaries: list[dict]
-    :return: Dictionary that has the element_id as its ID.
+    :return: Dictionary that is going to be the upper level of the final dictionary.
     :rtype: dict
     """
 
+    if not list_dictionaries:
+        report_error_requirement_not_met("No dictionary available for mounting.")
+
     for dictionary in list_dictionaries:
-        if dictionary['id'] == element_id:
-            copied_dictionary = dictionary.copy()
-            return copied_dictionary
+        if dictionary['type'] == 'Project':
+            return dictionary
 
-    report_error_requirement_not_met(f"ID {element_id} not found in dictionary list.")
+    return list_dictionaries[0]
 
 
-def replace_id_pointer_in_dictionary(current_dictionary: dict, element_id: str, element_dict: dict) -> None:
-    """ Runs through all the dictionary and search for pointers to the informed ID (element_id). If found, replaces the
-    pointer to the whole dictionary that has element_id as its ID (element_dict).
+def iterate_searched_values(current_dictionary: dict) -> Iterator[str]:
+    """ Yields the string values of a dictionary that the mounting verifies, i.e., the ones of its fields and list
+    items and of the fields and list items of its nested dictionaries. ID fields and lists nested in lists are not
+    verified.
 
-    :param current_dictionary: Dictionary that is going to be searched for pointers to element_id.
+    :param current_dictionary: Dictionary to have its values verified.
     :type current_dictionary: dict
-    :param element_id: ID to be searched inside the dictionary.
-    :type element_id: str
-    :param element_dict: Dictionary that has element_id as its ID.
-    :type element_dict: dict
+    :return: Iterator over the verified string values, in no particular order.
+    :rtype: Iterator[str]
     """
 
-    for key in current_dictionary.keys():
+    pending_dictionaries = [current_dictionary]
 
-        # Do not search in ID field
-        if key == 'id':
-            continue
+    while pending_dictionaries:
+        for key, value in pending_dictionaries.pop().items():
+            if key == 'id':
+                continue
+
+            if type(value) is str:
+                yield value
+            elif type(value) is dict:
+                pending_dictionaries.append(value)
+            elif type(value) is list:
+                for item in value:
+                    if type(item) is str:
+                        yield item
+                    elif type(item) is dict:
+                        pending_dictionaries.append(item)
 
-        # If found, substitute
-        if current_dictionary[key] == element_id:
-            current_dictionary[key] = element_dict.copy()
-            break
 
-        # If is list, treat each element
-        if type(current_dictionary[key]) is list:
-            for item in current_dictionary[key]:
+def add_referenced_ids(list_dictionaries: Iterable[dict], dictionaries_index: dict[str, int],
+                       referenced_ids: set[str]) -> bool:
+    """ Adds the IDs referenced by the received dictionaries to referenced_ids, verifying if any of them is referenced
+    more than once (including by the dictionaries that added the IDs already in referenced_ids). Only the values
+    verified by the mounting (see iterate_searched_values) are references.
 
-                # If item is not a dictionary, evaluate
-                if item == element_id:
-                    current_dictionary[key].remove(item)
-                    current_dictionary[key].append(element_dict.copy())
+    :param list_dictionaries: Dictionaries to have their references verified.
+    :type list_dictionaries: Iterable[dict]
+    :param dictionaries_index: Index with the position of each ID, without the upper level dictionary's ID.
+    :type dictionaries_index: dict[str, int]
+    :param referenced_ids: IDs already referenced, to which the new references are added.
+    :type referenced_ids: set[str]
+    :return: True if any ID is referenced more than once, False otherwise.
+    :rtype: bool
+    """
 
-                # If item is a dictionary, perform algorithm
-                if type(item) is dict:
-                    replace_id_pointer_in_dictionary(item, element_id, element_dict)
+    for dictionary in list_dictionaries:
+        for value in iterate_searched_values(dictionary):
+            if value in dictionaries_index:
+                if value in referenced_ids:
+                    return True
+                referenced_ids.add(value)
 
-        # Execute recursively if field is a dictionary:
-        if type(current_dictionary[key]) is dict:
-            replace_id_pointer_in_dictionary(current_dictionary[key], element_id, element_dict)
+    return False
 
 
-def mount_json_dictionary(list_dictionaries: list[dict]) -> dict:
-    """ Receives a list with all individual object dictionaries and mount into a single dictionary to be converted
-    to JSON.
+def has_shared_references(list_dictionaries: list[dict], dictionaries_index: dict[str, int]) -> bool:
+    """ Verifies if the dictionaries have shared references, i.e., if an ID is referenced more than once (see
+    add_referenced_ids) or if there is more than one dictionary with the same ID. Without shared references, each
+    dictionary is placed at most once by the former mounting, and the single-pass mounting gives the same result.
 
     :param list_dictionaries: List with all individual object dictionaries.
     :type list_dictionaries: list[dict]
-    :return: Single dictionary with all graph's content in a format to be encoded into a JSON file.
+    :param dictionaries_index: Index with the position of each ID, without the upper level dictionary's ID.
+    :type dictionaries_index: dict[str, int]
+    :return: True if the dictionaries have shared references, False otherwise.
+    :rtype: bool
+    """
+
+    # The upper level dictionary's ID is the only one missing from the index
+    if len(dictionaries_index) + 1 < len(list_dictionaries):
+        return True
+
+    return add_referenced_ids(list_dictionaries, dictionaries_index, set())
+
+
+def get_mounted_reference(value, position: int, blocked_ids: set, dictionaries_index: dict[str, int],
+                          mounted_dictionaries: dict[str, dict]):
+    """ Verifies if the received value is a reference that can be resolved from a dictionary in the given position.
+    If it is, returns the referenced mounted dictionary. Otherwise, returns None.
+
+    :param value: Value to be verified.
+    :param position: Position of the dictionary that holds the value.
+    :type position: int
+    :param blocked_ids: IDs that must not be resolved in the current context.
+    :type blocked_ids: set
+    :param dictionaries_index: Index with the position of each ID.
+    :type dictionaries_index: dict[str, int]
+    :param mounted_dictionaries: Already mounted dictionaries, indexed by their IDs.
+    :type mounted_dictionaries: dict[str, dict]
+    :return: Mounted dictionary referenced by value, or None if value is not a resolvable reference.
     :rtype: dict
     """
 
-    list_all_ids = []
+    if type(value) is not str:
+        return None
 
-    # Get list of all IDs from all dictionaries
-    for dictionary in list_dictionaries:
-        list_all_ids.append(dictionary["id"])
+    # Most strings are not IDs, so the mounted dictionaries are searched first
+    referenced_dict = mounted_dictionaries.get(value)
 
-    # For the rare cases when there is no Project
-    json_dictionary = list_dictionaries[0].copy()
+    if referenced_dict is None or value in blocked_ids or dictionaries_index.get(value, -1) <= position:
+        return None
 
-    # Get correct upper level dictionary if there is a Project
-    for dictionary in list_dictionaries:
-        if dictionary['type'] == 'Project':
-            json_dictionary = dictionary.copy()
+    return referenced_dict
+
+
+def copy_fields_before(current_dictionary: dict, stop_key: str) -> dict:
+    """ Returns a new dictionary with the fields of current_dictionary that come before the stop_key field.
+
+    :param current_dictionary: Dictionary to have its fields copied.
+    :type current_dictionary: dict
+    :param stop_key: Key of the first field that is not copied.
+    :type stop_key: str
+    :return: New dictionary with the copied fields.
+    :rtype: dict
+    """
+
+    copied_dictionary = {}
+
+    for key, value in current_dictionary.items():
+        if key == stop_key:
             break
+        copied_dictionary[key] = value
+
+    return copied_dictionary
+
+
+def mount_list(current_list: list, position: int, blocked_ids: set, dictionaries_index: dict[str, int],
+               mounted_dictionaries: dict[str, dict]) -> list:
+    """ Returns the list with all resolvable references of current_list replaced by their mounted dictionaries.
+    Resolved items are placed after the unresolved ones, in creation order.
+
+    If no item of current_list is modified, current_list itself is returned. Otherwise, a new list is created when the
+    first modified item is found and current_list is not modified.
+
+    :param current_list: List to be mounted.
+    :type current_list: list
+    :param position: Position of the element that owns current_list.
+    :type position: int
+    :param blocked_ids: IDs that must not be resolved inside current_list.
+    :type blocked_ids: set
+    :param dictionaries_index: Index with the position of each ID.
+    :type dictionaries_index: dict[str, int]
+    :param mounted_dictionaries: Already mounted dictionaries, indexed by their IDs.
+    :type mounted_dictionaries: dict[str, dict]
+    :return: current_list or a new list with its references resolved.
+    :rtype: list
+    """
+
+    # Created only when the first item is modified
+    unresolved_items = None
+    resolved_items = []
+
+    for item_position, item in enumerate(current_list):
+        mounted_item = item
+        referenced_dict = None
 
-    for element_id in list_all_ids:
+        # Values that are not IDs are discarded before the function call
+        if type(item) is str and item in mounted_dictionaries:
+            referenced_dict = get_mounted_reference(item, position, blocked_ids, dictionaries_index,
+                                                    mounted_dictionaries)
 
-        # Getting the corresponding dictionary
-        element_dict = copy_dictionary_from_id(element_id, list_dictionaries)
+        if referenced_dict is not None:
+            resolved_items.append((dictionaries_index[item], referenced_dict))
+        elif type(item) is dict:
+            mounted_item = mount_dictionary(item, position, blocked_ids, dictionaries_index, mounted_dictionaries)
 
-        # Do not treat the same dictionary
-        if json_dictionary['id'] == element_dict['id']:
+        if unresolved_items is None:
+            if referenced_dict is None and mounted_item is item:
+                continue
+            unresolved_items = current_list[:item_position]
+
+        if referenced_dict is None:
+            unresolved_items.append(mounted_item)
+
+    if unresolved_items is None:
+        return current_list
+
+    if len(resolved_items) > 1:
+        resolved_items.sort(key=lambda resolved_item: resolved_item[0])
+    unresolved_items.extend([resolved_dict for _, resolved_dict in resolved_items])
+
+    return unresolved_items
+
+
+def mount_dictionary(current_dictionary: dict, position: int, blocked_ids: set, dictionaries_index: dict[str, int],
+                     mounted_dictionaries: dict[str, dict]) -> dict:
+    """ Returns the dictionary with all resolvable references of current_dictionary replaced by their mounted
+    dictionaries. The current_dictionary is not modified.
+
+    When a field is directly replaced, the following fields of the same dictionary are not searched for the same ID.
+
+    Plain dictionaries (e.g., nested dictionaries) are copied on write: if none of their fields is modified, the
+    current_dictionary itself is returned. Individual objects that are not dictionaries are always converted into a
+    new dictionary, which is the only copy of their fields created during the mounting.
+
+    :param current_dictionary: Dictionary to be mounted.
+    :type current_dictionary: dict
+    :param position: Position of the element that owns current_dictionary.
+    :type position: int
+    :param blocked_ids: IDs that must not be resolved inside current_dictionary.
+    :type blocked_ids: set
+    :param dictionaries_index: Index with the position of each ID.
+    :type dictionaries_index: dict[str, int]
+    :param mounted_dictionaries: Already mounted dictionaries, indexed by their IDs.
+    :type mounted_dictionaries: dict[str, dict]
+    :return: current_dictionary or a new dictionary with its references resolved.
+    :rtype: dict
+    """
+
+    # For plain dictionaries, created only when the first field is modified
+    mounted_dictionary = None if type(current_dictionary) is dict else {}
+    received_blocked_ids = blocked_ids
+
+    for key, value in current_dictionary.items():
+        mounted_value = value
+
+        # Do not search in ID field
+        if key != 'id':
+            referenced_dict = None
+
+            # Values that are not IDs are discarded before the function call
+            if type(value) is str and value in mounted_dictionaries:
+                referenced_dict = get_mounted_reference(value, position, blocked_ids, dictionaries_index,
+                                                        mounted_dictionaries)
+
+            # If found, substitute
+            if referenced_dict is not None:
+                mounted_value = referenced_dict
+
+                # The received set is shared with the caller and must not be modified
+                if blocked_ids is received_blocked_ids:
+                    blocked_ids = set(blocked_ids)
+                blocked_ids.add(value)
+
+            # If is list, treat each element
+            elif type(value) is list:
+                mounted_value = mount_list(value, position, blocked_ids, dictionaries_index, mounted_dictionaries)
+
+            # Mount recursively if field is a dictionary
+            elif type(value) is dict:
+                mounted_value = mount_dictionary(value, position, blocked_ids, dictionaries_index,
+                                                 mounted_dictionaries)
+
+        if mounted_dictionary is None:
+            if mounted_value is value:
+                continue
+            mounted_dictionary = copy_fields_before(current_dictionary, key)
+
+        mounted_dictionary[key] = mounted_value
+
+    return current_dictionary if mounted_dictionary is None else mounted_dictionary
+
+
+def mount_indexed_dictionaries(list_dictionaries: list[dict], positions: Iterable[int],
+                               dictionaries_index: dict[str, int], mounted_dictionaries: dict[str, dict]) -> None:
+    """ Mounts the dictionaries in the received positions, from the last to the first, storing the results in
+    mounted_dictionaries. All dictionaries that can be referenced by the mounted ones and that are not being mounted
+    must already be available in mounted_dictionaries.
+
+    :param list_dictionaries: List with all individual object dictionaries.
+    :type list_dictionaries: list[dict]
+    :param positions: Positions of the dictionaries to be mounted.
+    :type positions: Iterable[int]
+    :param dictionaries_index: Index with the position of each ID, without the upper level dictionary's ID.
+    :type dictionaries_index: dict[str, int]
+    :param mounted_dictionaries: Already mounted dictionaries, indexed by their IDs.
+    :type mounted_dictionaries: dict[str, dict]
+    """
+
+    for position in sorted(positions, reverse=True):
+        dictionary = list_dictionaries[position]
+        dictionary_id = dictionary['id']
+
+        # Only the first dictionary with a given ID is used
+        if dictionaries_index.get(dictionary_id) != position:
             continue
 
-        # Replace all possible occurrences of the ID in the current dictionary
-        replace_id_pointer_in_dictionary(json_dictionary, element_id, element_dict)
+        mounted_dictionaries[dictionary_id] = mount_dictionary(dictionary, position, set(), dictionaries_index,
+                                                               mounted_dictionaries)
+
+
+def mount_json_dictionary(list_dictionaries: list[dict]) -> dict:
+    """ Receives a list with all individual object dictionaries and mount into a single dictionary to be converted
+    to JSON.
+
+    Dictionaries are mounted from the last to the first, so every dictionary that can be referenced by the one being
+    mounted is already available. Each dictionary is mounted only once.
+
+    The result is the same as the one of the former mounting, which searched the whole mounted dictionary once for each
+    ID. When references are shared (e.g., a package that is the model and is also in a diagram's contents), the former
+    mounting is replayed instead, as its result depends on the order in which the references are found.
+
+    :param list_dictionaries: List with all individual object dictionaries.
+    :type list_dictionaries: list[dict]
+    :return: Single dictionary with all graph's content in a format to be encoded into a JSON file.
+    :rtype: dict
+    """
+
+    root_dictionary = get_root_dictionary(list_dictionaries)
+    dictionaries_index = index_dictionaries(list_dictionaries)
+
+    # The upper level dictionary is never used to replace a reference
+    del dictionaries_index[root_dictionary['id']]
+
+    if has_shared_references(list_dictionaries, dictionaries_index):
+        return mount_shared_json_dictionary(list_dictionaries, root_dictionary)
+
+    mounted_dictionaries = {}
+    mount_indexed_dictionaries(list_dictionaries, range(len(list_dictionaries)), dictionaries_index,
+                               mounted_dictionaries)
+
+    # The upper level dictionary can reference any other dictionary
+    json_dictionary = mount_dictionary(root_dictionary, -1, set(), dictionaries_index, mounted_dictionaries)
 
     return json_dictionary
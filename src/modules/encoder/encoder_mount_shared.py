@@ -0,0 +1,425 @@
+""" Mounting of dictionaries with shared references, i.e., with IDs that are referenced more than once or that are held
+by more than one dictionary.
+
+The single-pass mounting (see encoder_mount) places each dictionary at most once, so it only gives the same result as
+the former mounting, which searched the whole mounted dictionary once for each ID, when no reference is shared. For
+shared references, the former mounting is replayed: the IDs are searched in creation order, and every reference that
+the search of an ID reaches is replaced by a new copy of the ID's dictionary. The rules of that search are kept:
+
+- A directly replaced field stops the search for its ID in the rest of its dictionary, including in the dictionaries
+  already placed in the following fields.
+- A replaced list item is removed from the list and its copy is appended, and the item that followed it is not
+  searched for the ID.
+- The copies of a dictionary share its lists and nested dictionaries, so an item replaced through one copy is replaced
+  in all of them, and the shared values are searched once through each copy.
+
+Instead of the whole mounted dictionary, the search of an ID only descends into the values that hold the ID, directly
+or through their nested values. These values are found from an index of the values that hold each ID and of the
+parents of each value, so the cost of each search depends on the number of paths from the upper level dictionary to the
+references to the ID, and not on the size of the mounted dictionary.
+
+The received dictionaries are not modified. Their lists and nested dictionaries are represented by working copies,
+and the received ones are reused in the result when none of their values was replaced.
+"""
+
+# Item of the slots of the removed items of a SharedList
+REMOVED_ITEM = object()
+
+
+class SharedList:
+    """ Working copy of a list of the received dictionaries, shared by all copies of the dictionaries that hold it. Each
+    item is kept in a slot: the slots of removed items are emptied and appended items take new slots at the end, so the
+    slots are always in the list's order.
+
+    :ivar source_list: Received list.
+    :ivar items: Item of each slot (REMOVED_ITEM for the removed ones).
+    :ivar next_slots: For each slot, itself if it was not removed, or a following slot otherwise (see find_next_slot).
+    The last element is the slot after the last one.
+    :ivar value_slots: Slots of the items that are searched IDs, indexed by the IDs.
+    :ivar is_modified: Indicates if items were removed or appended.
+    """
+
+    __slots__ = ("source_list", "items", "next_slots", "value_slots", "is_modified")
+
+    def __init__(self, source_list: list):
+        self.source_list = source_list
+        self.items = list(source_list)
+        self.next_slots = list(range(len(source_list) + 1))
+        self.value_slots = {}
+        self.is_modified = False
+
+    def find_next_slot(self, slot: int) -> int | None:
+        """ Returns the first slot, from the received one on, whose item was not removed.
+
+        :param slot: First slot to be verified.
+        :type slot: int
+        :return: Slot of the first item not removed, or None if all following items were removed.
+        :rtype: int | None
+        """
+
+        next_slots = self.next_slots
+        found_slot = slot
+        while next_slots[found_slot] != found_slot:
+            found_slot = next_slots[found_slot]
+
+        # The visited slots point directly to the found one in the next searches
+        while next_slots[slot] != found_slot:
+            next_slots[slot], slot = found_slot, next_slots[slot]
+
+        return found_slot if found_slot < len(self.items) else None
+
+    def remove_slot(self, slot: int) -> None:
+        """ Removes the item of a slot.
+
+        :param slot: Slot of the item to be removed.
+        :type slot: int
+        """
+
+        self.items[slot] = REMOVED_ITEM
+        self.next_slots[slot] = slot + 1
+        self.is_modified = True
+
+    def append_item(self, item) -> int:
+        """ Appends an item in a new slot, after all others.
+
+        :param item: Item to be appended.
+        :return: Slot of the appended item.
+        :rtype: int
+        """
+
+        slot = len(self.items)
+        self.items.append(item)
+        self.next_slots.append(slot + 1)
+        self.is_modified = True
+
+        return slot
+
+
+class SharedMounting:
+    """ State of the replay of the former mounting. Working values are the copies of the dictionaries placed in the
+    mounted dictionary (including the upper level one) and the working copies of the received lists (SharedList) and
+    nested dictionaries.
+
+    :ivar templates: First dictionary of each ID, which is copied when a reference to the ID is replaced.
+    :ivar searched_ids: IDs that are searched, which are all IDs except the upper level dictionary's one.
+    :ivar holders: Working values that hold each searched ID as a field or as a list item, indexed by the IDs.
+    :ivar parents: Parents of each working value, as (parent, key or slot) tuples, indexed by the value's identity.
+    :ivar shared_values: Working copy of each received list and nested dictionary, indexed by its identity.
+    :ivar source_dictionaries: Received nested dictionary of each working copy, indexed by the copy's identity.
+    """
+
+    def __init__(self, list_dictionaries: list[dict], root_id: str):
+        self.templates = {}
+        for dictionary in list_dictionaries:
+            self.templates.setdefault(dictionary['id'], dictionary)
+
+        self.searched_ids = self.templates.keys() - {root_id}
+        self.holders = {}
+        self.parents = {}
+        self.shared_values = {}
+        self.source_dictionaries = {}
+
+    def add_dictionary_values(self, working_dictionary: dict, dictionary: dict) -> None:
+        """ Sets the values of a working dictionary from the ones of a received dictionary, using the working copies of
+        its lists and nested dictionaries, and indexes the working dictionary as their parent and as the holder of
+        its searched IDs.
+
+        :param working_dictionary: New working dictionary (a placed copy or the working copy of a nested dictionary).
+        :type working_dictionary: dict
+        :param dictionary: Received dictionary whose values are set.
+        :type dictionary: dict
+        """
+
+        for key, value in dictionary.items():
+            if key != 'id':
+                shared_value = self.get_shared_value(value)
+                if shared_value is not value:
+                    self.parents.setdefault(id(shared_value), []).append((working_dictionary, key))
+                elif type(value) is str and value in self.searched_ids:
+                    self.holders.setdefault(value, []).append(working_dictionary)
+                value = shared_value
+
+            working_dictionary[key] = value
+
+    def get_shared_value(self, value):
+        """ Returns the working copy of a received list or nested dictionary, creating it when it is first requested.
+        Other values are returned unchanged.
+
+        :param value: Value of a received dictionary.
+        :return: Working copy of the value, or the value itself if it is not a list or a dictionary.
+        """
+
+        value_type = type(value)
+        if value_type is not list and value_type is not dict:
+            return value
+
+        shared_value = self.shared_values.get(id(value))
+        if shared_value is not None:
+            return shared_value
+
+        if value_type is dict:
+            shared_value = self.shared_values[id(value)] = {}
+            self.source_dictionaries[id(shared_value)] = value
+            self.add_dictionary_values(shared_value, value)
+            return shared_value
+
+        shared_value = self.shared_values[id(value)] = SharedList(value)
+
+        for slot, item in enumerate(value):
+            if type(item) is dict:
+                shared_item = shared_value.items[slot] = self.get_shared_value(item)
+                self.parents.setdefault(id(shared_item), []).append((shared_value, slot))
+
+            # Lists nested in lists are never searched through them, but may be searched through another dictionary
+            elif type(item) is list:
+                shared_value.items[slot] = self.get_shared_value(item)
+
+            elif type(item) is str and item in self.searched_ids:
+                item_slots = shared_value.value_slots.setdefault(item, [])
+                if not item_slots:
+                    self.holders.setdefault(item, []).append(shared_value)
+                item_slots.append(slot)
+
+        return shared_value
+
+    def create_copy(self, dictionary: dict, element_id: str = None, searched_values: dict[int, set] = None) -> dict:
+        """ Creates a copy of a received dictionary, to be placed in the mounted dictionary. When the copy is created
+        during the search of an ID, it is marked to be searched as well if it holds the ID.
+
+        :param dictionary: Received dictionary to be copied.
+        :type dictionary: dict
+        :param element_id: ID being searched, if any.
+        :type element_id: str
+        :param searched_values: Working values to be searched for element_id (see get_searched_values).
+        :type searched_values: dict[int, set]
+        :return: New working dictionary.
+        :rtype: dict
+        """
+
+        copied_dictionary = {}
+        self.add_dictionary_values(copied_dictionary, dictionary)
+
+        if searched_values is not None and any(
+                value == element_id or id(value) in searched_values
+                for key, value in copied_dictionary.items() if key != 'id'):
+            searched_values[id(copied_dictionary)] = set()
+
+        return copied_dictionary
+
+    def get_searched_values(self, element_id: str) -> dict[int, set]:
+        """ Returns the working values that hold a searched ID, directly or through their nested values, which are the
+        only ones in which its search has any effect.
+
+        :param element_id: ID to be searched.
+        :type element_id: str
+        :return: Slots that must be searched in each of these values, indexed by the values' identities. The slots of
+        a SharedList are the ones of the items that hold the ID through their nested values. Dictionaries have no
+        slots, as all their fields are verified.
+        :rtype: dict[int, set]
+        """
+
+        searched_values = {}
+        pending_values = []
+
+        for holder in self.holders.get(element_id, ()):
+            if id(holder) not in searched_values:
+                searched_values[id(holder)] = set()
+                pending_values.append(holder)
+
+        while pending_values:
+            for parent, position in self.parents.get(id(pending_values.pop()), ()):
+                parent_slots = searched_values.get(id(parent))
+                if parent_slots is None:
+                    parent_slots = searched_values[id(parent)] = set()
+                    pending_values.append(parent)
+                if type(parent) is SharedList:
+                    parent_slots.add(position)
+
+        return searched_values
+
+    def search_dictionary(self, working_dictionary: dict, element_id: str, searched_values: dict[int, set]) -> None:
+        """ Searches a working dictionary for references to element_id, replacing them by copies of its dictionary.
+
+        :param working_dictionary: Working dictionary to be searched.
+        :type working_dictionary: dict
+        :param element_id: ID being searched.
+        :type element_id: str
+        :param searched_values: Working values to be searched for element_id (see get_searched_values).
+        :type searched_values: dict[int, set]
+        """
+
+        for key, value in working_dictionary.items():
+
+            # Do not search in ID field
+            if key == 'id':
+                continue
+
+            # If found, substitute and stop searching the dictionary
+            if value == element_id:
+                copied_dictionary = self.create_copy(self.templates[element_id], element_id, searched_values)
+                self.parents.setdefault(id(copied_dictionary), []).append((working_dictionary, key))
+                working_dictionary[key] = copied_dictionary
+                break
+
+            if id(value) in searched_values:
+                if type(value) is SharedList:
+                    self.search_list(value, element_id, searched_values)
+                elif type(value) is dict:
+                    self.search_dictionary(value, element_id, searched_values)
+
+    def search_list(self, shared_list: SharedList, element_id: str, searched_values: dict[int, set]) -> None:
+        """ Searches a shared list for references to element_id, replacing them by copies of its dictionary. Only the
+        slots that hold element_id or that must be searched are visited, in the list's order.
+
+        :param shared_list: Shared list to be searched.
+        :type shared_list: SharedList
+        :param element_id: ID being searched.
+        :type element_id: str
+        :param searched_values: Working values to be searched for element_id (see get_searched_values).
+        :type searched_values: dict[int, set]
+        """
+
+        searched_slots = searched_values[id(shared_list)]
+        list_slots = sorted(searched_slots.union(shared_list.value_slots.get(element_id, ())))
+        skipped_slot = None
+        index = 0
+
+        while index < len(list_slots):
+            slot = list_slots[index]
+            index += 1
+
+            # The item that followed a replaced item takes its place and is not searched
+            if slot == skipped_slot:
+                continue
+
+            item = shared_list.items[slot]
+
+            if item == element_id:
+                shared_list.remove_slot(shared_list.value_slots[element_id].pop(0))
+                copied_dictionary = self.create_copy(self.templates[element_id], element_id, searched_values)
+                copied_slot = shared_list.append_item(copied_dictionary)
+                self.parents.setdefault(id(copied_dictionary), []).append((shared_list, copied_slot))
+                skipped_slot = shared_list.find_next_slot(slot + 1)
+
+                if id(copied_dictionary) in searched_values:
+                    searched_slots.add(copied_slot)
+                    list_slots.append(copied_slot)
+
+            elif type(item) is dict:
+                self.search_dictionary(item, element_id, searched_values)
+
+    def search_references(self, element_id: str, root_dictionary: dict) -> None:
+        """ Searches the mounted dictionary for references to a searched ID, replacing them by copies of its
+        dictionary.
+
+        :param element_id: ID to be searched.
+        :type element_id: str
+        :param root_dictionary: Working copy of the upper level dictionary.
+        :type root_dictionary: dict
+        """
+
+        searched_values = self.get_searched_values(element_id)
+
+        if id(root_dictionary) in searched_values:
+            self.search_dictionary(root_dictionary, element_id, searched_values)
+
+    def get_working_children(self, working_value) -> list:
+        """ Returns the working values nested in a working value.
+
+        :param working_value: Working dictionary or SharedList.
+        :return: List of the nested working values.
+        :rtype: list
+        """
+
+        if type(working_value) is SharedList:
+            return [item for item in working_value.items if type(item) is dict or type(item) is SharedList]
+
+        return [value for key, value in working_value.items()
+                if key != 'id' and (type(value) is dict or type(value) is SharedList)]
+
+    def get_mounted_value(self, working_value, mounted_values: dict[int, object]):
+        """ Returns the value of the result that represents a working value whose nested working values are already
+        mounted. Placed copies and modified nested dictionaries are used in the result, having their nested working
+        values replaced. Unmodified lists and nested dictionaries are represented by the received ones.
+
+        :param working_value: Working dictionary or SharedList.
+        :param mounted_values: Values of the result of the mounted working values, indexed by their identities.
+        :type mounted_values: dict[int, object]
+        :return: Value of the result.
+        """
+
+        if type(working_value) is SharedList:
+            mounted_list = [mounted_values.get(id(item), item) if type(item) is dict or type(item) is SharedList
+                            else item for item in working_value.items if item is not REMOVED_ITEM]
+
+            if not working_value.is_modified and all(
+                    mounted_item is item for mounted_item, item in zip(mounted_list, working_value.source_list)):
+                return working_value.source_list
+
+            return mounted_list
+
+        for key, value in working_value.items():
+            if key != 'id' and (type(value) is dict or type(value) is SharedList):
+                working_value[key] = mounted_values.get(id(value), value)
+
+        source_dictionary = self.source_dictionaries.get(id(working_value))
+        if source_dictionary is not None and all(
+                value is source_dictionary[key] for key, value in working_value.items()):
+            return source_dictionary
+
+        return working_value
+
+    def mount_working_values(self, root_dictionary: dict) -> dict:
+        """ Converts the working values into the values of the result, from the innermost to the upper level one.
+
+        :param root_dictionary: Working copy of the upper level dictionary.
+        :type root_dictionary: dict
+        :return: Single dictionary with all graph's content.
+        :rtype: dict
+        """
+
+        mounted_values = {}
+        visited_ids = set()
+        pending_values = [(root_dictionary, False)]
+
+        while pending_values:
+            working_value, is_expanded = pending_values.pop()
+
+            if is_expanded:
+                mounted_values[id(working_value)] = self.get_mounted_value(working_value, mounted_values)
+                continue
+
+            if id(working_value) in visited_ids:
+                continue
+            visited_ids.add(id(working_value))
+
+            # The nested values are mounted before the value that holds them
+            pending_values.append((working_value, True))
+            pending_values.extend((child, False) for child in self.get_working_children(working_value)
+                                  if id(child) not in visited_ids)
+
+        return mounted_values[id(root_dictionary)]
+
+
+def mount_shared_json_dictionary(list_dictionaries: list[dict], root_dictionary: dict) -> dict:
+    """ Mounts the individual object dictionaries into a single dictionary exactly as the former mounting did, which
+    is needed when they have shared references (see has_shared_references in encoder_mount).
+
+    :param list_dictionaries: List with all individual object dictionaries.
+    :type list_dictionaries: list[dict]
+    :param root_dictionary: Upper level dictionary (see get_root_dictionary in encoder_mount).
+    :type root_dictionary: dict
+    :return: Single dictionary with all graph's content in a format to be encoded into a JSON file.
+    :rtype: dict
+    """
+
+    root_id = root_dictionary['id']
+    shared_mounting = SharedMounting(list_dictionaries, root_id)
+    root_copy = shared_mounting.create_copy(root_dictionary)
+
+    # Each ID is searched once for each dictionary that has it
+    for dictionary in list_dictionaries:
+        if dictionary['id'] != root_id:
+            shared_mounting.search_references(dictionary['id'], root_copy)
+
+    return shared_mounting.mount_working_values(root_copy)
@@ -0,0 +1,381 @@
+""" Parallel encoding of a single graph, partitioned by package subtrees.
+
+The objects contained (directly or indirectly) by each top-level package, i.e., each package contained by a project's
+model, form a partition. Diagrams are part of the partition of their owners. While there are fewer partitions than
+workers, the largest partition is split into the subtrees of its package's contents, and the split package is encoded
+by the main process. All the other objects (projects, models, split packages and objects outside the packages'
+hierarchy) are encoded by the main process as well.
+
+Each partition is created, treated and mounted by a worker process, which reads the graph from a shared read-only
+snapshot: the workers are forked from the main process and inherit its Graph, list of future objects and index of IDs
+without copying or serializing them. The mounted dictionaries of the partitions are sent back to the main process,
+which mounts its own objects with them and the upper level dictionary, stitching the partitions' subtrees under the
+project's model.
+
+Mounting in partitions follows the same rules (and uses the same positions) as mounting all objects at once, so the
+result is always identical to the sequential encoding. This is only true if no partition holds references to objects
+outside it and if no reference is shared (see has_shared_references in encoder_mount), as the sequential encoding
+replays the former mounting for shared references. Each worker verifies this for its partition and the main process
+for the references between them. If any verification fails (e.g., a package contained by two top-level packages), the
+graph is encoded sequentially instead.
+"""
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from rdflib import Graph, URIRef
+from rdflib.plugins.stores.memory import Memory
+
+from modules.encoder.encoder_create import create_dictionaries_from_buckets, create_objects_types_index, \
+    create_properties_buckets, get_dictionary_value, get_future_objects
+from modules.encoder.encoder_main import encode_graph_to_json
+from modules.encoder.encoder_model import OntoUMLObject
+from modules.encoder.encoder_mount import add_referenced_ids, mount_dictionary, mount_indexed_dictionaries
+from modules.instrumentation import measure_stage
+from modules.logger import get_logger
+from src.modules.globals import URI_ONTOUML
+
+LOGGER = get_logger()
+
+URI_CONTAINS_MODEL_ELEMENT = URIRef(URI_ONTOUML + "containsModelElement")
+URI_MODEL = URIRef(URI_ONTOUML + "model")
+URI_OWNER = URIRef(URI_ONTOUML + "owner")
+URI_PROJECT = URIRef(URI_ONTOUML + "Project")
+
+# Minimum number of objects for a graph to be encoded in parallel, as smaller graphs are encoded faster than the
+# worker processes are started
+PARALLEL_ENCODING_MINIMUM_OBJECTS = 5000
+
+# Snapshot of the encoding shared with the worker processes, which inherit it when forked
+PARTITION_SNAPSHOT = {}
+
+
+def is_parallel_encoding_available(ontology_graph: Graph) -> bool:
+    """ Verifies if the graph can be encoded in parallel: the platform must be able to fork processes (so that the
+    workers share the graph) and the graph must be kept in memory, as the connections of persistent stores cannot be
+    shared by forked processes.
+
+    :param ontology_graph: Graph to be encoded.
+    :type ontology_graph: Graph
+    :return: True if the graph can be encoded in parallel. False otherwise.
+    :rtype: bool
+    """
+
+    return "fork" in multiprocessing.get_all_start_methods() and isinstance(ontology_graph.store, Memory)
+
+
+def collect_subtree(uri_package: URIRef, contents_index: dict[URIRef, list[URIRef]],
+                    partitions_index: dict[URIRef, int], partition_number: int) -> list[URIRef]:
+    """ Collects the URIs of a package and of all elements it contains (directly or indirectly) that are not yet part
+    of a partition, assigning them to the received partition.
+
+    :param uri_package: URI of the subtree's package.
+    :type uri_package: URIRef
+    :param contents_index: Contained elements of each package.
+    :type contents_index: dict[URIRef, list[URIRef]]
+    :param partitions_index: Partition number of each URI already assigned to a partition.
+    :type partitions_index: dict[URIRef, int]
+    :param partition_number: Number of the partition to which the URIs are assigned.
+    :type partition_number: int
+    :return: URIs of the subtree, starting with its package's.
+    :rtype: list[URIRef]
+    """
+
+    subtree_uris = []
+    pending_uris = [uri_package]
+
+    while pending_uris:
+        uri_element = pending_uris.pop()
+        if uri_element in partitions_index:
+            continue
+
+        partitions_index[uri_element] = partition_number
+        subtree_uris.append(uri_element)
+        pending_uris.extend(reversed(contents_index.get(uri_element, ())))
+
+    return subtree_uris
+
+
+def get_package_partitions(ontology_graph: Graph, list_of_future_objects: list[(URIRef, URIRef)],
+                           number_partitions: int) -> (list[list[int]], list[int]):
+    """ Partitions the future objects by the package subtrees of the projects' models. The largest partitions are split
+    while there are fewer than number_partitions partitions.
+
+    :param ontology_graph: Graph compliant with the OntoUML Vocabulary.
+    :type ontology_graph: Graph
+    :param list_of_future_objects: List of tuples containing an object's URIRef id and URIRef type.
+    :type list_of_future_objects: list[(URIRef, URIRef)]
+    :param number_partitions: Desired number of partitions.
+    :type number_partitions: int
+    :return: Positions (in list_of_future_objects) of the objects of each partition and of the objects that are not
+    part of any partition.
+    :rtype: (list[list[int]], list[int])
+    """
+
+    contents_index = {}
+    for uri_package, uri_element in ontology_graph.subject_objects(URI_CONTAINS_MODEL_ELEMENT):
+        contents_index.setdefault(uri_package, []).append(uri_element)
+
+    # Projects and their models are never part of a partition (partition number -1)
+    partitions_index = {}
+    for uri_elem_id, uri_elem_type in list_of_future_objects:
+        if uri_elem_type == URI_PROJECT:
+            partitions_index[uri_elem_id] = -1
+            for uri_model in ontology_graph.objects(uri_elem_id, URI_MODEL):
+                partitions_index[uri_model] = -1
+
+    partitions_uris = []
+    for uri_model in [uri for uri, partition_number in partitions_index.items() if partition_number == -1]:
+        for uri_package in contents_index.get(uri_model, ()):
+            if uri_package not in partitions_index:
+                partitions_uris.append(collect_subtree(uri_package, contents_index, partitions_index,
+                                                       len(partitions_uris)))
+
+    # Splitting the largest partition, whose package becomes part of the main process' objects
+    number_subtrees = len(partitions_uris)
+    while 0 < number_subtrees < number_partitions:
+        largest_uris = max(partitions_uris, key=len)
+        uri_split_package = largest_uris[0]
+        if not contents_index.get(uri_split_package):
+            break
+
+        for uri_element in largest_uris:
+            del partitions_index[uri_element]
+        partitions_index[uri_split_package] = -1
+        largest_uris.clear()
+        number_subtrees -= 1
+
+        for uri_package in contents_index[uri_split_package]:
+            if uri_package not in partitions_index:
+                partitions_uris.append(collect_subtree(uri_package, contents_index, partitions_index,
+                                                       len(partitions_uris)))
+                number_subtrees += 1
+
+    # Diagrams are part of the partitions of their owners
+    for uri_diagram, uri_owner in ontology_graph.subject_objects(URI_OWNER):
+        if uri_diagram not in partitions_index and partitions_index.get(uri_owner, -1) != -1:
+            partitions_index[uri_diagram] = partitions_index[uri_owner]
+
+    partitions_positions = [[] for _ in partitions_uris]
+    main_positions = []
+
+    for position, (uri_elem_id, _) in enumerate(list_of_future_objects):
+        partition_number = partitions_index.get(uri_elem_id, -1)
+        if partition_number == -1:
+            main_positions.append(position)
+        else:
+            partitions_positions[partition_number].append(position)
+
+    return [positions for positions in partitions_positions if positions], main_positions
+
+
+def has_external_references(value, partition_ids: set[str], dictionaries_index: dict[str, int]) -> bool:
+    """ Verifies if the received value holds references to objects that are not part of its partition. As when
+    mounting, ID fields are not verified.
+
+    :param value: Value to be verified.
+    :param partition_ids: IDs of the partition's objects.
+    :type partition_ids: set[str]
+    :param dictionaries_index: Index with the position of each ID.
+    :type dictionaries_index: dict[str, int]
+    :return: True if the value holds any reference to an object outside the partition. False otherwise.
+    :rtype: bool
+    """
+
+    if type(value) is str:
+        return value in dictionaries_index and value not in partition_ids
+
+    if type(value) is list:
+        return any(has_external_references(item, partition_ids, dictionaries_index) for item in value)
+
+    if type(value) is dict or isinstance(value, OntoUMLObject):
+        return any(has_external_references(item, partition_ids, dictionaries_index)
+                   for key, item in value.items() if key != 'id')
+
+    return False
+
+
+def initialize_partition_worker(ontology_graph: Graph, list_of_future_objects: list[(URIRef, URIRef)],
+                                objects_types: dict[str, str], dictionaries_index: dict[str, int]) -> None:
+    """ Keeps the shared snapshot of the encoding in the worker process. As the workers are forked, the received
+    arguments are inherited from the main process instead of being serialized.
+
+    :param ontology_graph: Graph compliant with the OntoUML Vocabulary.
+    :type ontology_graph: Graph
+    :param list_of_future_objects: List of tuples containing an object's URIRef id and URIRef type.
+    :type list_of_future_objects: list[(URIRef, URIRef)]
+    :param objects_types: Types of all objects, indexed by their IDs.
+    :type objects_types: dict[str, str]
+    :param dictionaries_index: Index with the position of each ID, without the upper level dictionary's ID.
+    :type dictionaries_index: dict[str, int]
+    """
+
+    PARTITION_SNAPSHOT["ontology_graph"] = ontology_graph
+    PARTITION_SNAPSHOT["list_of_future_objects"] = list_of_future_objects
+    PARTITION_SNAPSHOT["objects_types"] = objects_types
+    PARTITION_SNAPSHOT["dictionaries_index"] = dictionaries_index
+
+
+def create_objects(ontology_graph: Graph, list_of_future_objects: list[(URIRef, URIRef)], positions: list[int],
+                   objects_types: dict[str, str]) -> list[OntoUMLObject]:
+    """ Creates and treats the individual dictionaries of the future objects in the received positions.
+
+    :param ontology_graph: Graph compliant with the OntoUML Vocabulary.
+    :type ontology_graph: Graph
+    :param list_of_future_objects: List of tuples containing an object's URIRef id and URIRef type.
+    :type list_of_future_objects: list[(URIRef, URIRef)]
+    :param positions: Positions of the objects to be created.
+    :type positions: list[int]
+    :param objects_types: Types of all objects, indexed by their IDs.
+    :type objects_types: dict[str, str]
+    :return: Individual dictionaries of the objects, in the order of the received positions.
+    :rtype: list[OntoUMLObject]
+    """
+
+    values_cache = {}
+    selected_future_objects = [list_of_future_objects[position] for position in positions]
+
+    properties_buckets = create_properties_buckets(ontology_graph, selected_future_objects, values_cache)
+
+    return create_dictionaries_from_buckets(selected_future_objects, properties_buckets, values_cache, objects_types)
+
+
+def encode_partition(partition_positions: list[int]) -> tuple[dict[str, dict], set[str]] | None:
+    """ Creates and mounts the objects of a partition from the shared snapshot. Executed by the worker processes.
+
+    :param partition_positions: Positions of the partition's objects in the list of future objects.
+    :type partition_positions: list[int]
+    :return: Mounted dictionaries of the partition, indexed by their IDs, and IDs referenced by the partition, or None
+    if the partition holds references to objects outside it or shared references.
+    :rtype: tuple[dict[str, dict], set[str]] | None
+    """
+
+    list_of_future_objects = PARTITION_SNAPSHOT["list_of_future_objects"]
+    dictionaries_index = PARTITION_SNAPSHOT["dictionaries_index"]
+
+    partition_dictionaries = create_objects(PARTITION_SNAPSHOT["ontology_graph"], list_of_future_objects,
+                                            partition_positions, PARTITION_SNAPSHOT["objects_types"])
+
+    partition_ids = {dictionary['id'] for dictionary in partition_dictionaries}
+    if any(has_external_references(dictionary, partition_ids, dictionaries_index)
+           for dictionary in partition_dictionaries):
+        return None
+
+    # Objects with the same ID (i.e., with the same URI) are always part of the same partition
+    referenced_ids = set()
+    if len(partition_ids) < len(partition_dictionaries) or \
+            add_referenced_ids(partition_dictionaries, dictionaries_index, referenced_ids):
+        return None
+
+    # Dictionaries are placed in their positions of the complete list, which are used when mounting
+    list_dictionaries = [None] * len(list_of_future_objects)
+    for position, dictionary in zip(partition_positions, partition_dictionaries):
+        list_dictionaries[position] = dictionary
+
+    mounted_dictionaries = {}
+    mount_indexed_dictionaries(list_dictionaries, partition_positions, dictionaries_index, mounted_dictionaries)
+
+    return mounted_dictionaries, referenced_ids
+
+
+def encode_graph_to_json_parallel(ontology_graph: Graph, workers: int = None,
+                                  instrumentation_report: dict = None) -> dict:
+    """ Receives a Graph compliant with the OntoUML Vocabulary and encode it into a JSON compliant with the
+    OntoUML-Schema, encoding its package subtrees in parallel worker processes.
+
+    Graphs that cannot be encoded in parallel (see is_parallel_encoding_available), that have fewer than
+    PARALLEL_ENCODING_MINIMUM_OBJECTS objects or that cannot be partitioned are encoded sequentially.
+
+    :param ontology_graph: Graph compliant with the OntoUML Vocabulary loaded from file.
+    :type ontology_graph: Graph
+    :param workers: Maximum number of worker processes. If None (default), the number of processors of the machine.
+    :type workers: int
+    :param instrumentation_report: Report in which the stages are measured. If None (default), they are not measured.
+    :type instrumentation_report: dict
+    :return: JSON compliant with the OntoUML-Schema obtained from the received Graph.
+    :rtype: dict
+    """
+
+    workers = workers or os.cpu_count() or 1
+
+    if workers < 2 or not is_parallel_encoding_available(ontology_graph):
+        return encode_graph_to_json(ontology_graph, instrumentation_report)
+
+    with measure_stage(instrumentation_report, "partition_graph") as stage_counts:
+        list_of_future_objects, _ = get_future_objects(ontology_graph)
+
+        if len(list_of_future_objects) < PARALLEL_ENCODING_MINIMUM_OBJECTS:
+            partitions_positions, main_positions = [], []
+        else:
+            partitions_positions, main_positions = get_package_partitions(ontology_graph, list_of_future_objects,
+                                                                          workers)
+        stage_counts["objects"] = len(list_of_future_objects)
+        stage_counts["partitions"] = len(partitions_positions)
+
+    if len(partitions_positions) < 2:
+        return encode_graph_to_json(ontology_graph, instrumentation_report)
+
+    with measure_stage(instrumentation_report, "parallel_create_and_mount") as stage_counts:
+        values_cache = {}
+        list_ids = [get_dictionary_value(uri_elem_id, values_cache) for uri_elem_id, _ in list_of_future_objects]
+        objects_types = create_objects_types_index(list_of_future_objects, values_cache)
+
+        # The upper level dictionary (see get_root_dictionary) is never used to replace a reference
+        root_position = next(position for position, (_, uri_elem_type) in enumerate(list_of_future_objects)
+                             if uri_elem_type == URI_PROJECT)
+        dictionaries_index = {}
+        for position, elem_id in enumerate(list_ids):
+            dictionaries_index.setdefault(elem_id, position)
+        del dictionaries_index[list_ids[root_position]]
+
+        # The largest partitions are submitted first, so that the workers finish at similar times
+        partitions_positions.sort(key=len, reverse=True)
+
+        with ProcessPoolExecutor(max_workers=min(workers, len(partitions_positions)),
+                                 mp_context=multiprocessing.get_context("fork"),
+                                 initializer=initialize_partition_worker,
+                                 initargs=(ontology_graph, list_of_future_objects, objects_types,
+                                           dictionaries_index)) as executor:
+            partitions_futures = [executor.submit(encode_partition, partition_positions)
+                                  for partition_positions in partitions_positions]
+
+            # The main process' objects are created while the partitions are encoded
+            main_dictionaries = create_objects(ontology_graph, list_of_future_objects, main_positions, objects_types)
+
+            mounted_dictionaries = {}
+            referenced_ids = set()
+            is_partitioned = True
+            for partition_future in partitions_futures:
+                partition_result = partition_future.result()
+                if partition_result is None:
+                    is_partitioned = False
+                else:
+                    mounted_dictionaries.update(partition_result[0])
+                    referenced_ids.update(partition_result[1])
+
+            # Partitions do not reference each other's objects, but the main process' objects may reference them
+            main_ids = {dictionary['id'] for dictionary in main_dictionaries}
+            if is_partitioned and (len(main_ids) < len(main_dictionaries) or add_referenced_ids(
+                    main_dictionaries, dictionaries_index, referenced_ids)):
+                is_partitioned = False
+
+        stage_counts["objects"] = len(list_of_future_objects)
+        stage_counts["workers"] = min(workers, len(partitions_positions))
+
+    if not is_partitioned:
+        LOGGER.info("Graph has references between package subtrees or shared references and is encoded "
+                    "sequentially.")
+        return encode_graph_to_json(ontology_graph, instrumentation_report)
+
+    with measure_stage(instrumentation_report, "mount_json_dictionary") as stage_counts:
+        list_dictionaries = [None] * len(list_of_future_objects)
+        for position, dictionary in zip(main_positions, main_dictionaries):
+            list_dictionaries[position] = dictionary
+
+        mount_indexed_dictionaries(list_dictionaries, main_positions, dictionaries_index, mounted_dictionaries)
+        json_data = mount_dictionary(list_dictionaries[root_position], -1, set(), dictionaries_index,
+                                     mounted_dictionaries)
+        stage_counts["objects"] = len(main_positions)
+
+    return json_data
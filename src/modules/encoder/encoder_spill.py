@@ -0,0 +1,326 @@
+""" Encoding under a memory budget, for graphs whose intermediate objects do not fit in the working memory.
+
+Each object is serialized into a compact JSON record as soon as it is created and treated. Records are kept in memory
+while their total size is within the memory budget; when the budget is exceeded, the records in memory are spilled
+into a temporary SQLite database, keyed by their positions. Only the index of the objects' IDs is kept in memory for
+all objects.
+
+The final dictionary is never assembled. Instead, the JSON file is written from the root object, and each object is
+read back from the spilled records and mounted only when it is reached by the writer. References are replaced by
+placeholders (see SpilledReference) that the writer expands when written, following exactly the rules of the
+in-memory mounting (see encoder_mount), so the written file is identical to the one saved from the mounted dictionary.
+
+Graphs with shared references (see has_shared_references in encoder_mount) are the exception: their mounting is
+replayed as a whole (see encoder_mount_shared), so their records are read back into memory and mounted at once.
+"""
+
+import json
+import os
+import sqlite3
+import tempfile
+from typing import Iterable, Iterator
+
+from modules.encoder.encoder_create import add_property_to_bucket, create_dictionaries_from_buckets, \
+    create_grouped_properties_bucket, get_future_objects, group_graph_triples
+from modules.encoder.encoder_model import OntoUMLObject
+from modules.encoder.encoder_mount import add_referenced_ids, mount_dictionary, mount_json_dictionary
+from modules.errors import report_error_requirement_not_met
+from modules.io_json import safe_write_json_file
+from rdflib import Graph, URIRef
+from rdflib.term import Node
+
+# Number of bytes in a megabyte, the unit of the memory budget
+MEMORY_BUDGET_UNIT = 1024 * 1024
+
+# Memory used by an in-memory record besides its characters, in bytes (approximately the size of an empty string)
+RECORD_OVERHEAD = 64
+
+SPILL_SCHEMA_SCRIPT = """
+    PRAGMA journal_mode = OFF;
+    PRAGMA synchronous = OFF;
+    CREATE TABLE records (position INTEGER PRIMARY KEY, record TEXT NOT NULL);
+"""
+
+
+class SpilledDictionaries:
+    """ Append-only collection of the objects' records, which spills them into a temporary SQLite database when their
+    size exceeds the memory budget. Must be closed after being used, which deletes the database.
+
+    :ivar memory_budget: Maximum size of the records kept in memory, in bytes.
+    :ivar dictionaries_index: Index with the position of the first record of each ID.
+    :ivar root_position: Position of the first record of type 'Project' (or None if there is none).
+    :ivar spilled_records: Number of records written into the database.
+    """
+
+    def __init__(self, memory_budget: int, spill_directory: str = None):
+        self.memory_budget = memory_budget
+        self.spill_directory = spill_directory
+        self.dictionaries_index = {}
+        self.root_position = None
+        self.spilled_records = 0
+        self.length = 0
+
+        # Records in memory, which are the last ones appended, starting at the buffered_position
+        self.buffered_records = []
+        self.buffered_position = 0
+        self.buffered_size = 0
+
+        # Created only when the first records are spilled
+        self.connection = None
+        self.database_path = None
+
+    def __enter__(self) -> "SpilledDictionaries":
+        return self
+
+    def __exit__(self, *exception_information) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self.length
+
+    def append(self, ontouml_object: OntoUMLObject) -> None:
+        """ Serializes an object into a record and appends it, spilling the records in memory if the memory budget is
+        exceeded.
+
+        :param ontouml_object: Created (and already treated) object.
+        :type ontouml_object: OntoUMLObject
+        """
+
+        position = self.length
+        self.length += 1
+
+        self.dictionaries_index.setdefault(ontouml_object['id'], position)
+        if self.root_position is None and ontouml_object['type'] == 'Project':
+            self.root_position = position
+
+        record = json.dumps(ontouml_object.to_dict(), ensure_ascii=False, separators=(",", ":"))
+        self.buffered_records.append(record)
+        self.buffered_size += len(record) + RECORD_OVERHEAD
+
+        if self.buffered_size > self.memory_budget:
+            self.spill_buffered_records()
+
+    def spill_buffered_records(self) -> None:
+        """ Writes all records in memory into the database, creating it if necessary. """
+
+        if self.connection is None:
+            file_descriptor, self.database_path = tempfile.mkstemp(suffix=".spill.sqlite3", dir=self.spill_directory)
+            os.close(file_descriptor)
+            self.connection = sqlite3.connect(self.database_path)
+            self.connection.executescript(SPILL_SCHEMA_SCRIPT)
+
+        self.connection.executemany("INSERT INTO records (position, record) VALUES (?, ?)",
+                                    enumerate(self.buffered_records, self.buffered_position))
+        self.connection.commit()
+
+        self.spilled_records += len(self.buffered_records)
+        self.buffered_position = self.length
+        self.buffered_records.clear()
+        self.buffered_size = 0
+
+    def get_record(self, position: int) -> dict:
+        """ Returns the dictionary of the record in the received position, read from memory or from the database.
+
+        :param position: Position of the record.
+        :type position: int
+        :return: New dictionary with the fields of the record's object.
+        :rtype: dict
+        """
+
+        if position >= self.buffered_position:
+            return json.loads(self.buffered_records[position - self.buffered_position])
+
+        record_row = self.connection.execute("SELECT record FROM records WHERE position = ?", (position,)).fetchone()
+
+        return json.loads(record_row[0])
+
+    def iterate_records(self) -> Iterator[dict]:
+        """ Yields the dictionaries of all records, in the order of their positions.
+
+        :return: Iterator over new dictionaries with the fields of the records' objects.
+        :rtype: Iterator[dict]
+        """
+
+        if self.connection is not None:
+            for record_row in self.connection.execute("SELECT record FROM records ORDER BY position"):
+                yield json.loads(record_row[0])
+
+        for record in self.buffered_records:
+            yield json.loads(record)
+
+    def close(self) -> None:
+        """ Releases the records and deletes the database (if created). """
+
+        self.buffered_records.clear()
+
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+        if self.database_path is not None:
+            if os.path.exists(self.database_path):
+                os.remove(self.database_path)
+            self.database_path = None
+
+
+class SpilledReference:
+    """ Placeholder of a resolved reference in a mounted record, expanded into its referenced object when written.
+
+    :ivar position: Position of the referenced record.
+    """
+
+    __slots__ = ("position",)
+
+    def __init__(self, position: int):
+        self.position = position
+
+
+class SpilledReferences:
+    """ Replaces the already mounted dictionaries when mounting a record (see encoder_mount.mount_dictionary): every
+    indexed ID is available, represented by a placeholder of its record instead of by its mounted dictionary. """
+
+    def __init__(self, dictionaries_index: dict[str, int]):
+        self.dictionaries_index = dictionaries_index
+
+    def __contains__(self, elem_id: str) -> bool:
+        return elem_id in self.dictionaries_index
+
+    def get(self, elem_id: str) -> SpilledReference | None:
+        """ Returns the placeholder of the record with the received ID, or None if the ID is not indexed. """
+
+        position = self.dictionaries_index.get(elem_id)
+
+        return None if position is None else SpilledReference(position)
+
+
+class GraphPropertiesBuckets:
+    """ Properties buckets of the future objects of a graph, each one created from the graph's subject index only when
+    requested (see encoder_create.create_properties_buckets). """
+
+    def __init__(self, ontology_graph: Graph, values_cache: dict):
+        self.ontology_graph = ontology_graph
+        self.values_cache = values_cache
+        self.keys_cache = {}
+
+    def __getitem__(self, uri_elem_id: URIRef) -> list[(str, object)]:
+        properties_bucket = []
+
+        for p, o in self.ontology_graph.predicate_objects(uri_elem_id):
+            add_property_to_bucket(properties_bucket, p, o, self.keys_cache, self.values_cache)
+
+        return properties_bucket
+
+
+class GroupedPropertiesBuckets:
+    """ Properties buckets of the future objects of a stream of triples, each one created from the grouped triples of
+    its subject only when requested (see encoder_create.create_streamed_data_dictionaries). The grouped triples of each
+    subject are released when its bucket is created. """
+
+    def __init__(self, subjects_properties: dict[URIRef, dict[URIRef, dict]], keys_cache: dict, values_cache: dict):
+        self.subjects_properties = subjects_properties
+        self.keys_cache = keys_cache
+        self.values_cache = values_cache
+
+    def __getitem__(self, uri_elem_id: URIRef) -> list[(str, object)]:
+        return create_grouped_properties_bucket(self.subjects_properties.pop(uri_elem_id, {}), self.keys_cache,
+                                                self.values_cache)
+
+
+def create_spilled_data_dictionaries(ontology_graph: Graph, spilled_dictionaries: SpilledDictionaries) -> dict:
+    """ Creates the individual data dictionaries of a graph's future objects, appending each one to the spilled
+    dictionaries as soon as it is created. The properties of each object are obtained only when it is created, so the
+    properties of all objects are never in memory at the same time.
+
+    :param ontology_graph: Graph compliant with the OntoUML Vocabulary loaded from file.
+    :type ontology_graph: Graph
+    :param spilled_dictionaries: Collection that receives the created dictionaries.
+    :type spilled_dictionaries: SpilledDictionaries
+    :return: Dictionary with types and respective number of occurrences.
+    :rtype: dict
+    """
+
+    values_cache = {}
+
+    list_of_future_objects, available_types = get_future_objects(ontology_graph)
+
+    create_dictionaries_from_buckets(list_of_future_objects, GraphPropertiesBuckets(ontology_graph, values_cache),
+                                     values_cache, list_dictionaries=spilled_dictionaries)
+
+    return available_types
+
+
+def create_spilled_streamed_data_dictionaries(graph_triples: Iterable[tuple[Node, Node, Node]],
+                                              spilled_dictionaries: SpilledDictionaries) -> dict:
+    """ Creates the individual data dictionaries of the future objects of a stream of triples, appending each one to
+    the spilled dictionaries as soon as it is created (see encoder_create.create_streamed_data_dictionaries).
+
+    :param graph_triples: Triples of a graph compliant with the OntoUML Vocabulary.
+    :type graph_triples: Iterable[tuple[Node, Node, Node]]
+    :param spilled_dictionaries: Collection that receives the created dictionaries.
+    :type spilled_dictionaries: SpilledDictionaries
+    :return: Dictionary with types and respective number of occurrences.
+    :rtype: dict
+    """
+
+    keys_cache = {}
+    values_cache = {}
+
+    types_graph, subjects_properties = group_graph_triples(graph_triples, keys_cache)
+
+    list_of_future_objects, available_types = get_future_objects(types_graph)
+
+    properties_buckets = GroupedPropertiesBuckets(subjects_properties, keys_cache, values_cache)
+    create_dictionaries_from_buckets(list_of_future_objects, properties_buckets, values_cache,
+                                     list_dictionaries=spilled_dictionaries)
+
+    return available_types
+
+
+def write_spilled_json_file(spilled_dictionaries: SpilledDictionaries, json_path: str, indent: int = None,
+                            compression: str = None) -> None:
+    """ Mounts the spilled dictionaries while writing them as a JSON file, reading each record only when it is written.
+    The written file is identical to the one saved from mount_json_dictionary's result. When references are shared,
+    all records are read once more for detecting it and are then mounted in memory by mount_json_dictionary.
+
+    :param spilled_dictionaries: Dictionaries of all objects.
+    :type spilled_dictionaries: SpilledDictionaries
+    :param json_path: Path in which the JSON file will be saved.
+    :type json_path: str
+    :param indent: Number of spaces used to indent the JSON output. If None (default), the output is compact.
+    :type indent: int
+    :param compression: Compression of the JSON file ('gzip', 'bz2' or 'xz'). If None (default), it is not compressed.
+    :type compression: str
+    """
+
+    if not len(spilled_dictionaries):
+        report_error_requirement_not_met("No dictionary available for mounting.")
+
+    root_position = spilled_dictionaries.root_position or 0
+    root_dictionary = spilled_dictionaries.get_record(root_position)
+
+    # The upper level dictionary is never used to replace a reference
+    dictionaries_index = dict(spilled_dictionaries.dictionaries_index)
+    del dictionaries_index[root_dictionary['id']]
+
+    # The upper level dictionary's ID is the only one missing from the index when no ID is repeated
+    if len(dictionaries_index) + 1 < len(spilled_dictionaries) or \
+            add_referenced_ids(spilled_dictionaries.iterate_records(), dictionaries_index, set()):
+        json_dictionary = mount_json_dictionary(list(spilled_dictionaries.iterate_records()))
+        safe_write_json_file(json_dictionary, json_path, indent, compression=compression)
+        return
+
+    spilled_references = SpilledReferences(dictionaries_index)
+
+    def expand_reference(value):
+        """ Returns the mounted record of a placeholder, whose own references are placeholders as well. """
+
+        if type(value) is not SpilledReference:
+            return value
+
+        return mount_dictionary(spilled_dictionaries.get_record(value.position), value.position, set(),
+                                dictionaries_index, spilled_references)
+
+    # The upper level dictionary can reference any other dictionary
+    json_dictionary = mount_dictionary(root_dictionary, -1, set(), dictionaries_index, spilled_references)
+
+    safe_write_json_file(json_dictionary, json_path, indent, expand_value=expand_reference, compression=compression)
@@ -1,63 +1,64 @@
-""" Treatment of specific types of objects. """
+""" Treatment of specific types of objects.
 
-from rdflib import Graph, URIRef, RDF
+Each treatment is a handler registered for an object type (see register_type_handler), which is dispatched once for
+each object of that type as soon as the object is created (see treat_object_type). Handlers resolve the references of
+their objects using the index of the types of all objects (see encoder_create.create_objects_types_index), without
+querying the graph.
+"""
 
-from src.modules.globals import URI_ONTOLOGY, URI_ONTOUML
+from typing import Callable
 
+from modules.encoder.encoder_model import OntoUMLObject
 
-def count_dictionary_types(list_dictionaries: list[dict]) -> dict:
-    """ Counts the different types that occur in the list of dictionaries and their quantity.
+# Handlers of the objects of each type, indexed by the types they treat
+TYPE_HANDLERS: dict[str, Callable[[OntoUMLObject, dict[str, str]], None]] = {}
 
-    :param list_dictionaries: List with all individual object dictionaries.
-    :type list_dictionaries: list[dict]
-    :return: Dictionary with types and respective number of occurrences.
-    :rtype: dict
-    """
 
-    available_types = {}
+def register_type_handler(object_type: str) -> Callable:
+    """ Decorator that registers the decorated function as the handler of the objects of the received type. Handlers
+    receive the object to be treated and the index of the types of all objects, indexed by their IDs.
+
+    :param object_type: Type of the objects treated by the handler.
+    :type object_type: str
+    :return: Decorator that registers the handler and returns it unchanged.
+    :rtype: Callable
+    """
 
-    for dictionary in list_dictionaries:
-        elem_type = dictionary["type"]
-        # Counting different types in the generated dictionary
-        if elem_type in available_types:
-            available_types[elem_type] += 1
-        else:
-            available_types[elem_type] = 1
+    def register(type_handler: Callable[[OntoUMLObject, dict[str, str]], None]) -> Callable:
+        TYPE_HANDLERS[object_type] = type_handler
+        return type_handler
 
-    return available_types
+    return register
 
 
-def treat_dict_diagram(list_dictionaries: list[dict], ontology_graph: Graph):
-    """ Receives a list with all objects as dictionaries and treats specificities of each object of type 'Diagram'.
+@register_type_handler("Diagram")
+def treat_dict_diagram(diagram_dict: OntoUMLObject, objects_types: dict[str, str]) -> None:
+    """ Replaces the ID of the diagram's owner by a reference with the owner's ID and type. Owners that are not objects
+    (i.e., that have no OntoUML type) are kept as IDs.
 
-    :param list_dictionaries: List with all individual object dictionaries.
-    :type list_dictionaries: list[dict]
-    :param ontology_graph: Graph compliant with the OntoUML Vocabulary loaded from file.
-    :type ontology_graph: Graph
+    :param diagram_dict: Dictionary of an object of type 'Diagram'.
+    :type diagram_dict: OntoUMLObject
+    :param objects_types: Types of all objects, indexed by their IDs.
+    :type objects_types: dict[str, str]
     """
 
-    for diagram_dict in list_dictionaries:
-        # Treats only objects of type 'Diagram'
-        if diagram_dict['type'] != 'Diagram':
-            continue
+    owner_id = diagram_dict['owner']
+    owner_type = objects_types.get(owner_id)
 
-        # Get diagram owner's type
-        for owner_type in ontology_graph.objects(URIRef(URI_ONTOLOGY + diagram_dict['owner']), RDF.type):
-            got_owner_type = owner_type.toPython().replace(URI_ONTOUML, "")
-            diagram_dict['owner'] = {"id": diagram_dict['owner'],
-                                     "type": got_owner_type}
+    if owner_type is not None:
+        diagram_dict['owner'] = {"id": owner_id, "type": owner_type}
 
 
-def treat_dictionary_types(list_dictionaries: list[dict], ontology_graph: Graph):
-    """ Receives a list with all objects in format of dictionary and treats specificities of each object type.
+def treat_object_type(ontouml_object: OntoUMLObject, objects_types: dict[str, str]) -> None:
+    """ Treats the specificities of an object's type, dispatching it to the handler registered for its type (if any).
 
-    :param list_dictionaries: List with all individual object dictionaries.
-    :type list_dictionaries: list[dict]
-    :param ontology_graph: Graph compliant with the OntoUML Vocabulary loaded from file.
-    :type ontology_graph: Graph
+    :param ontouml_object: Object to be treated.
+    :type ontouml_object: OntoUMLObject
+    :param objects_types: Types of all objects, indexed by their IDs.
+    :type objects_types: dict[str, str]
     """
 
-    available_types = count_dictionary_types(list_dictionaries)
+    type_handler = TYPE_HANDLERS.get(ontouml_object['type'])
 
-    if "Diagram" in available_types:
-        treat_dict_diagram(list_dictionaries, ontology_graph)
+    if type_handler is not None:
+        type_handler(ontouml_object, objects_types)
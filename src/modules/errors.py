@@ -1,8 +1,8 @@
 """ Functions related to the verification and treatment of identified ERROR cases. """
 
-from modules.logger import initialize_logger
+from modules.logger import get_logger
 
-LOGGER = initialize_logger()
+LOGGER = get_logger()
 
 
 def report_error_requirement_not_met(error_message: str) -> None:
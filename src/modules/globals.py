@@ -1,13 +1,46 @@
 """ Defines global variables to be used in other modules. Also, publishes the metadata contained in the pyproject.toml
-as the global variable METADATA as a dictionary to be used in other modules. """
+as a dictionary to be used in other modules. The metadata is read only when it is first requested (with get_metadata or
+as the global variable METADATA), so that importing this module has no side effects. """
 
-import toml
+import os
+from functools import lru_cache
 
-# Software's metadata
-global METADATA
-metadata_project = toml.load("../pyproject.toml")
-METADATA = metadata_project["project"]
+# Path of the pyproject.toml file, resolved from this file so that it does not depend on the working directory
+PYPROJECT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "pyproject.toml")
 
 # URI Information
 URI_ONTOLOGY = "https://example.org#"
 URI_ONTOUML = "https://w3id.org/ontouml#"
+
+# Default maximum size of the cache directory, in megabytes
+CACHE_SIZE_DEFAULT = 512
+
+# Default rdflib store plugin used for persistent stores
+GRAPH_STORE_BACKEND_DEFAULT = "SQLite"
+
+# Store backend name that selects binary graph snapshots (see graph_snapshot) instead of an rdflib store plugin
+GRAPH_SNAPSHOT_BACKEND = "Snapshot"
+
+
+@lru_cache(maxsize=None)
+def get_metadata() -> dict:
+    """ Returns the software's metadata contained in the pyproject.toml file, which is read only in the first call.
+
+    :return: Dictionary with the content of the project section of the pyproject.toml file.
+    :rtype: dict
+    """
+
+    import toml
+
+    metadata_project = toml.load(PYPROJECT_PATH)
+
+    return metadata_project["project"]
+
+
+def __getattr__(name: str):
+    """ Publishes the software's metadata as the global variable METADATA, which is read when it is first accessed. """
+
+    if name == "METADATA":
+        return get_metadata()
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
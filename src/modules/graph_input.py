@@ -0,0 +1,190 @@
+""" Input layer for graph files: detection of their (possibly compressed) format and opening of their content.
+
+Compressed graph files (gzip, bzip2 or xz) are recognized by their first bytes and decompressed as streams while read,
+never into temporary files. The format of a graph file is obtained from its extension (ignoring the compression's
+extension, e.g., '.ttl.gz' is Turtle) and, when the extension is unknown, by sniffing its first lines.
+
+This module does not depend on rdflib, so it can be used without importing the parsers.
+"""
+
+import bz2
+import gzip
+import lzma
+import re
+from pathlib import Path
+from typing import BinaryIO
+
+# Compressions of graph files, indexed by their magic numbers (i.e., the first bytes of the compressed files)
+COMPRESSION_MAGIC_NUMBERS = {b"\x1f\x8b": "gzip", b"BZh": "bz2", b"\xfd7zXZ\x00": "xz"}
+
+# Functions that open compressed files as decompressed binary streams, indexed by their compressions
+COMPRESSION_OPENERS = {"gzip": gzip.open, "bz2": bz2.open, "xz": lzma.open}
+
+# Extensions of compressed files, which are ignored when detecting the format of a graph file
+COMPRESSION_EXTENSIONS = {".gz", ".bz2", ".xz"}
+
+# rdflib parser formats of graph files, indexed by their extensions (the same used by rdflib to guess formats)
+GRAPH_FORMAT_EXTENSIONS = {".xml": "xml", ".rdf": "xml", ".owl": "xml", ".n3": "n3", ".ttl": "turtle", ".nt": "nt",
+                           ".trix": "trix", ".xhtml": "rdfa", ".html": "rdfa", ".svg": "rdfa", ".nq": "nquads",
+                           ".nquads": "nquads", ".trig": "trig", ".json": "json-ld", ".jsonld": "json-ld",
+                           ".json-ld": "json-ld"}
+
+# rdflib parser formats that are read line by line by the N-Triples tokenizer, indexed by their names (and aliases)
+STREAMABLE_GRAPH_FORMATS = {"nt": "nt", "ntriples": "nt", "nt11": "nt", "nquads": "nquads"}
+
+# Format used when the format of a graph file can neither be obtained from its extension nor be sniffed
+GRAPH_FORMAT_DEFAULT = "turtle"
+
+# Number of decompressed bytes read from the beginning of a graph file for sniffing its format
+SNIFF_SAMPLE_SIZE = 8 * 1024
+
+# Prefixes of the first statement of Turtle (or TriG) files
+TURTLE_DIRECTIVES = ("@prefix", "@base", "prefix ", "base ")
+
+# Loose patterns of a single N-Triples or N-Quads statement, used only for sniffing
+SNIFF_TERM = r'(?:<[^<>"\s]*>|_:\S+|"(?:[^"\\]|\\.)*"(?:@[A-Za-z0-9-]+|\^\^<[^<>"\s]*>)?)'
+SNIFF_STATEMENT = re.compile(rf"({SNIFF_TERM})[ \t]*({SNIFF_TERM})[ \t]*({SNIFF_TERM})[ \t]*({SNIFF_TERM})?"
+                             r"[ \t]*\.[ \t]*(?:#.*)?$")
+
+
+def get_graph_file_compression(ontology_file: str) -> str | None:
+    """ Returns the compression of a graph file, recognized by its first bytes.
+
+    :param ontology_file: Path to the ontology file.
+    :type ontology_file: str
+    :return: Name of the file's compression ('gzip', 'bz2' or 'xz') or None if the file is not compressed.
+    :rtype: str | None
+    :raises OSError: If the file cannot be read.
+    """
+
+    with open(ontology_file, "rb") as read_file:
+        first_bytes = read_file.read(max(len(magic_number) for magic_number in COMPRESSION_MAGIC_NUMBERS))
+
+    for magic_number, compression in COMPRESSION_MAGIC_NUMBERS.items():
+        if first_bytes.startswith(magic_number):
+            return compression
+
+    return None
+
+
+def get_uncompressed_file_path(ontology_file: str) -> str:
+    """ Returns the path of a graph file without the extension of its compression (e.g., 'model.ttl' for
+    'model.ttl.gz'). Paths without a compression's extension are returned unchanged.
+
+    :param ontology_file: Path to the ontology file.
+    :type ontology_file: str
+    :return: Path of the file without the compression's extension.
+    :rtype: str
+    """
+
+    file_path = Path(ontology_file)
+
+    if file_path.suffix.lower() in COMPRESSION_EXTENSIONS:
+        return str(file_path.with_suffix(""))
+
+    return ontology_file
+
+
+def open_graph_file(ontology_file: str) -> BinaryIO:
+    """ Opens a graph file for reading its content as bytes, decompressing it while read if it is compressed. The
+    returned stream must be closed after being used.
+
+    :param ontology_file: Path to the ontology file.
+    :type ontology_file: str
+    :return: Binary stream of the file's (decompressed) content.
+    :rtype: BinaryIO
+    :raises OSError: If the file cannot be read.
+    """
+
+    compression = get_graph_file_compression(ontology_file)
+
+    if compression is None:
+        return open(ontology_file, "rb")
+
+    return COMPRESSION_OPENERS[compression](ontology_file, "rb")
+
+
+def get_graph_format_extension(graph_format: str) -> str:
+    """ Returns the extension of the files of a graph format (e.g., '.ttl' for 'turtle' and for 'ttl').
+
+    :param graph_format: rdflib format (or alias of the format) of the graph file.
+    :type graph_format: str
+    :return: Extension of the format's files, or the format itself preceded by a dot if it has no known extension.
+    :rtype: str
+    """
+
+    graph_extension = "." + graph_format
+
+    if graph_extension in GRAPH_FORMAT_EXTENSIONS:
+        return graph_extension
+
+    for format_extension, extension_format in GRAPH_FORMAT_EXTENSIONS.items():
+        if extension_format == graph_format:
+            return format_extension
+
+    return graph_extension
+
+
+def sniff_graph_format(content_sample: str) -> str | None:
+    """ Recognizes the format of a graph from the first lines of its content.
+
+    XML and JSON-LD are recognized by their first character, Turtle by its directives, and N-Triples or N-Quads when
+    all complete lines of the sample are single statements (with four terms in N-Quads). Turtle files without
+    directives whose first lines are also valid N-Triples are recognized as N-Triples.
+
+    :param content_sample: Beginning of the graph's content.
+    :type content_sample: str
+    :return: rdflib parser format of the graph or None if it is not recognized.
+    :rtype: str | None
+    """
+
+    content_sample = content_sample.lstrip("\ufeff")
+
+    # The last line may have been cut by the sample's size
+    sample_lines = content_sample.splitlines()[:-1] or content_sample.splitlines()
+    line_format = None
+
+    for sample_line in sample_lines:
+        statement = sample_line.strip()
+
+        if not statement or statement.startswith("#"):
+            continue
+
+        if line_format is None:
+            if statement.startswith("<?xml") or statement.startswith("<rdf:RDF"):
+                return "xml"
+            if statement.startswith("{") or statement.startswith("["):
+                return "json-ld"
+            if statement.lower().startswith(TURTLE_DIRECTIVES):
+                return "turtle"
+
+        statement_match = SNIFF_STATEMENT.match(statement)
+        if statement_match is None:
+            return None
+
+        line_format = "nquads" if statement_match.group(4) or line_format == "nquads" else "nt"
+
+    return line_format
+
+
+def detect_graph_format(ontology_file: str) -> str:
+    """ Returns the rdflib parser format of a graph file, obtained from its extension (ignoring the extension of its
+    compression) or, when the extension is unknown, by sniffing its decompressed content. Files whose format is not
+    recognized are considered to have the GRAPH_FORMAT_DEFAULT format, as done by rdflib.
+
+    :param ontology_file: Path to the ontology file.
+    :type ontology_file: str
+    :return: rdflib parser format of the file.
+    :rtype: str
+    :raises OSError: If the format must be sniffed and the file cannot be read.
+    """
+
+    graph_format = GRAPH_FORMAT_EXTENSIONS.get(Path(get_uncompressed_file_path(ontology_file)).suffix.lower())
+
+    if graph_format is not None:
+        return graph_format
+
+    with open_graph_file(ontology_file) as read_file:
+        content_sample = read_file.read(SNIFF_SAMPLE_SIZE).decode("utf-8", errors="ignore")
+
+    return sniff_graph_format(content_sample) or GRAPH_FORMAT_DEFAULT
@@ -0,0 +1,209 @@
+""" Compact binary snapshot of a graph's triples, read through a memory map, used for encoding graphs repeatedly (or
+in several processes) without parsing them again.
+
+A snapshot file contains, in this order:
+    - the SNAPSHOT_MAGIC bytes;
+    - the length of the header, as a 4-byte unsigned integer in the snapshot's byte order;
+    - the header: a UTF-8 JSON object with the snapshot's format version, byte order, number of triples, the metadata
+      received when it was written (e.g., the signature of its graph file) and the terms table. Each term is
+      represented as a [kind, value, datatype, language] list, where kind is 'U' (URIRef), 'B' (BNode) or 'L'
+      (Literal), as in the SQLite store;
+    - padding up to a multiple of 4 bytes;
+    - the triples table: 3 unsigned 4-byte integers (the positions of the subject, predicate and object in the terms
+      table) per triple.
+
+The triples table is never copied into the working memory: it is read directly from the memory map, whose pages are
+shared by all processes that read the same snapshot. Triples are returned in the same order they were written.
+"""
+
+import json
+import mmap
+import os
+import sys
+import threading
+from array import array
+from typing import Iterable, Iterator
+
+from rdflib import BNode, Literal, URIRef
+from rdflib.term import Node
+
+SNAPSHOT_MAGIC = b"G2JSNAP\0"
+SNAPSHOT_VERSION = 1
+
+# Type code of the triples table's items, which must have 4 bytes
+TRIPLES_TYPE_CODE = "I" if array("I").itemsize == 4 else "L"
+
+
+class GraphSnapshot:
+    """ Graph snapshot file opened for reading. Must be closed after being used.
+
+    :ivar snapshot_path: Path of the snapshot file.
+    :ivar metadata: Metadata saved in the snapshot when it was written.
+    :ivar terms: Terms of the snapshot, indexed by their positions in the terms table.
+    """
+
+    def __init__(self, snapshot_path: str):
+        self.snapshot_path = snapshot_path
+
+        with open(snapshot_path, "rb") as snapshot_file:
+            self.memory_map = mmap.mmap(snapshot_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            header, triples_offset = read_snapshot_header(self.memory_map)
+            self.metadata = header["metadata"]
+            self.terms = [decode_term(term_row) for term_row in header["terms"]]
+            self.triples_table = memoryview(self.memory_map)[triples_offset:].cast(TRIPLES_TYPE_CODE)
+            if len(self.triples_table) != 3 * header["triples"]:
+                raise ValueError("Snapshot's triples table is incomplete.")
+        except (ValueError, KeyError, TypeError):
+            self.close()
+            raise
+
+    def __enter__(self) -> "GraphSnapshot":
+        return self
+
+    def __exit__(self, *exception_information) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self.triples_table) // 3
+
+    def triples(self) -> Iterator[tuple[Node, Node, Node]]:
+        """ Yields the snapshot's triples, in the order they were written.
+
+        :return: Iterator over the snapshot's triples.
+        :rtype: Iterator[tuple[Node, Node, Node]]
+        """
+
+        terms = self.terms
+        terms_positions = iter(self.triples_table)
+
+        for s, p, o in zip(terms_positions, terms_positions, terms_positions):
+            yield terms[s], terms[p], terms[o]
+
+    def close(self) -> None:
+        """ Releases the triples table and closes the memory map. """
+
+        if getattr(self, "triples_table", None) is not None:
+            self.triples_table.release()
+            self.triples_table = None
+        self.memory_map.close()
+
+
+def read_snapshot_header(memory_map: mmap.mmap) -> (dict, int):
+    """ Reads and validates the header of a snapshot.
+
+    :param memory_map: Memory map of the snapshot file.
+    :type memory_map: mmap.mmap
+    :return: Snapshot's header and offset of its triples table.
+    :rtype: (dict, int)
+    :raises ValueError: If the file is not a snapshot that can be read by this version on this platform.
+    """
+
+    magic_length = len(SNAPSHOT_MAGIC)
+
+    if memory_map[:magic_length] != SNAPSHOT_MAGIC:
+        raise ValueError("File is not a graph snapshot.")
+
+    header_length = int.from_bytes(memory_map[magic_length:magic_length + 4], sys.byteorder)
+    header_offset = magic_length + 4
+    header = json.loads(memory_map[header_offset:header_offset + header_length].decode("utf-8"))
+
+    if header.get("version") != SNAPSHOT_VERSION or header.get("byte_order") != sys.byteorder:
+        raise ValueError("Graph snapshot was written by another version or platform.")
+
+    return header, get_aligned_offset(header_offset + header_length)
+
+
+def get_aligned_offset(offset: int) -> int:
+    """ Returns the first offset that is a multiple of 4 and is not before the received offset. """
+
+    return (offset + 3) // 4 * 4
+
+
+def encode_term(term: Node) -> list[str]:
+    """ Returns the row of a term in the terms table.
+
+    :param term: Term to be encoded.
+    :type term: Node
+    :return: List with the term's kind, value, datatype and language.
+    :rtype: list[str]
+    """
+
+    if isinstance(term, Literal):
+        return ["L", str(term), str(term.datatype or ""), term.language or ""]
+    if isinstance(term, BNode):
+        return ["B", str(term), "", ""]
+    if isinstance(term, URIRef):
+        return ["U", str(term), "", ""]
+
+    raise TypeError(f"Terms of type {type(term).__name__} are not supported by graph snapshots.")
+
+
+def decode_term(term_row: list[str]) -> Node:
+    """ Returns the term represented by a row of the terms table.
+
+    :param term_row: List with the term's kind, value, datatype and language.
+    :type term_row: list[str]
+    :return: Decoded term.
+    :rtype: Node
+    """
+
+    kind, value, datatype, language = term_row
+
+    if kind == "U":
+        return URIRef(value)
+    if kind == "B":
+        return BNode(value)
+
+    return Literal(value, lang=language or None, datatype=URIRef(datatype) if datatype else None)
+
+
+def write_graph_snapshot(graph_triples: Iterable[tuple[Node, Node, Node]], snapshot_path: str,
+                         metadata: dict = None) -> int:
+    """ Writes the received triples, in the received order, into a snapshot file. The file is written under a
+    temporary name and only replaces snapshot_path when complete, so readers never see a partial snapshot.
+
+    :param graph_triples: Triples to be written.
+    :type graph_triples: Iterable[tuple[Node, Node, Node]]
+    :param snapshot_path: Path of the snapshot file.
+    :type snapshot_path: str
+    :param metadata: JSON serializable metadata saved in the snapshot's header.
+    :type metadata: dict
+    :return: Number of written triples.
+    :rtype: int
+    """
+
+    terms_positions = {}
+    terms_rows = []
+    triples_table = array(TRIPLES_TYPE_CODE)
+
+    for triple in graph_triples:
+        for term in triple:
+            term_position = terms_positions.get(term)
+            if term_position is None:
+                term_position = terms_positions[term] = len(terms_rows)
+                terms_rows.append(encode_term(term))
+            triples_table.append(term_position)
+
+    number_triples = len(triples_table) // 3
+    header = json.dumps({"version": SNAPSHOT_VERSION, "byte_order": sys.byteorder, "triples": number_triples,
+                         "metadata": metadata or {}, "terms": terms_rows}).encode("utf-8")
+    header_end = len(SNAPSHOT_MAGIC) + 4 + len(header)
+
+    # Unique per process and thread, as concurrent encodings may write the same snapshot
+    temporary_path = f"{snapshot_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+    try:
+        with open(temporary_path, "wb") as snapshot_file:
+            snapshot_file.write(SNAPSHOT_MAGIC)
+            snapshot_file.write(len(header).to_bytes(4, sys.byteorder))
+            snapshot_file.write(header)
+            snapshot_file.write(b"\0" * (get_aligned_offset(header_end) - header_end))
+            triples_table.tofile(snapshot_file)
+        os.replace(temporary_path, snapshot_path)
+    finally:
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+
+    return number_triples
@@ -0,0 +1,150 @@
+""" Instrumentation of the encoding pipeline.
+
+An instrumentation report is a dictionary with a list of measured stages. For each stage, the wall time, the CPU time,
+the peak of memory allocated (traced with tracemalloc) and counts informed by the stage itself (e.g., number of
+triples or objects) are recorded. Functions that receive a report equal to None are not instrumented, so the
+instrumentation has no cost when it is not used. When it is used, tracing the memory allocations makes the measured
+stages considerably slower (especially parsing), so wall and CPU times are only comparable among instrumented runs.
+"""
+
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Iterator
+
+from modules.io_json import get_json_path_compression, safe_write_json_file, JSON_COMPRESSION_EXTENSIONS
+from modules.logger import get_logger
+from modules.utils import get_date_time
+
+LOGGER = get_logger()
+
+
+def create_instrumentation_report() -> dict:
+    """ Creates an empty instrumentation report and starts tracing memory allocations, if they are not being traced.
+
+    :return: New instrumentation report.
+    :rtype: dict
+    """
+
+    instrumentation_report = {"start_date_time": get_date_time("%Y-%m-%d %H:%M:%S"),
+                              "stages": [],
+                              "total": None,
+                              "started_tracemalloc": not tracemalloc.is_tracing()}
+
+    if instrumentation_report["started_tracemalloc"]:
+        tracemalloc.start()
+
+    return instrumentation_report
+
+
+@contextmanager
+def measure_stage(instrumentation_report: dict, stage_name: str) -> Iterator[dict]:
+    """ Measures the execution of the stage inside the with block and appends it to the report. The yielded
+    dictionary can be filled with the stage's counts. If the report is None, nothing is measured.
+
+    Stages must not be nested, as the peak of allocated memory is reset at the beginning of each stage.
+
+    :param instrumentation_report: Instrumentation report or None.
+    :type instrumentation_report: dict
+    :param stage_name: Name of the measured stage.
+    :type stage_name: str
+    :return: Dictionary to be filled with the stage's counts.
+    :rtype: Iterator[dict]
+    """
+
+    stage_counts = {}
+
+    if instrumentation_report is None:
+        yield stage_counts
+        return
+
+    tracemalloc.reset_peak()
+    start_memory = tracemalloc.get_traced_memory()[0]
+    start_cpu_time = time.process_time()
+    start_wall_time = time.perf_counter()
+
+    yield stage_counts
+
+    wall_time = time.perf_counter() - start_wall_time
+    cpu_time = time.process_time() - start_cpu_time
+    current_memory, peak_memory = tracemalloc.get_traced_memory()
+
+    instrumentation_report["stages"].append({"stage": stage_name,
+                                             "wall_time": round(wall_time, 6),
+                                             "cpu_time": round(cpu_time, 6),
+                                             "peak_memory": peak_memory - start_memory,
+                                             "memory_delta": current_memory - start_memory,
+                                             "counts": stage_counts})
+
+
+def finish_instrumentation_report(instrumentation_report: dict) -> dict:
+    """ Calculates the report's totals and stops tracing memory allocations if they were started by the report.
+
+    :param instrumentation_report: Instrumentation report.
+    :type instrumentation_report: dict
+    :return: The received report, finished.
+    :rtype: dict
+    """
+
+    list_stages = instrumentation_report["stages"]
+
+    instrumentation_report["total"] = {
+        "wall_time": round(sum(stage["wall_time"] for stage in list_stages), 6),
+        "cpu_time": round(sum(stage["cpu_time"] for stage in list_stages), 6),
+        "peak_memory": max((stage["peak_memory"] for stage in list_stages), default=0)}
+
+    if instrumentation_report.pop("started_tracemalloc", False):
+        tracemalloc.stop()
+
+    return instrumentation_report
+
+
+def log_instrumentation_report(instrumentation_report: dict) -> None:
+    """ Logs a line for each stage of a finished instrumentation report.
+
+    :param instrumentation_report: Finished instrumentation report.
+    :type instrumentation_report: dict
+    """
+
+    for stage in instrumentation_report["stages"]:
+        counts = ", ".join(f"{count_name}: {count_value}" for count_name, count_value in stage["counts"].items())
+        LOGGER.info(f"Stage {stage['stage']}: wall {stage['wall_time']}s, CPU {stage['cpu_time']}s, "
+                    f"peak memory {round(stage['peak_memory'] / (1024 * 1024), 2)} MB"
+                    f"{'. ' + counts if counts else ''}.")
+
+
+def get_report_path(output_file_path: str) -> str:
+    """ Returns the path of the report's sidecar file of a JSON output file (e.g., 'model.report.json' for
+    'model.json' or 'model.json.gz').
+
+    :param output_file_path: Path of the JSON output file.
+    :type output_file_path: str
+    :return: Path of the sidecar file.
+    :rtype: str
+    """
+
+    output_compression = get_json_path_compression(output_file_path)
+    if output_compression is not None:
+        output_file_path = output_file_path[:-len(JSON_COMPRESSION_EXTENSIONS[output_compression])]
+
+    if output_file_path.endswith(".json"):
+        output_file_path = output_file_path[:-len(".json")]
+
+    return output_file_path + ".report.json"
+
+
+def save_instrumentation_report(instrumentation_report: dict, output_file_path: str) -> str:
+    """ Saves the instrumentation report as a JSON sidecar file next to the JSON output file.
+
+    :param instrumentation_report: Finished instrumentation report.
+    :type instrumentation_report: dict
+    :param output_file_path: Path of the JSON output file.
+    :type output_file_path: str
+    :return: Saved report file path.
+    :rtype: str
+    """
+
+    report_path = get_report_path(output_file_path)
+    safe_write_json_file(instrumentation_report, report_path, indent=4)
+
+    return report_path
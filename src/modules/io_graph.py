@@ -1,28 +1,126 @@
 """ IO functions for graphs. """
 
+import hashlib
+import io
+import json
 import os
 from pathlib import Path
+from typing import Iterable, Iterator
 
 from modules.errors import report_error_io_read, report_error_io_write
-from modules.logger import initialize_logger
-from rdflib import Graph
+from modules.graph_input import detect_graph_format, get_graph_file_compression, get_graph_format_extension, \
+    get_uncompressed_file_path, open_graph_file, STREAMABLE_GRAPH_FORMATS
+from modules.graph_snapshot import GraphSnapshot, write_graph_snapshot
+from modules.logger import get_logger
+from modules.ntriples_tokenizer import tokenize_graph_lines
+from modules.utils import create_directory_if_not_exists
+from rdflib import Graph, RDF, plugin
+from rdflib.store import Store, VALID_STORE
+from rdflib.term import Node
+from src.modules.globals import GRAPH_SNAPSHOT_BACKEND, GRAPH_STORE_BACKEND_DEFAULT
 
-LOGGER = initialize_logger()
+LOGGER = get_logger()
 
+# Persistent store kept in a SQLite database file, available as the rdflib store plugin 'SQLite'
+plugin.register("SQLite", Store, "modules.sqlite_store", "SQLiteStore")
 
-def load_all_graph_safely(ontology_file: str) -> Graph:
-    """ Safely load graph from file to working memory.
+
+def is_streamable_graph_file(ontology_file: str) -> bool:
+    """ Verifies if the graph file (possibly compressed) has a line-based format that can be read as a stream of
+    triples.
+
+    :param ontology_file: Path to the ontology file.
+    :type ontology_file: str
+    :return: True if the file can be read with stream_graph_triples. False otherwise.
+    :rtype: bool
+    """
+
+    try:
+        return detect_graph_format(ontology_file) in STREAMABLE_GRAPH_FORMATS
+    except OSError as error:
+        file_description = f"input ontology file"
+        report_error_io_read(ontology_file, file_description, error)
+
+
+def stream_graph_triples(ontology_file: str, graph_format: str = None) -> Iterator[tuple[Node, Node, Node]]:
+    """ Safely reads a N-Triples or N-Quads file (possibly compressed) line by line with the fast tokenizer (see
+    ntriples_tokenizer), yielding its triples without loading the graph into the working memory. The triples of all
+    graphs of a N-Quads file are merged.
+
+    :param ontology_file: Path to the ontology file to be read.
+    :type ontology_file: str
+    :param graph_format: rdflib parser format of the file. If None (default), it is detected (see detect_graph_format).
+    :type graph_format: str
+    :return: Iterator over the triples of the file.
+    :rtype: Iterator[tuple[Node, Node, Node]]
+    """
+
+    try:
+        graph_format = STREAMABLE_GRAPH_FORMATS[graph_format or detect_graph_format(ontology_file)]
+
+        with io.TextIOWrapper(open_graph_file(ontology_file), encoding="utf-8") as read_file:
+            yield from tokenize_graph_lines(read_file, graph_format)
+    except OSError as error:
+        file_description = f"input ontology file"
+        report_error_io_read(ontology_file, file_description, error)
+
+    LOGGER.info(f"Ontology file {ontology_file} successfully streamed.")
+
+
+def parse_graph_file(ontology_graph: Graph, ontology_file: str) -> None:
+    """ Parses a graph file (possibly compressed) into the received graph, according to its detected format (see
+    detect_graph_format). N-Triples and N-Quads files are read by the fast tokenizer (see stream_graph_triples) and the
+    other formats by rdflib's parsers.
+
+    :param ontology_graph: Graph into which the file's triples are added.
+    :type ontology_graph: Graph
+    :param ontology_file: Path to the ontology file to be parsed.
+    :type ontology_file: str
+    :raises OSError: If the file cannot be read.
+    """
+
+    graph_format = detect_graph_format(ontology_file)
+
+    if graph_format in STREAMABLE_GRAPH_FORMATS:
+        ontology_graph.addN((s, p, o, ontology_graph) for s, p, o in stream_graph_triples(ontology_file, graph_format))
+    elif get_graph_file_compression(ontology_file) is None:
+        ontology_graph.parse(ontology_file, format=graph_format, encoding='utf-8')
+    else:
+        # Compressed files are parsed from their decompressed stream, named after the file for resolving relative IRIs
+        with open_graph_file(os.path.abspath(ontology_file)) as read_file:
+            ontology_graph.parse(source=read_file, format=graph_format)
+
+
+def load_all_graph_safely(ontology_file: str, store_directory: str = None,
+                          store_backend: str = GRAPH_STORE_BACKEND_DEFAULT) -> Graph:
+    """ Safely load graph from file to working memory. If a store directory is provided, the graph is loaded into a
+    persistent store instead (see load_stored_graph_safely). If the store backend is GRAPH_SNAPSHOT_BACKEND, the graph
+    is loaded into the working memory from its snapshot in the store directory (see load_graph_snapshot_safely).
 
     :param ontology_file: Path to the ontology file to be loaded into the working memory.
     :type ontology_file: str
+    :param store_directory: Directory of the persistent stores. If None (default), the graph is kept in memory.
+    :type store_directory: str
+    :param store_backend: Name of the rdflib store plugin used for the persistent store.
+    :type store_backend: str
     :return: RDFLib graph loaded as object.
     :rtype: Graph
     """
 
+    if store_directory is not None and store_backend == GRAPH_SNAPSHOT_BACKEND:
+        ontology_graph = Graph()
+        with load_graph_snapshot_safely(ontology_file, store_directory) as graph_snapshot:
+            for triple in graph_snapshot.triples():
+                ontology_graph.add(triple)
+        return ontology_graph
+
+    if store_directory is not None:
+        return load_stored_graph_safely(ontology_file, store_directory, store_backend)
+
     ontology_graph = Graph()
 
     try:
-        ontology_graph.parse(ontology_file, encoding='utf-8')
+        parse_graph_file(ontology_graph, ontology_file)
     except OSError as error:
         file_description = f"input ontology file"
         report_error_io_read(ontology_file, file_description, error)
@@ -32,6 +130,203 @@ def load_all_graph_safely(ontology_file: str) -> Graph:
     return ontology_graph
 
 
+def get_graph_store_path(ontology_file: str, store_directory: str, store_backend: str) -> str:
+    """ Returns the path of the persistent store of an ontology file. Each ontology file has its own store, named
+    after the file's name and a hash of its absolute path.
+
+    :param ontology_file: Path to the ontology file.
+    :type ontology_file: str
+    :param store_directory: Directory of the persistent stores.
+    :type store_directory: str
+    :param store_backend: Name of the rdflib store plugin used for the persistent store.
+    :type store_backend: str
+    :return: Path of the ontology file's persistent store.
+    :rtype: str
+    """
+
+    path_hash = hashlib.sha1(os.path.abspath(ontology_file).encode("utf-8")).hexdigest()[:12]
+
+    return os.path.join(store_directory, f"{Path(ontology_file).stem}_{path_hash}.{store_backend.lower()}")
+
+
+def get_graph_file_signature(ontology_file: str) -> dict:
+    """ Returns the signature used to verify if an ontology file changed after being loaded into a persistent store.
+
+    :param ontology_file: Path to the ontology file.
+    :type ontology_file: str
+    :return: Dictionary with the file's absolute path, size and modification time.
+    :rtype: dict
+    """
+
+    try:
+        file_stat = os.stat(ontology_file)
+    except OSError as error:
+        file_description = f"input ontology file"
+        report_error_io_read(ontology_file, file_description, error)
+
+    return {"ontology_file": os.path.abspath(ontology_file), "size": file_stat.st_size,
+            "modification_time": file_stat.st_mtime_ns}
+
+
+def load_stored_graph_safely(ontology_file: str, store_directory: str,
+                             store_backend: str = GRAPH_STORE_BACKEND_DEFAULT) -> Graph:
+    """ Safely load graph from file into a persistent store. The file is only parsed if its store does not exist yet or
+    if the file changed after it was stored. Otherwise, the stored graph is used as it is.
+
+    The file's signature is saved in a JSON file next to the store after it is successfully parsed. The returned graph
+    must be closed after being used.
+
+    :param ontology_file: Path to the ontology file to be loaded.
+    :type ontology_file: str
+    :param store_directory: Directory of the persistent stores.
+    :type store_directory: str
+    :param store_backend: Name of the rdflib store plugin used for the persistent store.
+    :type store_backend: str
+    :return: RDFLib graph backed by the persistent store.
+    :rtype: Graph
+    """
+
+    create_directory_if_not_exists(store_directory, "graph store directory")
+
+    store_path = get_graph_store_path(ontology_file, store_directory, store_backend)
+    signature_path = store_path + ".json"
+    file_signature = get_graph_file_signature(ontology_file)
+
+    try:
+        with open(signature_path, "r", encoding="utf-8") as signature_file:
+            is_stored = json.load(signature_file) == file_signature and os.path.exists(store_path)
+    except (OSError, ValueError):
+        is_stored = False
+
+    ontology_graph = Graph(store=store_backend)
+
+    try:
+        if ontology_graph.open(store_path, create=True) != VALID_STORE:
+            raise OSError(f"Store {store_backend} could not be opened.")
+    except OSError as error:
+        file_description = f"graph store"
+        report_error_io_read(store_path, file_description, error)
+
+    if is_stored:
+        LOGGER.info(f"Ontology file {ontology_file} successfully loaded from store {store_path}.")
+        return ontology_graph
+
+    # The signature is removed before the store is changed, so an interrupted parsing is never reused
+    if os.path.exists(signature_path):
+        os.remove(signature_path)
+    ontology_graph.remove((None, None, None))
+
+    try:
+        parse_graph_file(ontology_graph, ontology_file)
+        ontology_graph.commit()
+    except OSError as error:
+        file_description = f"input ontology file"
+        report_error_io_read(ontology_file, file_description, error)
+
+    try:
+        with open(signature_path, "w", encoding="utf-8") as signature_file:
+            json.dump(file_signature, signature_file)
+    except OSError as error:
+        file_description = f"graph store signature file"
+        report_error_io_write(signature_path, file_description, error)
+
+    LOGGER.info(f"Ontology file {ontology_file} successfully loaded into store {store_path}.")
+
+    return ontology_graph
+
+
+def get_graph_triples_in_index_order(ontology_graph: Graph) -> Iterable[tuple[Node, Node, Node]]:
+    """ Yields the graph's triples in the order of the graph's indexes: first the rdf:type triples in the order of the
+    type index, then the other triples of each subject in the order of the subject index.
+
+    A stream of these triples is encoded exactly as the graph itself (see encode_streamed_graph_to_json).
+
+    :param ontology_graph: Graph compliant with the OntoUML Vocabulary loaded from file.
+    :type ontology_graph: Graph
+    :return: Generator of the graph's triples.
+    :rtype: Iterable[tuple[Node, Node, Node]]
+    """
+
+    for s, o in ontology_graph.subject_objects(RDF.type):
+        yield s, RDF.type, o
+
+    for s in ontology_graph.subjects(unique=True):
+        for p, o in ontology_graph.predicate_objects(s):
+            if p != RDF.type:
+                yield s, p, o
+
+
+def load_graph_snapshot_safely(ontology_file: str, snapshot_directory: str) -> GraphSnapshot:
+    """ Safely opens the binary snapshot of a graph file (see graph_snapshot). The file is only parsed if its snapshot
+    does not exist yet or if the file changed after the snapshot was written. Otherwise, the snapshot is opened without
+    parsing the file.
+
+    The snapshot's triples are written in an order that is encoded exactly as the graph parsed from the file: the file's
+    order for line-based formats and the graph's index order (see get_graph_triples_in_index_order) for the others.
+    The returned snapshot must be closed after being used.
+
+    :param ontology_file: Path to the ontology file to be loaded.
+    :type ontology_file: str
+    :param snapshot_directory: Directory of the graph snapshots.
+    :type snapshot_directory: str
+    :return: Opened snapshot of the graph file.
+    :rtype: GraphSnapshot
+    """
+
+    create_directory_if_not_exists(snapshot_directory, "graph snapshot directory")
+
+    snapshot_path = get_graph_store_path(ontology_file, snapshot_directory, GRAPH_SNAPSHOT_BACKEND)
+    file_signature = get_graph_file_signature(ontology_file)
+
+    try:
+        graph_snapshot = GraphSnapshot(snapshot_path)
+    except (OSError, ValueError):
+        graph_snapshot = None
+
+    if graph_snapshot is not None:
+        if graph_snapshot.metadata.get("signature") == file_signature:
+            LOGGER.info(f"Ontology file {ontology_file} successfully loaded from snapshot {snapshot_path}.")
+            return graph_snapshot
+        graph_snapshot.close()
+
+    if is_streamable_graph_file(ontology_file):
+        save_graph_snapshot(stream_graph_triples(ontology_file), snapshot_path, file_signature)
+    else:
+        ontology_graph = load_all_graph_safely(ontology_file)
+        save_graph_snapshot(get_graph_triples_in_index_order(ontology_graph), snapshot_path, file_signature)
+
+    try:
+        graph_snapshot = GraphSnapshot(snapshot_path)
+    except (OSError, ValueError) as error:
+        file_description = f"graph snapshot"
+        report_error_io_read(snapshot_path, file_description, error)
+
+    LOGGER.info(f"Ontology file {ontology_file} successfully loaded into snapshot {snapshot_path}.")
+
+    return graph_snapshot
+
+
+def save_graph_snapshot(graph_triples: Iterable[tuple[Node, Node, Node]], snapshot_path: str,
+                        file_signature: dict = None) -> None:
+    """ Safely saves the received triples into a binary graph snapshot (see graph_snapshot).
+
+    :param graph_triples: Triples to be saved, in the order they will be read.
+    :type graph_triples: Iterable[tuple[Node, Node, Node]]
+    :param snapshot_path: Path of the snapshot file.
+    :type snapshot_path: str
+    :param file_signature: Signature of the graph file from which the triples were obtained, if any.
+    :type file_signature: dict
+    """
+
+    try:
+        number_triples = write_graph_snapshot(graph_triples, snapshot_path, {"signature": file_signature})
+    except OSError as error:
+        file_description = f"graph snapshot"
+        report_error_io_write(snapshot_path, file_description, error)
+
+    LOGGER.debug(f"{number_triples} triples successfully written into snapshot {snapshot_path}.")
+
+
 def save_graph_file(ontouml_graph: Graph, json_path: str, graph_format: str) -> str:
     """Saves the ontology graph into a file with syntax defined by the user.
 
@@ -47,19 +342,35 @@ def save_graph_file(ontouml_graph: Graph, json_path: str, graph_format: str) ->
     :rtype: str
     """
 
+    output_file_path = get_graph_output_path(json_path, graph_format)
+    safe_write_graph_file(ontouml_graph, output_file_path, graph_format)
+
+    return output_file_path
+
+
+def get_graph_output_path(json_path: str, graph_format: str) -> str:
+    """ Returns the path of the graph file generated for the received JSON file, creating the results directory if it
+    does not exist.
+
+    :param json_path: Path to the input json file.
+    :type json_path: str
+    :param graph_format: rdflib format of the graph file, which defines its extension.
+    :type graph_format: str
+    :return: Output graph file path.
+    :rtype: str
+    """
+
     # Collecting information for result file name and path
     project_directory = os.getcwd()
     results_directory = "results"
-    loaded_file_name = Path(json_path).stem
+    loaded_file_name = Path(get_uncompressed_file_path(json_path)).stem
 
     # If directory 'results_directory' not exists, create it
     create_directory_if_not_exists(results_directory, "results directory")
 
     # Setting file complete path
-    output_file_name = loaded_file_name + "." + graph_format
-    output_file_path = project_directory + "\\" + results_directory + "\\" + output_file_name
-
-    safe_write_graph_file(ontouml_graph, output_file_path, graph_format)
+    output_file_name = loaded_file_name + get_graph_format_extension(graph_format)
+    output_file_path = os.path.join(project_directory, results_directory, output_file_name)
 
     return output_file_path
 
@@ -1,17 +1,49 @@
-""" IO functions for JSON. """
+""" IO functions for JSON.
+
+JSON files are written through an output layer (see open_json_output) that optionally compresses them as streams and
+that writes them to a temporary file in the destination directory, which is only renamed to the final path once
+complete, so that a partial or corrupted output is never found in its place. The standard output can be used as the
+destination as well. JSON files are loaded and decoded transparently whether they are compressed or not.
+"""
+import bz2
+import gzip
+import io
 import json
+import lzma
 import os
+import sys
+import threading
+from contextlib import contextmanager
+from itertools import chain, repeat
+from json.encoder import encode_basestring_ascii
 from pathlib import Path
+from typing import Callable, Iterator, TextIO
 
 from modules.errors import report_error_io_read, report_error_io_write
-from modules.logger import initialize_logger
+from modules.graph_input import get_uncompressed_file_path, open_graph_file
+from modules.logger import get_logger
 from modules.utils import create_directory_if_not_exists
 
-LOGGER = initialize_logger()
+LOGGER = get_logger()
+
+# Maximum number of characters kept in memory before being written to the output JSON file
+JSON_WRITE_BUFFER_SIZE = 64 * 1024
+
+# Path that represents the standard output as the destination of a JSON file
+JSON_STANDARD_OUTPUT = "-"
+
+# Extensions of the compressed JSON files, indexed by their compressions (the ones read by graph_input)
+JSON_COMPRESSION_EXTENSIONS = {"gzip": ".gz", "bz2": ".bz2", "xz": ".xz"}
+
+# Functions that wrap a binary stream into a compressor that writes into it (without closing it when closed), indexed
+# by their compressions. The gzip header does not contain the file's name and time, so equal outputs are equal files.
+JSON_COMPRESSION_WRITERS = {"gzip": lambda binary_file: gzip.GzipFile("", "wb", 6, binary_file, mtime=0),
+                            "bz2": lambda binary_file: bz2.BZ2File(binary_file, "wb"),
+                            "xz": lambda binary_file: lzma.LZMAFile(binary_file, "wb")}
 
 
 def safe_load_json_file(json_path: str) -> dict:
-    """ Safely loads a JSON file received as an argument into a dictionary.
+    """ Safely loads a JSON file received as an argument into a dictionary. Compressed JSON files are decompressed.
 
     :param json_path: Path to the JSON file to be loaded.
     :type json_path: str
@@ -20,7 +52,7 @@ def safe_load_json_file(json_path: str) -> dict:
     """
 
     try:
-        with open(json_path, "r") as read_file:
+        with open_json_file(json_path) as read_file:
             json_data = json.load(read_file)
     except IOError as error:
         file_description = f"input json file"
@@ -31,7 +63,22 @@ def safe_load_json_file(json_path: str) -> dict:
     return json_data
 
 
-def save_json_file(json_data: dict, graph_path: str) -> str:
+def open_json_file(json_path: str) -> TextIO:
+    """ Opens a JSON file for reading its text, decompressing it while read if it is compressed (see
+    graph_input.open_graph_file). The returned stream must be closed after being used.
+
+    :param json_path: Path to the JSON file.
+    :type json_path: str
+    :return: Text stream of the file's (decompressed) content.
+    :rtype: TextIO
+    :raises OSError: If the file cannot be read.
+    """
+
+    return io.TextIOWrapper(open_graph_file(json_path), encoding="utf-8")
+
+
+def save_json_file(json_data: dict, graph_path: str, indent: int = None, output_path: str = None,
+                   compression: str = None) -> str:
     """Saves the ontology graph into a file with syntax defined by the user.
     Returns the path in which the json file was saved.
 
@@ -39,39 +86,304 @@ def save_json_file(json_data: dict, graph_path: str) -> str:
     :type json_data: dict
     :param graph_path: Path to the input graph file.
     :type graph_path: str
+    :param indent: Number of spaces used to indent the JSON output. If None (default), the output is compact.
+    :type indent: int
+    :param output_path: Path of the JSON file or JSON_STANDARD_OUTPUT. If None (default), the file is saved in the
+    results directory (see get_json_output_path).
+    :type output_path: str
+    :param compression: Compression of the JSON file ('gzip', 'bz2' or 'xz'). If None (default), it is not compressed.
+    :type compression: str
     :return: Saved output file path.
     :rtype: str
     """
 
+    output_file_path = output_path or get_json_output_path(graph_path, compression)
+    safe_write_json_file(json_data, output_file_path, indent, compression=compression)
+
+    return output_file_path
+
+
+def get_json_output_path(graph_path: str, compression: str = None) -> str:
+    """ Returns the path of the JSON file generated for the received graph file, creating the results directory if it
+    does not exist.
+
+    :param graph_path: Path to the input graph file.
+    :type graph_path: str
+    :param compression: Compression of the JSON file, whose extension is appended to the path. If None (default), the
+    file is not compressed.
+    :type compression: str
+    :return: Output JSON file path.
+    :rtype: str
+    """
+
     # Collecting information for result file name and path
     project_directory = os.getcwd()
     results_directory = "results"
-    loaded_file_name = Path(graph_path).stem
+    loaded_file_name = Path(get_uncompressed_file_path(graph_path)).stem
 
     # If directory 'results_directory' not exists, create it
     create_directory_if_not_exists(results_directory, "results directory")
 
     # Setting file complete path
-    output_file_name = loaded_file_name + ".json"
-    output_file_path = project_directory + "\\" + results_directory + "\\" + output_file_name
-
-    safe_write_json_file(json_data, output_file_path)
+    output_file_name = loaded_file_name + ".json" + JSON_COMPRESSION_EXTENSIONS.get(compression, "")
+    output_file_path = os.path.join(project_directory, results_directory, output_file_name)
 
     return output_file_path
 
 
-def safe_write_json_file(dictionary_data: dict, json_path: str) -> None:
-    """ Safely writes a received dictionary as a JSON file in the specified path.
+def get_json_path_compression(json_path: str) -> str | None:
+    """ Returns the compression of a JSON file to be written, obtained from the extension of its path.
+
+    :param json_path: Path of the JSON file.
+    :type json_path: str
+    :return: Compression whose extension ends the path ('gzip', 'bz2' or 'xz') or None if there is none.
+    :rtype: str | None
+    """
+
+    for compression, extension in JSON_COMPRESSION_EXTENSIONS.items():
+        if json_path.lower().endswith(extension):
+            return compression
+
+    return None
+
+
+@contextmanager
+def open_json_output(json_path: str, compression: str = None) -> Iterator[TextIO]:
+    """ Opens the destination of a JSON file for writing its text, compressing it while written if a compression is
+    received. The text is written to a temporary file next to json_path, which replaces json_path only when the
+    context is exited without errors (and is removed otherwise). If json_path is JSON_STANDARD_OUTPUT, the text is
+    written directly to the standard output.
+
+    The text is encoded as UTF-8 and the written pieces reach the compressor and the file without being split, so the
+    number of write calls is the one of the writer (see stream_json_data).
+
+    :param json_path: Path of the JSON file or JSON_STANDARD_OUTPUT.
+    :type json_path: str
+    :param compression: Compression of the JSON file ('gzip', 'bz2' or 'xz'). If None (default), it is not compressed.
+    :type compression: str
+    :return: Context manager of the text stream in which the JSON must be written.
+    :rtype: Iterator[TextIO]
+    :raises OSError: If the destination cannot be written.
+    """
+
+    if json_path == JSON_STANDARD_OUTPUT:
+        sys.stdout.flush()
+        temporary_path = None
+        binary_file = sys.stdout.buffer
+    else:
+        # Unique per process and thread, as concurrent encodings may save the same output
+        temporary_path = f"{json_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        binary_file = open(temporary_path, "wb")
+
+    try:
+        compressed_file = JSON_COMPRESSION_WRITERS[compression](binary_file) if compression else None
+        text_file = io.TextIOWrapper(compressed_file or binary_file, encoding="utf-8", write_through=True)
+
+        try:
+            yield text_file
+        finally:
+            # Detached instead of closed, so that the standard output is not closed with it
+            text_file.detach()
+            if compressed_file is not None:
+                compressed_file.close()
+
+        binary_file.flush()
+        if temporary_path is not None:
+            binary_file.close()
+            os.replace(temporary_path, json_path)
+    finally:
+        if temporary_path is not None:
+            binary_file.close()
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+
+
+def encode_json_scalar(value) -> str:
+    """ Encodes a value that is not a list or a dictionary exactly as the json module does.
+
+    :param value: Value to be encoded.
+    :return: JSON representation of the value.
+    :rtype: str
+    :raises TypeError: If the value is not JSON serializable.
+    """
+
+    if isinstance(value, str):
+        return encode_basestring_ascii(value)
+    if value is None:
+        return "null"
+    if value is True:
+        return "true"
+    if value is False:
+        return "false"
+    if isinstance(value, int):
+        return int.__repr__(value)
+    if isinstance(value, float):
+        # Same representation used by the json module for special values
+        if value != value:
+            return "NaN"
+        if value in (float("inf"), float("-inf")):
+            return "Infinity" if value > 0 else "-Infinity"
+        return float.__repr__(value)
+
+    raise TypeError(f"Object of type {value.__class__.__name__} is not JSON serializable")
+
+
+def get_container_template(keys: tuple[str, ...], level: int, indent: int = None) -> (list[str], str):
+    """ Precompiles the fixed parts of the JSON representation of a dictionary with the received keys (or of a list with
+    len(keys) items) in the given nesting level: the prefix written before each value, with the opening bracket,
+    separators, indentation and encoded key already concatenated, and the closing of the container.
+
+    :param keys: Keys of the dictionary, in output order, or None for a list.
+    :type keys: tuple[str, ...]
+    :param level: Nesting level of the container.
+    :type level: int
+    :param indent: Number of spaces used to indent the JSON output. If None, the output is compact.
+    :type indent: int
+    :return: Prefix of each value and closing of the container.
+    :rtype: (list[str], str)
+    """
+
+    if indent is None:
+        first_separator, separator, closing_separator = "", ", ", ""
+    else:
+        first_separator = "\n" + " " * (indent * (level + 1))
+        separator = "," + first_separator
+        closing_separator = "\n" + " " * (indent * level)
+
+    if keys is None:
+        return ["[" + first_separator, separator], closing_separator + "]"
+
+    value_prefixes = [separator + encode_basestring_ascii(key) + ": " for key in keys]
+    value_prefixes[0] = "{" + first_separator + value_prefixes[0][len(separator):]
+
+    return value_prefixes, closing_separator + "}"
+
+
+def stream_json_data(json_data: dict, write_file: TextIO, indent: int = None,
+                     buffer_size: int = JSON_WRITE_BUFFER_SIZE, expand_value: Callable = None) -> None:
+    """ Writes the received data as JSON while walking its containment tree, without creating the whole encoded
+    document in memory. Encoded pieces are accumulated in a buffer that is written to the file whenever it exceeds
+    buffer_size characters, which is verified after each piece, so large containers are also written in parts. The
+    output is identical to the one generated by json.dump with the same indent.
+
+    Dictionaries are written with templates precompiled once per set of keys (i.e., per key schema of the OntoUML
+    types) and nesting level, so their keys are never encoded again and each value is written with a single piece.
+
+    Values that are not strings, None, dictionaries or lists may be replaced while written: if expand_value returns
+    another object for them (e.g., the dictionary represented by a reference to a spilled object), the returned object
+    is written instead. Hence, the data does not need to be entirely in memory when the writing starts.
+
+    :param json_data: Dictionary with information to be encoded into JSON.
+    :type json_data: dict
+    :param write_file: Opened text file in which the JSON is going to be written.
+    :type write_file: TextIO
+    :param indent: Number of spaces used to indent the JSON output. If None (default), the output is compact.
+    :type indent: int
+    :param buffer_size: Maximum number of characters kept in memory before being written.
+    :type buffer_size: int
+    :param expand_value: Function that receives the other values and returns what must be written in their place (or
+    the values themselves). If None (default), the values are written as they are.
+    :type expand_value: Callable
+    """
+
+    write_buffer = []
+    buffered_size = 0
+    container_templates = {}
+
+    def flush_write_buffer() -> None:
+        nonlocal buffered_size
+
+        write_file.write("".join(write_buffer))
+        write_buffer.clear()
+        buffered_size = 0
+
+    def write_container(container: dict | list, level: int) -> None:
+        nonlocal buffered_size
+
+        if type(container) is dict:
+            if not container:
+                write_buffer.append("{}")
+                return
+            template_key = (tuple(container), level)
+            values = container.values()
+        else:
+            if not container:
+                write_buffer.append("[]")
+                return
+            template_key = (None, level)
+            values = container
+
+        container_template = container_templates.get(template_key)
+        if container_template is None:
+            container_template = container_templates[template_key] = get_container_template(*template_key, indent)
+        value_prefixes, closing = container_template
+
+        # Lists have the same prefix for all values but the first
+        if template_key[0] is None:
+            value_prefixes = chain(value_prefixes[:1], repeat(value_prefixes[1]))
+
+        for value_prefix, value in zip(value_prefixes, values):
+            value_type = type(value)
+
+            if value_type is str:
+                piece = value_prefix + encode_basestring_ascii(value)
+            elif value is None:
+                piece = value_prefix + "null"
+            elif value_type is dict or value_type is list:
+                write_buffer.append(value_prefix)
+                buffered_size += len(value_prefix)
+                write_container(value, level + 1)
+                continue
+            else:
+                if expand_value is not None:
+                    expanded_value = expand_value(value)
+                    if expanded_value is not value:
+                        write_buffer.append(value_prefix)
+                        buffered_size += len(value_prefix)
+                        write_container(expanded_value, level + 1)
+                        continue
+                piece = value_prefix + encode_json_scalar(value)
+
+            write_buffer.append(piece)
+            buffered_size += len(piece)
+
+            if buffered_size >= buffer_size:
+                flush_write_buffer()
+
+        write_buffer.append(closing)
+        buffered_size += len(closing)
+
+        if buffered_size >= buffer_size:
+            flush_write_buffer()
+
+    if type(json_data) is dict or type(json_data) is list:
+        write_container(json_data, 0)
+    else:
+        write_buffer.append(encode_json_scalar(json_data))
+    write_file.write("".join(write_buffer))
+
+
+def safe_write_json_file(dictionary_data: dict, json_path: str, indent: int = None,
+                         expand_value: Callable = None, compression: str = None) -> None:
+    """ Safely writes a received dictionary as a JSON file in the specified path (or in the standard output).
+    The file is written incrementally (see stream_json_data) and atomically (see open_json_output).
 
     :param dictionary_data: Dictionary with information to be encoded into JSON.
     :type dictionary_data: dict
-    :param json_path: Path in which the JSON file will be saved.
+    :param json_path: Path in which the JSON file will be saved or JSON_STANDARD_OUTPUT.
     :type json_path: str
+    :param indent: Number of spaces used to indent the JSON output. If None (default), the output is compact.
+    :type indent: int
+    :param expand_value: Function that replaces values while written (see stream_json_data). If None (default), the
+    values are written as they are.
+    :type expand_value: Callable
+    :param compression: Compression of the JSON file ('gzip', 'bz2' or 'xz'). If None (default), it is not compressed.
+    :type compression: str
     """
 
     try:
-        with open(json_path, "w") as write_file:
-            json.dump(dictionary_data, write_file)
+        with open_json_output(json_path, compression) as write_file:
+            stream_json_data(dictionary_data, write_file, indent, expand_value=expand_value)
     except IOError as error:
         file_description = f"output json file"
         report_error_io_write(json_path, file_description, error)
@@ -0,0 +1,163 @@
+""" Iterative parser of JSON files, which reads a file in chunks and yields its content as a stream of events, so that
+documents larger than the working memory can be consumed without being loaded (as json.load does).
+
+Strings are decoded by the json module's (C accelerated) scanner and numbers are converted exactly as json.load converts
+them, so the values of the events are the same found in the dictionary returned by json.load. Invalid documents raise
+json.JSONDecodeError.
+"""
+
+import json
+import re
+from json.decoder import scanstring
+from typing import Iterator, TextIO
+
+# Number of characters read from the file at a time
+JSON_READ_CHUNK_SIZE = 256 * 1024
+
+# Events yielded by the parser, whose values are None, but for JSON_KEY and JSON_VALUE events
+JSON_START_MAP = "start_map"
+JSON_END_MAP = "end_map"
+JSON_START_ARRAY = "start_array"
+JSON_END_ARRAY = "end_array"
+JSON_KEY = "key"
+JSON_VALUE = "value"
+
+# Pattern of the next token (after whitespace), whose groups are: structural character, key without escapes (followed
+# by its colon), string without escapes, opening quote of other strings, number (and its fraction and exponent) and
+# constant (true, false or null). Strings without escapes, the most common ones, are matched without being scanned.
+JSON_TOKEN = re.compile(r'[ \t\n\r]*(?:([{}\[\]:,])|"([^"\\\x00-\x1f]*)"[ \t\n\r]*:|"([^"\\\x00-\x1f]*)"|(")'
+                        r'|(-?(?:0|[1-9][0-9]*)(\.[0-9]+)?([eE][-+]?[0-9]+)?)|(true|false|null))')
+JSON_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+# Minimum number of characters after a token for it to be surely complete (e.g., '1' may be the beginning of '1.5e+3')
+JSON_TOKEN_LOOKAHEAD = 3
+
+JSON_CONSTANTS = {"true": True, "false": False, "null": None}
+
+# States of the parser, which indicate the expected tokens
+EXPECT_VALUE = 0
+EXPECT_VALUE_OR_END = 1
+EXPECT_KEY = 2
+EXPECT_KEY_OR_END = 3
+EXPECT_COLON = 4
+EXPECT_COMMA_OR_END = 5
+EXPECT_NOTHING = 6
+
+
+def iterate_json_events(read_file: TextIO, chunk_size: int = JSON_READ_CHUNK_SIZE) -> Iterator[tuple[str, object]]:
+    """ Yields the events of a JSON document, in the order their tokens are found: JSON_START_MAP, JSON_KEY (whose
+    value is the key), JSON_END_MAP, JSON_START_ARRAY, JSON_END_ARRAY and JSON_VALUE (whose value is a string,
+    number, boolean or None). Only the chunk being parsed is kept in memory.
+
+    :param read_file: Opened text file with the JSON document.
+    :type read_file: TextIO
+    :param chunk_size: Number of characters read from the file at a time.
+    :type chunk_size: int
+    :return: Iterator over (event, value) tuples.
+    :rtype: Iterator[tuple[str, object]]
+    :raises json.JSONDecodeError: If the document is not valid JSON.
+    """
+
+    buffer = read_file.read(chunk_size)
+    end_of_file = not buffer
+    position = 0
+    buffer_limit = len(buffer) - JSON_TOKEN_LOOKAHEAD
+
+    # Containers that are open, as True for maps and False for arrays
+    open_maps = []
+    state = EXPECT_VALUE
+
+    while True:
+        token_match = JSON_TOKEN.match(buffer, position)
+
+        # Tokens that may have been cut by the end of the chunk are matched again after the next chunk is read
+        if not end_of_file and (token_match is None or token_match.end() > buffer_limit):
+            chunk = read_file.read(chunk_size)
+            end_of_file = not chunk
+            buffer = buffer[position:] + chunk
+            buffer_limit = len(buffer) - JSON_TOKEN_LOOKAHEAD
+            position = 0
+            continue
+
+        if token_match is None:
+            if JSON_WHITESPACE.match(buffer, position).end() < len(buffer):
+                raise json.JSONDecodeError("Invalid token", buffer, position)
+            if state != EXPECT_NOTHING:
+                raise json.JSONDecodeError("Unexpected end of document", buffer, len(buffer))
+            return
+
+        character, key, value, quote, number, fraction, exponent, constant = token_match.groups()
+        position = token_match.end()
+
+        if state == EXPECT_NOTHING:
+            raise json.JSONDecodeError("Extra data", buffer, token_match.start())
+
+        if key is not None:
+            if state != EXPECT_KEY and state != EXPECT_KEY_OR_END:
+                raise json.JSONDecodeError("Unexpected key", buffer, token_match.start())
+            yield JSON_KEY, key
+            state = EXPECT_VALUE
+            continue
+
+        if value is not None:
+            if state == EXPECT_KEY or state == EXPECT_KEY_OR_END:
+                yield JSON_KEY, value
+                state = EXPECT_COLON
+                continue
+
+        elif quote is not None:
+            try:
+                value, string_end = scanstring(buffer, position)
+            except json.JSONDecodeError:
+                if end_of_file:
+                    raise
+                chunk = read_file.read(chunk_size)
+                end_of_file = not chunk
+                buffer = buffer[position - 1:] + chunk
+                buffer_limit = len(buffer) - JSON_TOKEN_LOOKAHEAD
+                position = 0
+                continue
+            position = string_end
+
+            if state == EXPECT_KEY or state == EXPECT_KEY_OR_END:
+                yield JSON_KEY, value
+                state = EXPECT_COLON
+                continue
+
+        elif number is not None:
+            value = float(number) if fraction or exponent else int(number)
+        elif constant is not None:
+            value = JSON_CONSTANTS[constant]
+
+        # Structural characters
+        else:
+            if character == "{" and state <= EXPECT_VALUE_OR_END:
+                open_maps.append(True)
+                state = EXPECT_KEY_OR_END
+                yield JSON_START_MAP, None
+            elif character == "[" and state <= EXPECT_VALUE_OR_END:
+                open_maps.append(False)
+                state = EXPECT_VALUE_OR_END
+                yield JSON_START_ARRAY, None
+            elif character == ":" and state == EXPECT_COLON:
+                state = EXPECT_VALUE
+            elif character == "," and state == EXPECT_COMMA_OR_END:
+                state = EXPECT_KEY if open_maps[-1] else EXPECT_VALUE
+            elif character == "}" and (state == EXPECT_KEY_OR_END or state == EXPECT_COMMA_OR_END and open_maps[-1]):
+                open_maps.pop()
+                state = EXPECT_COMMA_OR_END if open_maps else EXPECT_NOTHING
+                yield JSON_END_MAP, None
+            elif character == "]" and (state == EXPECT_VALUE_OR_END or
+                                       state == EXPECT_COMMA_OR_END and not open_maps[-1]):
+                open_maps.pop()
+                state = EXPECT_COMMA_OR_END if open_maps else EXPECT_NOTHING
+                yield JSON_END_ARRAY, None
+            else:
+                raise json.JSONDecodeError(f"Unexpected '{character}'", buffer, token_match.start())
+            continue
+
+        # Strings (that are not keys), numbers and constants
+        if state > EXPECT_VALUE_OR_END:
+            raise json.JSONDecodeError("Unexpected value", buffer, token_match.start())
+        state = EXPECT_COMMA_OR_END if open_maps else EXPECT_NOTHING
+        yield JSON_VALUE, value
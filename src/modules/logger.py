@@ -1,4 +1,8 @@
-""" Logging configurations. """
+""" Logging configurations.
+
+Modules obtain the logger with get_logger when they are imported, which has no side effects. The logger's handlers
+(and the log file) are only created when an execution starts and initialize_logger is called.
+"""
 
 import logging
 import os
@@ -18,6 +22,17 @@ def logger_get_date_time() -> str:
     return date_time
 
 
+def get_logger() -> logging.Logger:
+    """ Return the logger called 'execution-logger' without creating its handlers. Messages are only output after the
+    logger is initialized with initialize_logger.
+
+    :return: Logger called 'execution-logger'.
+    :rtype: logging.Logger
+    """
+
+    return logging.getLogger("execution-logger")
+
+
 def initialize_logger(execution_mode: str = "production") -> logging.Logger:
     """ Create and initialize logger. The created logger is called 'execution-logger'.
     Different triggers are defined for each execution mode:
@@ -57,8 +72,8 @@ def initialize_logger(execution_mode: str = "production") -> logging.Logger:
             print(f"Could not create log directory {log_directory}. Program aborted.")
             raise OSError(error)
 
-        # Creating FILE handler
-        file_handler = logging.FileHandler(f"{log_directory}{logger_get_date_time()}.log")
+        # Creating FILE handler (the file is only created when the first message is logged)
+        file_handler = logging.FileHandler(f"{log_directory}{logger_get_date_time()}.log", delay=True)
         file_handler.setLevel(logging.DEBUG)
 
         # Create formatters and add it to handlers
@@ -0,0 +1,133 @@
+""" Fast tokenizer of the line-based graph formats N-Triples and N-Quads.
+
+Each line is matched at once by a single precompiled regular expression that captures all its terms, instead of being
+consumed term by term as done by rdflib's parsers. Terms are created exactly as rdflib's parsers create them, and each
+distinct IRI is created only once. Lines that are not matched (i.e., comments, empty lines, unusual but valid syntax
+and invalid lines) are handed to rdflib's parser, so the tokenizer yields the same triples (and raises the same errors)
+as rdflib's parsers. The triples of all graphs of a N-Quads file are merged.
+"""
+
+import re
+from typing import Iterable, Iterator
+
+from rdflib import BNode, Literal, URIRef
+from rdflib.exceptions import ParserError
+from rdflib.plugins.parsers.nquads import NQuadsParser
+from rdflib.plugins.parsers.ntriples import W3CNTriplesParser, unquote
+from rdflib.term import Node
+
+# Patterns of the terms, equal to (or stricter than) the ones of rdflib's parsers
+IRI_PATTERN = r'<([^:<>"\s]+:[^<>"\s]*)>'
+BNODE_PATTERN = r"_:([A-Za-z0-9_:](?:[-A-Za-z0-9_:.]*[-A-Za-z0-9_:])?)"
+LITERAL_PATTERN = r'"([^"\\]*(?:\\.[^"\\]*)*)"(?:@([a-zA-Z]+(?:-[a-zA-Z0-9]+)*)|\^\^' + IRI_PATTERN + r")?"
+GRAPH_PATTERN = r'(?:<[^:<>"\s]+:[^<>"\s]*>|_:[A-Za-z0-9_:](?:[-A-Za-z0-9_:.]*[-A-Za-z0-9_:])?)'
+TAIL_PATTERN = r"[ \t]*\.[ \t]*(?:#.*)?$"
+
+# Patterns of a whole statement, whose groups are: subject's IRI or blank node label, predicate's IRI, object's IRI or
+# blank node label and object's lexical form, language and datatype. Graphs of N-Quads statements are not captured.
+NTRIPLES_LINE = re.compile(rf"[ \t]*(?:{IRI_PATTERN}|{BNODE_PATTERN})[ \t]+{IRI_PATTERN}[ \t]+"
+                           rf"(?:{IRI_PATTERN}|{BNODE_PATTERN}|{LITERAL_PATTERN}){TAIL_PATTERN}")
+NQUADS_LINE = re.compile(rf"[ \t]*(?:{IRI_PATTERN}|{BNODE_PATTERN})[ \t]*{IRI_PATTERN}[ \t]*"
+                         rf"(?:{IRI_PATTERN}|{BNODE_PATTERN}|{LITERAL_PATTERN})[ \t]*{GRAPH_PATTERN}?{TAIL_PATTERN}")
+
+
+class TriplesCollector:
+    """ Sink for rdflib's N-Triples and N-Quads parsers that only collects the parsed triples, ignoring their graphs.
+    The collected triples must be consumed and cleared by the reader after each parsed line. """
+
+    def __init__(self):
+        self.triples = []
+        self.default_context = self
+
+    def triple(self, s: Node, p: Node, o: Node) -> None:
+        """ Receives a triple from the N-Triples parser. """
+        self.triples.append((s, p, o))
+
+    def add(self, triple: (Node, Node, Node)) -> None:
+        """ Receives a triple from the N-Quads parser. """
+        self.triples.append(triple)
+
+    def get_context(self, context: Node) -> "TriplesCollector":
+        """ Returns the sink itself for all graphs of the N-Quads parser, as the triples of all graphs are merged. """
+        return self
+
+
+def create_iri(iris: dict[str, URIRef], iri_value: str) -> URIRef:
+    """ Creates the IRI of a matched term, unescaping its value as rdflib's parsers do, and registers it in the
+    tokenizer's IRIs.
+
+    :param iris: IRIs already created by the tokenizer, indexed by their escaped values.
+    :type iris: dict[str, URIRef]
+    :param iri_value: Escaped value of the IRI, as found in the line.
+    :type iri_value: str
+    :return: Created IRI.
+    :rtype: URIRef
+    """
+
+    iri = iris[iri_value] = URIRef(unquote(iri_value) if "\\" in iri_value else iri_value)
+
+    return iri
+
+
+def tokenize_graph_lines(graph_lines: Iterable[str], graph_format: str = "nt") -> Iterator[tuple[Node, Node, Node]]:
+    """ Yields the triples of the received N-Triples or N-Quads lines, in the order they are found.
+
+    :param graph_lines: Lines of the graph, with or without their line breaks (e.g., a file opened in text mode).
+    :type graph_lines: Iterable[str]
+    :param graph_format: rdflib parser format of the lines: 'nt' (default) or 'nquads'.
+    :type graph_format: str
+    :return: Iterator over the triples of the lines.
+    :rtype: Iterator[tuple[Node, Node, Node]]
+    :raises ParserError: If a line is not a valid statement, comment or empty line.
+    """
+
+    iris: dict[str, URIRef] = {}
+    bnodes: dict[str, BNode] = {}
+    collector = TriplesCollector()
+
+    # The fallback parser shares the blank nodes, so that a label always refers to the same blank node
+    if graph_format == "nquads":
+        match_line = NQUADS_LINE.match
+        fallback_parser = NQuadsParser(sink=collector, bnode_context=bnodes)
+    else:
+        match_line = NTRIPLES_LINE.match
+        fallback_parser = W3CNTriplesParser(sink=collector, bnode_context=bnodes)
+
+    for graph_line in graph_lines:
+        line_match = match_line(graph_line)
+
+        if line_match is None:
+            fallback_parser.line = graph_line.rstrip("\r\n")
+            try:
+                fallback_parser.parseline()
+            except ParserError:
+                raise ParserError(f"Invalid line: {graph_line.rstrip()}") from None
+            yield from collector.triples
+            collector.triples.clear()
+            continue
+
+        s_iri, s_bnode, p_iri, o_iri, o_bnode, o_lexical, o_language, o_datatype = line_match.groups()
+
+        if s_iri is not None:
+            subject = iris.get(s_iri) or create_iri(iris, s_iri)
+        else:
+            subject = bnodes.get(s_bnode)
+            if subject is None:
+                subject = bnodes[s_bnode] = BNode()
+
+        predicate = iris.get(p_iri) or create_iri(iris, p_iri)
+
+        if o_iri is not None:
+            obj = iris.get(o_iri) or create_iri(iris, o_iri)
+        elif o_bnode is not None:
+            obj = bnodes.get(o_bnode)
+            if obj is None:
+                obj = bnodes[o_bnode] = BNode()
+        else:
+            if "\\" in o_lexical:
+                o_lexical = unquote(o_lexical)
+            if o_datatype is not None:
+                o_datatype = iris.get(o_datatype) or create_iri(iris, o_datatype)
+            obj = Literal(o_lexical, o_language or None, o_datatype)
+
+        yield subject, predicate, obj
@@ -0,0 +1,394 @@
+""" Long-running local encoder service, which keeps the encoder warm between requests.
+
+The service listens on a localhost TCP port or on a UNIX socket and answers the following HTTP requests:
+    - GET /health: returns the service's status, version, number of workers and number of pending requests.
+    - POST /encode: returns the OntoUML-Schema JSON of a graph. The body is either a JSON object with the path of a
+    graph file ({"graph_path": ...}) or with the graph's content and format ({"graph_data": ..., "graph_format": ...}),
+    or the graph's content itself, whose format is obtained from the 'format' query parameter or the Content-Type.
+
+Graphs are encoded by a pool of worker processes, which import the encoder and rdflib's parsers only once. The number
+of pending requests (i.e., being encoded or waiting for a worker) is bounded: when it is reached, new requests are
+immediately answered with 503 (Service Unavailable), so that clients can retry later instead of piling up.
+"""
+
+import argparse
+import io
+import json
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from socketserver import ThreadingMixIn, UnixStreamServer
+from urllib.parse import parse_qs, urlparse
+
+from modules.encoder.encoder_main import encode_graph_data_to_json, encode_graph_file_to_json
+from modules.io_json import stream_json_data
+from modules.logger import get_logger, initialize_logger
+from rdflib import plugin
+from rdflib.parser import Parser
+from src.modules.globals import get_metadata, GRAPH_STORE_BACKEND_DEFAULT
+
+LOGGER = get_logger()
+
+# Default address of the service
+SERVICE_HOST_DEFAULT = "127.0.0.1"
+SERVICE_PORT_DEFAULT = 8008
+
+# Default maximum size of a request's body, in megabytes
+SERVICE_MAX_BODY_SIZE_DEFAULT = 256
+
+# Seconds informed in the Retry-After header of the requests refused because the service is busy
+SERVICE_RETRY_AFTER = 1
+
+# rdflib parser formats indexed by the media types accepted as the Content-Type of graph payloads
+SERVICE_MEDIA_TYPES_FORMATS = {"text/turtle": "turtle",
+                               "application/n-triples": "nt",
+                               "application/n-quads": "nquads",
+                               "text/n3": "n3",
+                               "application/trig": "trig",
+                               "application/rdf+xml": "xml",
+                               "application/ld+json": "json-ld"}
+
+
+class ServiceRequestError(Exception):
+    """ Error of a request that is answered with the HTTP status it carries. """
+
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def initialize_service_worker() -> None:
+    """ Initializes a worker process of the service's pool, loading rdflib's parsers of all accepted formats so that
+    they are warm when the first request arrives. """
+
+    initialize_logger()
+
+    for graph_format in SERVICE_MEDIA_TYPES_FORMATS.values():
+        plugin.get(graph_format, Parser)
+
+
+def encode_service_request(request_data: dict) -> bytes:
+    """ Encodes the graph of a request into an OntoUML-Schema JSON. Executed by the pool's worker processes.
+
+    :param request_data: Request's data, with the keys 'graph_path', 'store_directory' and 'store_backend' for graph
+    files or with the keys 'graph_data' and 'graph_format' for graph payloads.
+    :type request_data: dict
+    :return: Compact JSON document, encoded in UTF-8.
+    :rtype: bytes
+    """
+
+    if "graph_path" in request_data:
+        json_data = encode_graph_file_to_json(request_data["graph_path"], request_data["store_directory"],
+                                              request_data["store_backend"])
+    else:
+        json_data = encode_graph_data_to_json(request_data["graph_data"], request_data["graph_format"])
+
+    json_buffer = io.StringIO()
+    stream_json_data(json_data, json_buffer)
+
+    return json_buffer.getvalue().encode("utf-8")
+
+
+class EncoderService:
+    """ Pool of worker processes that encode the service's requests, bounding the number of pending requests. """
+
+    def __init__(self, workers: int = None, queue_size: int = None, store_directory: str = None,
+                 store_backend: str = GRAPH_STORE_BACKEND_DEFAULT):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = self.workers + (self.workers if queue_size is None else queue_size)
+        self.store_directory = store_directory
+        self.store_backend = store_backend
+        self.pending_slots = threading.BoundedSemaphore(self.max_pending)
+        self.pending = 0
+        self.lock = threading.Lock()
+        self.executor = self.create_executor()
+
+    def create_executor(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(max_workers=self.workers, initializer=initialize_service_worker)
+
+    def release_slot(self, _future=None) -> None:
+        with self.lock:
+            self.pending -= 1
+        self.pending_slots.release()
+
+    def encode(self, request_data: dict) -> bytes:
+        """ Encodes the request's graph in a worker process, waiting for the result. Raises ServiceRequestError with
+        status 503 if the maximum number of pending requests is reached or if the pool is broken. """
+
+        if not self.pending_slots.acquire(blocking=False):
+            raise ServiceRequestError(HTTPStatus.SERVICE_UNAVAILABLE,
+                                      f"The service is busy ({self.max_pending} pending requests). Retry later.")
+
+        with self.lock:
+            self.pending += 1
+            executor = self.executor
+
+        try:
+            future = executor.submit(encode_service_request, request_data)
+        except BrokenProcessPool:
+            self.release_slot()
+            self.replace_broken_executor(executor)
+            raise ServiceRequestError(HTTPStatus.SERVICE_UNAVAILABLE, "The service's workers are restarting.")
+
+        # The slot is only released when the worker finishes, even if the client is no longer waiting
+        future.add_done_callback(self.release_slot)
+
+        try:
+            return future.result()
+        except BrokenProcessPool:
+            self.replace_broken_executor(executor)
+            raise ServiceRequestError(HTTPStatus.SERVICE_UNAVAILABLE, "The service's worker stopped unexpectedly.")
+
+    def replace_broken_executor(self, broken_executor: ProcessPoolExecutor) -> None:
+        """ Replaces a pool whose worker processes stopped unexpectedly (e.g., killed by the system). """
+
+        with self.lock:
+            if self.executor is broken_executor:
+                LOGGER.error("A worker process of the service stopped unexpectedly. Restarting the workers.")
+                self.executor = self.create_executor()
+
+        broken_executor.shutdown(wait=False)
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+
+class ServiceRequestHandler(BaseHTTPRequestHandler):
+    """ Handler of the service's HTTP requests. The server must have the attributes encoder_service and
+    max_body_size (in bytes). """
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:
+        if urlparse(self.path).path != "/health":
+            self.send_json_error(ServiceRequestError(HTTPStatus.NOT_FOUND, f"Unknown path {self.path}."))
+            return
+
+        encoder_service = self.server.encoder_service
+        health_data = {"status": "ok",
+                       "version": get_metadata()["version"],
+                       "workers": encoder_service.workers,
+                       "pending": encoder_service.pending,
+                       "max_pending": encoder_service.max_pending}
+        self.send_json(HTTPStatus.OK, json.dumps(health_data).encode("utf-8"))
+
+    def do_POST(self) -> None:
+        try:
+            parsed_url = urlparse(self.path)
+            if parsed_url.path != "/encode":
+                raise ServiceRequestError(HTTPStatus.NOT_FOUND, f"Unknown path {parsed_url.path}.")
+
+            request_data = self.read_request_data(parse_qs(parsed_url.query))
+
+            try:
+                json_content = self.server.encoder_service.encode(request_data)
+            except ServiceRequestError:
+                raise
+            except (OSError, SyntaxError, ValueError) as error:
+                raise ServiceRequestError(HTTPStatus.UNPROCESSABLE_ENTITY,
+                                          f"The graph could not be encoded. {type(error).__name__}: {error}")
+            except Exception as error:
+                LOGGER.exception("Unexpected error while encoding a request.")
+                raise ServiceRequestError(HTTPStatus.INTERNAL_SERVER_ERROR, f"{type(error).__name__}: {error}")
+        except ServiceRequestError as error:
+            self.send_json_error(error)
+            return
+
+        self.send_json(HTTPStatus.OK, json_content)
+
+    def read_request_data(self, query_parameters: dict) -> dict:
+        """ Reads the request's body and returns the data to be sent to the worker processes. """
+
+        content_length = self.headers.get("Content-Length")
+        if content_length is None or not content_length.isdigit():
+            raise ServiceRequestError(HTTPStatus.LENGTH_REQUIRED, "The Content-Length header is required.")
+        if int(content_length) > self.server.max_body_size:
+            # The connection is closed, as the body is not read
+            self.close_connection = True
+            raise ServiceRequestError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                                      f"The request's body exceeds {self.server.max_body_size} bytes.")
+
+        body = self.rfile.read(int(content_length))
+        media_type = self.headers.get("Content-Type", "").split(";")[0].strip().lower()
+
+        if "format" in query_parameters:
+            return {"graph_data": body, "graph_format": query_parameters["format"][0]}
+
+        if media_type in SERVICE_MEDIA_TYPES_FORMATS:
+            return {"graph_data": body, "graph_format": SERVICE_MEDIA_TYPES_FORMATS[media_type]}
+
+        if media_type not in ("application/json", ""):
+            raise ServiceRequestError(HTTPStatus.UNSUPPORTED_MEDIA_TYPE, f"Unsupported media type {media_type}.")
+
+        try:
+            body_data = json.loads(body)
+        except ValueError as error:
+            raise ServiceRequestError(HTTPStatus.BAD_REQUEST, f"Invalid JSON body. {error}")
+
+        if isinstance(body_data, dict) and isinstance(body_data.get("graph_path"), str):
+            return {"graph_path": body_data["graph_path"],
+                    "store_directory": self.server.encoder_service.store_directory,
+                    "store_backend": self.server.encoder_service.store_backend}
+
+        if isinstance(body_data, dict) and isinstance(body_data.get("graph_data"), str):
+            return {"graph_data": body_data["graph_data"], "graph_format": body_data.get("graph_format", "turtle")}
+
+        raise ServiceRequestError(HTTPStatus.BAD_REQUEST, "The JSON body must contain graph_path or graph_data.")
+
+    def send_json(self, status: HTTPStatus, json_content: bytes, headers: dict = None) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(json_content)))
+        for header_name, header_value in (headers or {}).items():
+            self.send_header(header_name, header_value)
+        self.end_headers()
+        self.wfile.write(json_content)
+
+    def send_json_error(self, error: ServiceRequestError) -> None:
+        headers = {"Retry-After": str(SERVICE_RETRY_AFTER)} if error.status == HTTPStatus.SERVICE_UNAVAILABLE else {}
+        self.send_json(error.status, json.dumps({"error": str(error)}).encode("utf-8"), headers)
+
+    def log_message(self, message_format: str, *args) -> None:
+        # Client addresses are not logged, as they are empty for UNIX sockets
+        LOGGER.debug(f"Service request: {message_format % args}")
+
+
+class ServiceHTTPServer(ThreadingHTTPServer):
+    """ Multithreaded HTTP server listening on a TCP address. """
+
+    daemon_threads = True
+
+
+class ServiceUnixHTTPServer(ThreadingMixIn, UnixStreamServer):
+    """ Multithreaded HTTP server listening on a UNIX socket. """
+
+    daemon_threads = True
+
+
+def create_service_server(encoder_service: EncoderService, host: str = SERVICE_HOST_DEFAULT,
+                          port: int = SERVICE_PORT_DEFAULT, unix_socket: str = None,
+                          max_body_size: int = SERVICE_MAX_BODY_SIZE_DEFAULT):
+    """ Creates the service's HTTP server, bound to a TCP address or to a UNIX socket.
+
+    :param encoder_service: Pool of worker processes that encode the requests.
+    :type encoder_service: EncoderService
+    :param host: Host of the TCP address. Ignored if a UNIX socket is provided.
+    :type host: str
+    :param port: Port of the TCP address. If 0, a free port is chosen. Ignored if a UNIX socket is provided.
+    :type port: int
+    :param unix_socket: Path of the UNIX socket. If None (default), the server listens on the TCP address.
+    :type unix_socket: str
+    :param max_body_size: Maximum size of a request's body, in megabytes.
+    :type max_body_size: int
+    :return: Created HTTP server.
+    :rtype: ServiceHTTPServer | ServiceUnixHTTPServer
+    """
+
+    if unix_socket is not None:
+        if os.path.exists(unix_socket):
+            os.remove(unix_socket)
+        service_server = ServiceUnixHTTPServer(unix_socket, ServiceRequestHandler)
+    else:
+        service_server = ServiceHTTPServer((host, port), ServiceRequestHandler)
+
+    service_server.encoder_service = encoder_service
+    service_server.max_body_size = max_body_size * 1024 * 1024
+
+    return service_server
+
+
+def run_service(host: str = SERVICE_HOST_DEFAULT, port: int = SERVICE_PORT_DEFAULT, unix_socket: str = None,
+                workers: int = None, queue_size: int = None, max_body_size: int = SERVICE_MAX_BODY_SIZE_DEFAULT,
+                store_directory: str = None, store_backend: str = GRAPH_STORE_BACKEND_DEFAULT) -> None:
+    """ Runs the encoder service until it is interrupted (e.g., by KeyboardInterrupt).
+
+    :param host: Host of the TCP address. Ignored if a UNIX socket is provided.
+    :type host: str
+    :param port: Port of the TCP address. Ignored if a UNIX socket is provided.
+    :type port: int
+    :param unix_socket: Path of the UNIX socket. If None (default), the service listens on the TCP address.
+    :type unix_socket: str
+    :param workers: Number of worker processes. If None, the number of processors of the machine is used.
+    :type workers: int
+    :param queue_size: Maximum number of requests waiting for a worker. If None, it is equal to the number of workers.
+    :type queue_size: int
+    :param max_body_size: Maximum size of a request's body, in megabytes.
+    :type max_body_size: int
+    :param store_directory: Directory of the persistent graph stores used for graph files. If None (default), no
+    persistent store is used.
+    :type store_directory: str
+    :param store_backend: Name of the rdflib store plugin used for the persistent graph stores.
+    :type store_backend: str
+    """
+
+    encoder_service = EncoderService(workers, queue_size, store_directory, store_backend)
+    service_server = create_service_server(encoder_service, host, port, unix_socket, max_body_size)
+
+    address = unix_socket if unix_socket is not None else "http://{}:{}".format(*service_server.server_address[:2])
+    LOGGER.info(f"OntoUML Graph2JSON service listening on {address} with {encoder_service.workers} workers "
+                f"and up to {encoder_service.max_pending} pending requests.")
+
+    try:
+        service_server.serve_forever()
+    except KeyboardInterrupt:
+        LOGGER.info("OntoUML Graph2JSON service interrupted.")
+    finally:
+        service_server.server_close()
+        encoder_service.shutdown()
+        if unix_socket is not None and os.path.exists(unix_socket):
+            os.remove(unix_socket)
+
+    LOGGER.info("OntoUML Graph2JSON service stopped.")
+
+
+def treat_service_arguments() -> dict:
+    """ Treat arguments provided by the user when starting the encoder service.
+
+    :return: Dictionary containing all arguments provided by the user.
+    :rtype: dict
+    """
+
+    metadata = get_metadata()
+    args_parser = argparse.ArgumentParser(prog=metadata["name"] + "-service",
+                                          description="Local service of the " + metadata["description"] +
+                                                      ". Version: " + metadata["version"],
+                                          allow_abbrev=False)
+
+    args_parser.add_argument("--host", type=str, default=SERVICE_HOST_DEFAULT,
+                             help=f"Host on which the service listens. Default is {SERVICE_HOST_DEFAULT}.")
+    args_parser.add_argument("-p", "--port", type=int, default=SERVICE_PORT_DEFAULT,
+                             help=f"Port on which the service listens. Default is {SERVICE_PORT_DEFAULT}.")
+    args_parser.add_argument("-u", "--unix-socket", type=str, default=None,
+                             help="Path of a UNIX socket on which the service listens instead of the TCP port.")
+    args_parser.add_argument("-w", "--workers", type=int, default=None,
+                             help="Number of worker processes. Default is the number of processors of the machine.")
+    args_parser.add_argument("-q", "--queue-size", type=int, default=None,
+                             help="Maximum number of requests waiting for a worker. Further requests are refused "
+                                  "with 503 (Service Unavailable). Default is the number of workers.")
+    args_parser.add_argument("-m", "--max-body-size", type=int, default=SERVICE_MAX_BODY_SIZE_DEFAULT,
+                             help="Maximum size of a request's body in megabytes. "
+                                  f"Default is {SERVICE_MAX_BODY_SIZE_DEFAULT}.")
+    args_parser.add_argument("--store", type=str, default=None, metavar="STORE_DIRECTORY",
+                             help="Directory of the persistent graph stores used for graph files. Default is keeping "
+                                  "the graphs in memory.")
+    args_parser.add_argument("--store-backend", type=str, default=GRAPH_STORE_BACKEND_DEFAULT,
+                             help="Name of the rdflib store plugin used for the persistent graph stores. "
+                                  f"Default is {GRAPH_STORE_BACKEND_DEFAULT}.")
+
+    arguments = args_parser.parse_args()
+
+    arguments_dictionary = {"host": arguments.host,
+                            "port": arguments.port,
+                            "unix_socket": arguments.unix_socket,
+                            "workers": arguments.workers,
+                            "queue_size": arguments.queue_size,
+                            "max_body_size": arguments.max_body_size,
+                            "store_directory": arguments.store,
+                            "store_backend": arguments.store_backend}
+
+    LOGGER.debug(f"Service arguments parsed. Obtained values are: {arguments_dictionary}.")
+
+    return arguments_dictionary
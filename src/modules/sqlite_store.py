@@ -0,0 +1,255 @@
+""" Persistent rdflib store kept in a local SQLite database file, used for encoding graphs that are larger than the
+working memory or that are encoded repeatedly without being parsed again.
+
+Terms are stored once in a terms table and triples reference them by their integer IDs. All triples are returned in
+insertion order and the triples matching a pattern are returned in the same order they would have in rdflib's
+in-memory store (i.e., in insertion order, grouped as in the store's indexes), so the JSON encoded from this store is
+identical to the JSON encoded from a Graph parsed into the working memory. Results are read from the database while
+they are consumed.
+
+The store is registered as the rdflib store plugin 'SQLite' in io_graph.
+"""
+
+import os
+import sqlite3
+from typing import Iterator, Optional
+
+from rdflib import BNode, Literal, URIRef
+from rdflib.graph import Graph
+from rdflib.store import Store, VALID_STORE, NO_STORE
+from rdflib.term import Node
+
+# Maximum number of terms kept in each of the terms caches
+TERMS_CACHE_SIZE = 100000
+
+SCHEMA_SCRIPT = """
+    CREATE TABLE IF NOT EXISTS terms (id INTEGER PRIMARY KEY, kind TEXT NOT NULL, value TEXT NOT NULL,
+                                      datatype TEXT NOT NULL, language TEXT NOT NULL,
+                                      UNIQUE (kind, value, datatype, language));
+    CREATE TABLE IF NOT EXISTS triples (s INTEGER NOT NULL, p INTEGER NOT NULL, o INTEGER NOT NULL, UNIQUE (s, p, o));
+    CREATE INDEX IF NOT EXISTS triples_pos ON triples (p, o, s);
+    CREATE INDEX IF NOT EXISTS triples_osp ON triples (o, s, p);
+    CREATE TABLE IF NOT EXISTS namespaces (prefix TEXT PRIMARY KEY, namespace TEXT NOT NULL UNIQUE);
+"""
+
+# Column by which the triples are grouped for each combination of bound positions (subject, predicate, object),
+# reproducing the order of the in-memory store's indexes: the results are grouped by the first unbound position of the
+# used index, in order of first insertion, and are in insertion order inside each group.
+TRIPLES_GROUP_COLUMN = {(True, False, False): "t.p", (False, True, False): "t.o", (False, False, True): "t.s"}
+
+# Number of rows read at a time from the database while the results of a query are consumed
+FETCH_ROWS_SIZE = 1000
+
+
+class SQLiteStore(Store):
+    """ rdflib store plugin that persists triples (without contexts) in a SQLite database file. The configuration
+    received by open is the path of the database file. """
+
+    context_aware = False
+    formula_aware = False
+    transaction_aware = True
+    graph_aware = False
+
+    def __init__(self, configuration: Optional[str] = None, identifier: Optional[Node] = None):
+        self.connection = None
+        self.terms_ids = {}
+        self.ids_terms = {}
+        super().__init__(configuration, identifier)
+
+    def open(self, configuration: str, create: bool = False) -> int:
+        """ Opens the database file, creating it if it does not exist and create is True. """
+
+        if not create and not os.path.exists(configuration):
+            return NO_STORE
+
+        self.connection = sqlite3.connect(configuration)
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        self.connection.execute("PRAGMA synchronous = NORMAL")
+        self.connection.executescript(SCHEMA_SCRIPT)
+
+        return VALID_STORE
+
+    def close(self, commit_pending_transaction: bool = False) -> None:
+        """ Closes the database file, committing the pending changes if requested. """
+
+        if self.connection is None:
+            return
+
+        if commit_pending_transaction:
+            self.connection.commit()
+
+        self.connection.close()
+        self.connection = None
+        self.terms_ids.clear()
+        self.ids_terms.clear()
+
+    def destroy(self, configuration: str) -> None:
+        """ Removes the database file. """
+
+        self.close()
+        for file_path in (configuration, configuration + "-wal", configuration + "-shm"):
+            if os.path.exists(file_path):
+                os.remove(file_path)
+
+    def commit(self) -> None:
+        self.connection.commit()
+
+    def rollback(self) -> None:
+        self.connection.rollback()
+        self.terms_ids.clear()
+        self.ids_terms.clear()
+
+    def get_term_id(self, term: Node, create: bool = False) -> Optional[int]:
+        """ Returns the ID of a term, adding it to the terms table if it does not exist and create is True. Returns
+        None if the term does not exist and create is False. """
+
+        term_id = self.terms_ids.get(term)
+        if term_id is not None:
+            return term_id
+
+        if isinstance(term, Literal):
+            term_row = ("L", str(term), str(term.datatype or ""), term.language or "")
+        elif isinstance(term, BNode):
+            term_row = ("B", str(term), "", "")
+        elif isinstance(term, URIRef):
+            term_row = ("U", str(term), "", "")
+        else:
+            raise TypeError(f"Terms of type {type(term).__name__} are not supported by the SQLite store.")
+
+        found_row = self.connection.execute("SELECT id FROM terms WHERE kind = ? AND value = ? AND datatype = ? AND "
+                                            "language = ?", term_row).fetchone()
+        if found_row is not None:
+            term_id = found_row[0]
+        elif create:
+            term_id = self.connection.execute("INSERT INTO terms (kind, value, datatype, language) VALUES "
+                                              "(?, ?, ?, ?)", term_row).lastrowid
+        else:
+            return None
+
+        if len(self.terms_ids) >= TERMS_CACHE_SIZE:
+            self.terms_ids.clear()
+        self.terms_ids[term] = term_id
+
+        return term_id
+
+    def get_term(self, term_id: int) -> Node:
+        """ Returns the term with the received ID. """
+
+        term = self.ids_terms.get(term_id)
+        if term is not None:
+            return term
+
+        kind, value, datatype, language = self.connection.execute("SELECT kind, value, datatype, language FROM terms "
+                                                                  "WHERE id = ?", (term_id,)).fetchone()
+        if kind == "U":
+            term = URIRef(value)
+        elif kind == "B":
+            term = BNode(value)
+        else:
+            term = Literal(value, lang=language or None, datatype=URIRef(datatype) if datatype else None)
+
+        if len(self.ids_terms) >= TERMS_CACHE_SIZE:
+            self.ids_terms.clear()
+        self.ids_terms[term_id] = term
+
+        return term
+
+    def get_pattern_condition(self, triple_pattern: tuple) -> Optional[tuple[str, list[int]]]:
+        """ Returns the SQL condition and parameters that select the triples matching the pattern, or None if a term
+        of the pattern does not exist in the store (and, hence, no triple matches it). """
+
+        list_conditions = []
+        list_parameters = []
+
+        for column, term in zip(("t.s", "t.p", "t.o"), triple_pattern):
+            if term is None:
+                continue
+            term_id = self.get_term_id(term)
+            if term_id is None:
+                return None
+            list_conditions.append(f"{column} = ?")
+            list_parameters.append(term_id)
+
+        return " AND ".join(list_conditions) or "1", list_parameters
+
+    def add(self, triple: tuple[Node, Node, Node], context: Optional[Graph], quoted: bool = False) -> None:
+        Store.add(self, triple, context, quoted)
+
+        s, p, o = triple
+        self.connection.execute("INSERT OR IGNORE INTO triples (s, p, o) VALUES (?, ?, ?)",
+                                (self.get_term_id(s, True), self.get_term_id(p, True), self.get_term_id(o, True)))
+
+    def remove(self, triple_pattern: tuple, context: Optional[Graph] = None) -> None:
+        Store.remove(self, triple_pattern, context)
+
+        pattern_condition = self.get_pattern_condition(triple_pattern)
+        if pattern_condition is not None:
+            self.connection.execute(f"DELETE FROM triples AS t WHERE {pattern_condition[0]}", pattern_condition[1])
+
+    def iterate_rows(self, sql_query: str, list_parameters: list) -> Iterator[tuple]:
+        """ Yields the rows returned by the query, reading them from the database in batches of FETCH_ROWS_SIZE
+        rows, so that the results are never all kept in memory. """
+
+        cursor = self.connection.execute(sql_query, list_parameters)
+        try:
+            rows = cursor.fetchmany(FETCH_ROWS_SIZE)
+            while rows:
+                yield from rows
+                rows = cursor.fetchmany(FETCH_ROWS_SIZE)
+        finally:
+            cursor.close()
+
+    def iterate_grouped_rows(self, condition: str, list_parameters: list, group_column: str) -> Iterator[tuple]:
+        """ Yields the rows of the triples matching the condition grouped by the group column, with the groups in order
+        of first insertion and the rows of each group in insertion order. Each group is read by its own query, which
+        is answered by the index that starts with the condition's and the group's columns. """
+
+        for (group_value,) in self.iterate_rows(f"SELECT {group_column} FROM triples AS t WHERE {condition} "
+                                                f"GROUP BY {group_column} ORDER BY MIN(t.rowid)", list_parameters):
+            yield from self.iterate_rows(f"SELECT t.s, t.p, t.o FROM triples AS t WHERE {condition} AND "
+                                         f"{group_column} = ? ORDER BY t.rowid", list_parameters + [group_value])
+
+    def triples(self, triple_pattern: tuple, context: Optional[Graph] = None) -> Iterator[tuple]:
+        pattern_condition = self.get_pattern_condition(triple_pattern)
+        if pattern_condition is None:
+            return
+
+        condition, list_parameters = pattern_condition
+        group_column = TRIPLES_GROUP_COLUMN.get(tuple(term is not None for term in triple_pattern))
+
+        # The rows are read while the results are consumed, so the store must not be modified before that
+        if group_column is None:
+            rows = self.iterate_rows(f"SELECT t.s, t.p, t.o FROM triples AS t WHERE {condition} ORDER BY t.rowid",
+                                     list_parameters)
+        else:
+            rows = self.iterate_grouped_rows(condition, list_parameters, group_column)
+
+        for s, p, o in rows:
+            yield (self.get_term(s), self.get_term(p), self.get_term(o)), iter(())
+
+    def __len__(self, context: Optional[Graph] = None) -> int:
+        return self.connection.execute("SELECT COUNT(*) FROM triples").fetchone()[0]
+
+    def contexts(self, triple: Optional[tuple] = None) -> Iterator[Graph]:
+        return iter(())
+
+    def bind(self, prefix: str, namespace: URIRef, override: bool = True) -> None:
+        if not override and self.connection.execute("SELECT 1 FROM namespaces WHERE prefix = ? OR namespace = ?",
+                                                    (prefix, str(namespace))).fetchone() is not None:
+            return
+
+        self.connection.execute("DELETE FROM namespaces WHERE prefix = ? OR namespace = ?", (prefix, str(namespace)))
+        self.connection.execute("INSERT INTO namespaces (prefix, namespace) VALUES (?, ?)", (prefix, str(namespace)))
+
+    def namespace(self, prefix: str) -> Optional[URIRef]:
+        found_row = self.connection.execute("SELECT namespace FROM namespaces WHERE prefix = ?", (prefix,)).fetchone()
+        return URIRef(found_row[0]) if found_row is not None else None
+
+    def prefix(self, namespace: URIRef) -> Optional[str]:
+        found_row = self.connection.execute("SELECT prefix FROM namespaces WHERE namespace = ?",
+                                            (str(namespace),)).fetchone()
+        return found_row[0] if found_row is not None else None
+
+    def namespaces(self) -> Iterator[tuple[str, URIRef]]:
+        for prefix, namespace in self.connection.execute("SELECT prefix, namespace FROM namespaces").fetchall():
+            yield prefix, URIRef(namespace)
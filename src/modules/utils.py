@@ -1,12 +1,11 @@
 """ Diverse util and auxiliary functions. """
 import os
 from datetime import datetime
-from pprint import pprint
 
 from modules.errors import report_error_io_write
-from modules.logger import initialize_logger
+from modules.logger import get_logger
 
-LOGGER = initialize_logger()
+LOGGER = get_logger()
 
 
 def get_date_time(date_time_format: str) -> str:
@@ -34,8 +33,8 @@ def create_directory_if_not_exists(directory_path: str, file_description: str) -
     """
 
     try:
-        if not os.path.exists(directory_path):
-            os.makedirs(directory_path)
+        # Other processes (e.g., batch workers) may create the same directory at the same time
+        os.makedirs(directory_path, exist_ok=True)
     except OSError as error:
         if file_description is None:
             file_description = "directory"
@@ -51,6 +50,9 @@ def safe_write_dict_to_txt_file(text_data: dict, txt_path: str) -> None:
     :type txt_path: str
     """
 
+    # Imported only when needed, as it is only used by the tests and is slow to import
+    from pprint import pprint
+
     try:
         with open(txt_path, 'w') as file:
             pprint(text_data, file)
@@ -0,0 +1,17 @@
+""" Main file for running the encoder as a long-running local service. """
+
+import signal
+
+from modules.logger import initialize_logger
+from modules.service import run_service, treat_service_arguments
+
+if __name__ == '__main__':
+    logger = initialize_logger()
+    service_arguments = treat_service_arguments()
+
+    # Stopping the service (e.g., by a process manager) is treated as an interruption
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+
+    run_service(service_arguments["host"], service_arguments["port"], service_arguments["unix_socket"],
+                service_arguments["workers"], service_arguments["queue_size"], service_arguments["max_body_size"],
+                service_arguments["store_directory"], service_arguments["store_backend"])
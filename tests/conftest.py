@@ -0,0 +1,24 @@
+""" Fixtures shared by all test modules. """
+from pathlib import Path
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def isolated_working_directory(tmp_path_factory: pytest.TempPathFactory, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """ Runs each test in its own empty working directory, in which the encoder creates its 'results' and 'logs'
+    directories, so that tests running in parallel processes (e.g., with pytest-xdist's '-n' option) do not write into
+    the same files.
+
+    :param tmp_path_factory: Factory of temporary directories, provided by pytest.
+    :type tmp_path_factory: pytest.TempPathFactory
+    :param monkeypatch: Fixture that restores the working directory after the test, provided by pytest.
+    :type monkeypatch: pytest.MonkeyPatch
+    :return: Working directory of the test.
+    :rtype: Path
+    """
+
+    working_directory = tmp_path_factory.mktemp("working_directory")
+    monkeypatch.chdir(working_directory)
+
+    return working_directory
@@ -0,0 +1,61 @@
+""" Tests of the asynchronous API. """
+import asyncio
+import gzip
+import json
+import lzma
+from pathlib import Path
+
+from src.main import encode_ontouml_graph2json_async
+from src.modules.async_api import AsyncEncoder
+from src.modules.io_json import safe_load_json_file
+from tests.test_aux import get_test_list
+
+LIST_OF_TESTS = get_test_list()
+
+
+def test_async_encoding() -> None:
+    """ Tests that concurrent encodings with the asynchronous API return the same JSON as the synchronous API. """
+
+    list_input_files = LIST_OF_TESTS[:4]
+
+    async def encode_concurrently() -> list[dict]:
+        async with AsyncEncoder(max_concurrency=2) as async_encoder:
+            return await asyncio.gather(*[encode_ontouml_graph2json_async(async_encoder, input_file, "test")
+                                          for input_file in list_input_files])
+
+    list_resulting_json_data = asyncio.run(encode_concurrently())
+
+    for input_file, resulting_json_data in zip(list_input_files, list_resulting_json_data):
+        assert resulting_json_data == safe_load_json_file(input_file.replace(".ttl", ".json"))
+
+
+def test_async_encoding_options(tmp_path: Path) -> None:
+    """ Tests that the asynchronous API forwards the output, compression, memory budget, parallel workers and return
+    options to the encoding.
+
+    :param tmp_path: Temporary directory, provided by pytest.
+    :type tmp_path: Path
+    """
+
+    input_file = LIST_OF_TESTS[7]
+    expected_json_data = safe_load_json_file(input_file.replace(".ttl", ".json"))
+    compressed_path = str(tmp_path / "compressed.json.gz")
+    budget_path = str(tmp_path / "budget.json")
+
+    async def encode_with_options() -> list[dict | None]:
+        async with AsyncEncoder(max_concurrency=2) as async_encoder:
+            return await asyncio.gather(
+                encode_ontouml_graph2json_async(async_encoder, input_file, "test", output_path=compressed_path),
+                encode_ontouml_graph2json_async(async_encoder, input_file, "test", memory_budget=0,
+                                                output_path=budget_path, compression="xz"),
+                encode_ontouml_graph2json_async(async_encoder, input_file, "test", parallel_workers=2),
+                encode_ontouml_graph2json_async(async_encoder, input_file, "test", return_json_data=False))
+
+    compressed_json_data, budget_json_data, parallel_json_data, not_returned_json_data = \
+        asyncio.run(encode_with_options())
+
+    assert compressed_json_data == parallel_json_data == expected_json_data
+    assert budget_json_data is None and not_returned_json_data is None
+    assert json.loads(gzip.decompress(Path(compressed_path).read_bytes())) == expected_json_data
+    assert json.loads(lzma.decompress(Path(budget_path).read_bytes())) == expected_json_data
+    assert safe_load_json_file(f"results/{Path(input_file).stem}.json") == expected_json_data
@@ -1,31 +1,263 @@
-""" Auxiliary test functions. """
-import glob
+""" Auxiliary test functions.
 
-from deepdiff import DeepDiff
+Resulting and expected JSON data are compared through their canonical digests: a Merkle-style digest of each subtree,
+computed after sorting the lists of identified objects (e.g., the 'contents' of a package) by their IDs and the other
+lists by their elements' canonical keys. Equal data always has equal root digests, so the comparison does not depend on
+the order in which lists are written, and, when the data differs, the differences are searched only in the subtrees
+whose digests differ.
+"""
+import functools
+import hashlib
+import json
+import os
+from pathlib import Path
 
+import pytest
+from rdflib import Graph, Literal
+
+from src.modules.logger import get_logger
 from src.modules.utils import safe_write_dict_to_txt_file
 
+LOGGER = get_logger()
+
+# Folder with the graph files to be tested and their expected JSON files
+TEST_FILES_FOLDER = Path(__file__).parent / "test_files"
+
+# Folder, relative to each test's working directory, in which the differences found by the comparisons are saved
+DIFFERENCES_FOLDER = "results"
+
 
 def get_test_list() -> list[str]:
-    """ Returns a list with all TTL graph files in the test_files folder.
+    """ Returns a list with all TTL graph files in the test_files folder. Paths are absolute, so that the tests do not
+    depend on their working directory.
 
     :return: List with complete path of all TTL files in the test_files folder.
     :rtype: list[str]
     """
 
-    test_files_folder = "test_files/"
-    list_test_files = glob.glob(test_files_folder + '*.ttl')
+    list_test_files = [str(test_file) for test_file in TEST_FILES_FOLDER.glob("*.ttl")]
     list_test_files.sort()
 
     return list_test_files
 
 
+@functools.cache
+def has_non_string_literals(test_file: str) -> bool:
+    """ Indicates if a graph file has literals whose values are not strings (e.g., booleans and integers), which the
+    encoder cannot encode yet: encoder_create.get_dictionary_value handles every literal value as a string.
+
+    :param test_file: Path of the graph file.
+    :type test_file: str
+    :return: True if the graph has a literal whose Python value is not a string.
+    :rtype: bool
+    """
+
+    test_graph = Graph().parse(test_file)
+
+    return any(isinstance(graph_object, Literal) and not isinstance(graph_object.toPython(), str)
+               for graph_object in test_graph.objects())
+
+
+def get_encodable_test_params(list_test_files: list[str]) -> list:
+    """ Returns the pytest parameters of the received graph files, identified by their names. Files with literals that
+    are not strings (see has_non_string_literals) are marked as strict expected failures, so that tests comparing two
+    ways of encoding them only fail for reasons related to what they test, and start failing when the encoder
+    supports those files.
+
+    :param list_test_files: Paths of the graph files.
+    :type list_test_files: list[str]
+    :return: List of pytest parameters, one for each graph file.
+    :rtype: list
+    """
+
+    unsupported_mark = pytest.mark.xfail(raises=AttributeError, strict=True,
+                                         reason="Literals that are not strings cannot be encoded.")
+
+    return [pytest.param(test_file, id=Path(test_file).stem,
+                         marks=unsupported_mark if has_non_string_literals(test_file) else ())
+            for test_file in list_test_files]
+
+
+def is_identified_list(json_list: list) -> bool:
+    """ Indicates if a list only contains dictionaries with IDs, which are sorted and paired by their IDs in the
+    comparisons.
+
+    :param json_list: List in the JSON data.
+    :type json_list: list
+    :return: True if all elements of the (non-empty) list are dictionaries with an 'id' key.
+    :rtype: bool
+    """
+
+    return bool(json_list) and all(isinstance(element, dict) and "id" in element for element in json_list)
+
+
+def get_canonical_digest(json_data: dict | list, digests_cache: dict[int, str]) -> str:
+    """ Returns the canonical digest of a dictionary or list of the JSON data: the digest of its canonical JSON, in
+    which dictionaries have sorted keys, lists of identified objects are sorted by the objects' IDs, other lists are
+    sorted by their elements' canonical keys (see get_canonical_key), as add_json_differences compares them as
+    multisets, and nested dictionaries and lists are replaced by their own digests (so that each value is serialized
+    only once).
+
+    The digest of each dictionary and list is saved in the cache, by the identity of the object, so that it is computed
+    only once. The cache is only valid while the digested data is not modified or released.
+
+    :param json_data: Dictionary or list in the JSON data.
+    :type json_data: dict | list
+    :param digests_cache: Digests of the already digested dictionaries and lists.
+    :type digests_cache: dict[int, str]
+    :return: Canonical digest of the data.
+    :rtype: str
+    """
+
+    cached_digest = digests_cache.get(id(json_data))
+    if cached_digest is not None:
+        return cached_digest
+
+    if isinstance(json_data, dict):
+        canonical_data = {key: get_canonical_value(value, digests_cache) for key, value in json_data.items()}
+    else:
+        canonical_data = [get_canonical_value(element, digests_cache) for element in json_data]
+        if is_identified_list(json_data):
+            canonical_data = [element_digest for _, element_digest in
+                              sorted(zip((str(element["id"]) for element in json_data), canonical_data))]
+        else:
+            # Sorted by the elements' canonical keys, as scalars of different types cannot be compared
+            canonical_data.sort(key=lambda element_value: json.dumps(element_value, ensure_ascii=False))
+
+    canonical_json = json.dumps(canonical_data, sort_keys=True, ensure_ascii=False)
+    digests_cache[id(json_data)] = hashlib.blake2b(canonical_json.encode(), digest_size=16).hexdigest()
+
+    return digests_cache[id(json_data)]
+
+
+def get_canonical_value(json_value, digests_cache: dict[int, str]):
+    """ Returns the value that represents the JSON value in the canonical JSON of its container: scalars represent
+    themselves and dictionaries and lists are represented by a list with their digest (see get_canonical_digest).
+
+    :param json_value: Value in the JSON data.
+    :param digests_cache: Digests of the already digested dictionaries and lists.
+    :type digests_cache: dict[int, str]
+    :return: Canonical representation of the value.
+    """
+
+    if isinstance(json_value, (dict, list)):
+        return [get_canonical_digest(json_value, digests_cache)]
+
+    return json_value
+
+
+def get_canonical_key(json_value, digests_cache: dict[int, str]) -> str:
+    """ Returns a string that is equal for two values if and only if their canonical JSON are equal.
+
+    :param json_value: Value in the JSON data.
+    :param digests_cache: Digests of the already digested dictionaries and lists.
+    :type digests_cache: dict[int, str]
+    :return: Canonical JSON of scalars and digest of dictionaries and lists.
+    :rtype: str
+    """
+
+    return json.dumps(get_canonical_value(json_value, digests_cache), ensure_ascii=False)
+
+
+def add_json_differences(resulting_data, expected_data, data_path: str, json_differences: dict,
+                         resulting_digests: dict[int, str], expected_digests: dict[int, str]) -> None:
+    """ Adds to json_differences the differences between the resulting and the expected data (or parts of them),
+    descending only into the subtrees whose canonical digests differ.
+
+    Dictionaries are compared key by key and lists of identified objects are compared object by object, paired by
+    their IDs. Other lists are compared as multisets: elements found in both lists are not differences.
+
+    :param resulting_data: Generated resulting data (or part of it).
+    :param expected_data: Expected data (or part of it).
+    :param data_path: Path of the compared data, in the format "root['key'][index]".
+    :type data_path: str
+    :param json_differences: Dictionary with the differences found, with the keys 'values_changed', 'items_added' and
+                             'items_removed' (from the resulting to the expected data).
+    :type json_differences: dict
+    :param resulting_digests: Digests of the resulting data's dictionaries and lists.
+    :type resulting_digests: dict[int, str]
+    :param expected_digests: Digests of the expected data's dictionaries and lists.
+    :type expected_digests: dict[int, str]
+    """
+
+    if get_canonical_key(resulting_data, resulting_digests) == get_canonical_key(expected_data, expected_digests):
+        return
+
+    if isinstance(resulting_data, dict) and isinstance(expected_data, dict):
+        for key in resulting_data.keys() - expected_data.keys():
+            json_differences["items_removed"][f"{data_path}[{key!r}]"] = resulting_data[key]
+        for key in expected_data.keys() - resulting_data.keys():
+            json_differences["items_added"][f"{data_path}[{key!r}]"] = expected_data[key]
+        for key in resulting_data.keys() & expected_data.keys():
+            add_json_differences(resulting_data[key], expected_data[key], f"{data_path}[{key!r}]", json_differences,
+                                 resulting_digests, expected_digests)
+
+    elif isinstance(resulting_data, list) and isinstance(expected_data, list):
+        # Elements found in both lists are discarded, so that only the differing ones are compared
+        expected_elements = {}
+        for index, element in enumerate(expected_data):
+            expected_elements.setdefault(get_canonical_key(element, expected_digests), []).append(index)
+
+        resulting_indexes = []
+        for index, element in enumerate(resulting_data):
+            equal_indexes = expected_elements.get(get_canonical_key(element, resulting_digests))
+            if equal_indexes:
+                equal_indexes.pop()
+            else:
+                resulting_indexes.append(index)
+
+        expected_indexes = sorted(index for equal_indexes in expected_elements.values() for index in equal_indexes)
+
+        # Differing identified objects with the same ID are compared with each other
+        if is_identified_list(resulting_data) and is_identified_list(expected_data):
+            expected_ids = {}
+            for index in expected_indexes:
+                expected_ids.setdefault(expected_data[index]["id"], []).append(index)
+
+            unpaired_indexes = []
+            for index in resulting_indexes:
+                elem_id = resulting_data[index]["id"]
+                paired_indexes = expected_ids.get(elem_id)
+                if paired_indexes:
+                    add_json_differences(resulting_data[index], expected_data[paired_indexes.pop(0)],
+                                         f"{data_path}[id={elem_id!r}]", json_differences, resulting_digests,
+                                         expected_digests)
+                else:
+                    unpaired_indexes.append(index)
+
+            resulting_indexes = unpaired_indexes
+            expected_indexes = sorted(index for paired_indexes in expected_ids.values() for index in paired_indexes)
+
+        for index in resulting_indexes:
+            json_differences["items_removed"][f"{data_path}[{index}]"] = resulting_data[index]
+        for index in expected_indexes:
+            json_differences["items_added"][f"{data_path}[{index}]"] = expected_data[index]
+
+    else:
+        json_differences["values_changed"][data_path] = {"old_value": resulting_data, "new_value": expected_data}
+
+
+def get_json_differences(resulting_json_data: dict, expected_json_data: dict) -> dict:
+    """ Returns the differences between the resulting and the expected JSON data, ignoring the order of the lists. The
+    values always refer from resulting_json_data ('old') to expected_json_data ('new').
+
+    :param resulting_json_data: Generated resulting JSON data as a dictionary.
+    :type resulting_json_data: dict
+    :param expected_json_data: Expected JSON data as a dictionary.
+    :type expected_json_data: dict
+    :return: Dictionary with the paths and values of the changed, added and removed items.
+    :rtype: dict
+    """
+
+    json_differences = {"values_changed": {}, "items_added": {}, "items_removed": {}}
+    add_json_differences(resulting_json_data, expected_json_data, "root", json_differences, {}, {})
+
+    return {difference_type: differences for difference_type, differences in json_differences.items() if differences}
+
+
 def save_json_differences(resulting_json_data: dict, expected_json_data: dict, test_name: str) -> None:
-    """ Print three files:
-        - test*_added.txt: contains elements newly added.
-        - test*_removed.txt: contains elements removed.
-        - test*_changed.txt: contains elements whose values changed.
-    These values always refer from resulting_json_data ('old') to expected_json_data ('new').
+    """ Saves the differences between the resulting and the expected JSON data in the file test*_diff.txt, inside the
+    DIFFERENCES_FOLDER of the current working directory (which is exclusive to each test).
 
     :param resulting_json_data: Generated resulting JSON data as a dictionary.
     :type resulting_json_data: dict
@@ -35,15 +267,18 @@ def save_json_differences(resulting_json_data: dict, expected_json_data: dict, t
     :type test_name: str
     """
 
-    diff_result = DeepDiff(resulting_json_data, expected_json_data, ignore_order=True)
-    diff_result_dict = diff_result.to_dict()
+    json_differences = get_json_differences(resulting_json_data, expected_json_data)
+
+    os.makedirs(DIFFERENCES_FOLDER, exist_ok=True)
+    differences_path = os.path.abspath(os.path.join(DIFFERENCES_FOLDER, test_name + "_diff.txt"))
+    safe_write_dict_to_txt_file(json_differences, differences_path)
 
-    base_path = "results/"
-    safe_write_dict_to_txt_file(diff_result_dict, base_path + test_name + "_diff.txt")
+    # Shown by pytest in the captured log of the failed test
+    LOGGER.warning(f"Differences of {test_name} saved at {differences_path}")
 
 
 def compare_json_files_data(resulting_json_data: dict, expected_json_data: dict, test_name: str) -> bool:
-    """ Verifies if resulting JSON data corresponds to expected JSON data.
+    """ Verifies if resulting JSON data corresponds to expected JSON data, comparing their canonical digests.
 
     :param resulting_json_data: Generated resulting JSON data as a dictionary.
     :type resulting_json_data: dict
@@ -55,9 +290,35 @@ def compare_json_files_data(resulting_json_data: dict, expected_json_data: dict,
     :rtype: bool
     """
 
-    is_equal = (resulting_json_data == expected_json_data)
+    # Data written in the same order is equal without being digested
+    is_equal = (resulting_json_data == expected_json_data or
+                get_canonical_digest(resulting_json_data, {}) == get_canonical_digest(expected_json_data, {}))
 
     if not is_equal:
         save_json_differences(resulting_json_data, expected_json_data, test_name)
 
     return is_equal
+
+
+def get_typed_dictionaries(json_data, object_type: str) -> list[dict]:
+    """ Returns all dictionaries of the received type nested in the JSON data, in depth-first order.
+
+    :param json_data: JSON data (or part of it) to be searched.
+    :param object_type: Type of the dictionaries to be returned (e.g., 'Diagram').
+    :type object_type: str
+    :return: List with the dictionaries of the received type.
+    :rtype: list[dict]
+    """
+
+    typed_dictionaries = []
+
+    if isinstance(json_data, dict):
+        if json_data.get("type") == object_type:
+            typed_dictionaries.append(json_data)
+        for value in json_data.values():
+            typed_dictionaries.extend(get_typed_dictionaries(value, object_type))
+    elif isinstance(json_data, list):
+        for value in json_data:
+            typed_dictionaries.extend(get_typed_dictionaries(value, object_type))
+
+    return typed_dictionaries
@@ -0,0 +1,91 @@
+""" Tests of the batch mode. """
+import shutil
+from pathlib import Path
+
+from src.modules.batch import encode_batch, is_batch_source
+from src.modules.encoder.encoder_main import encode_graph_file_to_json
+from src.modules.io_graph import load_all_graph_safely
+from src.modules.io_json import safe_load_json_file
+from tests.test_aux import get_test_list
+
+LIST_OF_TESTS = get_test_list()
+
+
+def test_batch_report(tmp_path: Path) -> None:
+    """ Tests that the batch encodes all valid files of a directory into their expected JSON outputs and that invalid
+    files are reported as failed without aborting the batch, both in the returned and in the saved summary report.
+
+    :param tmp_path: Temporary directory, provided by pytest.
+    :type tmp_path: Path
+    """
+
+    graph_directory = tmp_path / "graphs"
+    graph_directory.mkdir()
+    for input_file in LIST_OF_TESTS[:3]:
+        shutil.copy(input_file, graph_directory)
+    (graph_directory / "invalid.ttl").write_text("this is not a graph")
+
+    batch_report = encode_batch(str(graph_directory), workers=2)
+
+    assert (batch_report["total_files"], batch_report["encoded_files"], batch_report["failed_files"]) == (4, 3, 1)
+    assert [Path(file_result["graph_file"]).name for file_result in batch_report["files"]] == \
+        sorted(path.name for path in graph_directory.iterdir())
+
+    for file_result in batch_report["files"]:
+        if file_result["status"] == "success":
+            expected_json_file = str(Path(LIST_OF_TESTS[0]).parent / Path(file_result["output_file"]).name)
+            assert safe_load_json_file(file_result["output_file"]) == safe_load_json_file(expected_json_file)
+        else:
+            assert Path(file_result["graph_file"]).name == "invalid.ttl"
+            assert file_result["output_file"] is None and file_result["error"]
+
+    saved_reports = list(Path("results").glob("batch_report_*.json"))
+    assert len(saved_reports) == 1
+    assert safe_load_json_file(str(saved_reports[0]))["files"] == batch_report["files"]
+
+
+def test_batch_output_collisions(tmp_path: Path) -> None:
+    """ Tests that files with the same name in different directories have different outputs and that a file whose
+    output would overwrite the output of another one of the same directory is reported as failed instead.
+
+    :param tmp_path: Temporary directory, provided by pytest.
+    :type tmp_path: Path
+    """
+
+    for directory_name, input_file in [("first", LIST_OF_TESTS[0]), ("second", LIST_OF_TESTS[1])]:
+        (tmp_path / directory_name).mkdir()
+        shutil.copy(input_file, tmp_path / directory_name / "model.ttl")
+
+    batch_report = encode_batch(str(tmp_path / "*" / "model.ttl"), workers=1)
+
+    assert batch_report["encoded_files"] == 2
+    for directory_name, input_file in [("first", LIST_OF_TESTS[0]), ("second", LIST_OF_TESTS[1])]:
+        assert safe_load_json_file(f"results/{directory_name}/model.json") == \
+               safe_load_json_file(input_file.replace(".ttl", ".json"))
+
+    ntriples_path = tmp_path / "first" / "model.nt"
+    load_all_graph_safely(LIST_OF_TESTS[2]).serialize(str(ntriples_path), format="nt", encoding="utf-8")
+
+    batch_report = encode_batch(str(tmp_path / "first"), workers=1)
+    file_results = {Path(file_result["graph_file"]).name: file_result for file_result in batch_report["files"]}
+
+    assert (batch_report["encoded_files"], batch_report["failed_files"]) == (1, 1)
+    assert file_results["model.nt"]["status"] == "success"
+    assert file_results["model.ttl"]["status"] == "failed"
+    assert "collision" in file_results["model.ttl"]["error"]
+    assert safe_load_json_file(file_results["model.nt"]["output_file"]) == encode_graph_file_to_json(str(ntriples_path))
+
+
+def test_batch_source_with_special_characters(tmp_path: Path) -> None:
+    """ Tests that existing files whose names have glob characters are not treated as batch sources.
+
+    :param tmp_path: Temporary directory, provided by pytest.
+    :type tmp_path: Path
+    """
+
+    graph_file = tmp_path / "model[1].ttl"
+    shutil.copy(LIST_OF_TESTS[0], graph_file)
+
+    assert not is_batch_source(str(graph_file))
+    assert is_batch_source(str(tmp_path / "model[1]*.ttl"))
+    assert is_batch_source(str(tmp_path))
@@ -0,0 +1,88 @@
+""" Smoke tests of the benchmark of the encoder's pipeline. """
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from src.modules.benchmark import BENCHMARK_STAGES, generate_synthetic_graph, run_benchmark, save_benchmark_results
+from src.modules.encoder.encoder_main import encode_graph_file_to_json
+from src.modules.io_json import safe_load_json_file
+
+# Keys of the summary of the elapsed times of a stage (see summarize_times)
+LIST_OF_SUMMARY_KEYS = ["min", "median", "mean", "max", "repetitions"]
+
+
+def test_generate_synthetic_graph(tmp_path: Path) -> None:
+    """ Tests that the synthetic graph has the reported numbers of triples and objects and that it is encoded as a
+    project whose model is the tree of packages and that has all the diagrams.
+
+    :param tmp_path: Temporary directory, provided by pytest.
+    :type tmp_path: Path
+    """
+
+    graph_path = str(tmp_path / "synthetic_graph.ttl")
+    graph_statistics = generate_synthetic_graph(graph_path, 2, 2, 3)
+
+    # Model with 2 packages, each containing 2 packages, and each object with its type, name and relations
+    assert graph_statistics == {"triples": 45, "Project": 1, "Package": 7, "Diagram": 3}
+
+    json_data = encode_graph_file_to_json(graph_path)
+
+    assert json_data["type"] == "Project"
+    assert json_data["model"]["name"] == "Synthetic Model"
+    assert len(json_data["model"]["contents"]) == 2
+    assert all(len(package["contents"]) == 2 for package in json_data["model"]["contents"])
+    assert sorted(diagram["name"] for diagram in json_data["diagrams"]) == ["Diagram 0", "Diagram 1", "Diagram 2"]
+
+
+def test_run_benchmark(tmp_path: Path) -> None:
+    """ Tests that the benchmark results have the documented keys for each combination of the received shapes and that
+    they are saved as a JSON file.
+
+    :param tmp_path: Temporary directory, provided by pytest.
+    :type tmp_path: Path
+    """
+
+    benchmark_results = run_benchmark([1, 2], [2], [1], repetitions=2)
+
+    assert {"software", "version", "python_version", "platform", "date_time"} <= benchmark_results.keys()
+    assert benchmark_results["repetitions"] == 2 and benchmark_results["seed"] == 0
+    assert [graph_results["package_depth"] for graph_results in benchmark_results["graphs"]] == [1, 2]
+
+    for graph_results in benchmark_results["graphs"]:
+        assert graph_results["contents_fan_out"] == 2 and graph_results["diagram_count"] == 1
+        package_depth = graph_results["package_depth"]
+        assert graph_results["graph"]["Package"] == sum(2 ** level for level in range(package_depth + 1))
+        assert list(graph_results["stages"]) == BENCHMARK_STAGES
+
+        for times_summary in list(graph_results["stages"].values()) + [graph_results["total"]]:
+            assert list(times_summary) == LIST_OF_SUMMARY_KEYS
+            assert len(times_summary["repetitions"]) == 2
+            assert 0 <= times_summary["min"] <= times_summary["median"] <= times_summary["max"]
+
+    results_path = save_benchmark_results(benchmark_results, str(tmp_path / "results.json"))
+
+    assert safe_load_json_file(results_path) == benchmark_results
+
+
+def test_benchmark_main(tmp_path: Path) -> None:
+    """ Tests that the benchmark's main file runs with the user's arguments and saves the results, by default in the
+    results directory.
+
+    :param tmp_path: Temporary working directory, provided by pytest.
+    :type tmp_path: Path
+    """
+
+    root_directory = Path(__file__).resolve().parents[1]
+    environment = dict(os.environ, PYTHONPATH=os.pathsep.join([str(root_directory), str(root_directory / "src")]))
+
+    process = subprocess.run([sys.executable, str(root_directory / "src" / "benchmark.py"), "-d", "1", "-f", "2", "-g",
+                              "1", "-r", "1"], cwd=tmp_path, env=environment, capture_output=True, text=True)
+    assert process.returncode == 0, process.stderr
+
+    list_results_files = list((tmp_path / "results").glob("benchmark_*.json"))
+    assert len(list_results_files) == 1
+
+    benchmark_results = safe_load_json_file(str(list_results_files[0]))
+    assert len(benchmark_results["graphs"]) == 1
+    assert list(benchmark_results["graphs"][0]["stages"]) == BENCHMARK_STAGES
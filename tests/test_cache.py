@@ -0,0 +1,96 @@
+""" Tests of the on-disk cache of JSON outputs. """
+import os
+from pathlib import Path
+
+import pytest
+
+import src.main
+from src.main import encode_ontouml_graph2json
+from src.modules import cache
+from src.modules.cache import evict_cache_entries, get_cache_key, get_cached_json_file, store_json_file_in_cache
+from tests.test_aux import get_test_list
+
+LIST_OF_TESTS = get_test_list()
+
+
+def test_cache_hit_and_miss(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """ Tests that the first encoding of a graph file misses the cache and stores its output, and that the next ones
+    restore the same output from the cache without encoding the graph or (on the command line path) parsing the
+    cached file.
+
+    :param tmp_path: Temporary directory, provided by pytest.
+    :type tmp_path: Path
+    :param monkeypatch: Fixture for replacing the encoder and the loader, provided by pytest.
+    :type monkeypatch: pytest.MonkeyPatch
+    """
+
+    cache_directory = str(tmp_path / "cache")
+    input_file = LIST_OF_TESTS[0]
+    cache_key = get_cache_key(input_file)
+
+    assert get_cached_json_file(cache_key, cache_directory) is None
+    json_data = encode_ontouml_graph2json(input_file, "test", cache_directory, output_path=str(tmp_path / "miss.json"))
+    assert get_cached_json_file(cache_key, cache_directory) is not None
+
+    # Cache hits must not encode the graph again (nor parse the cached file, when it is not returned)
+    def fail_if_called(*_):
+        raise AssertionError("Unexpected call on a cache hit.")
+
+    monkeypatch.setattr("modules.encoder.encoder_main.encode_graph_file_to_json", fail_if_called)
+
+    assert encode_ontouml_graph2json(input_file, "test", cache_directory,
+                                     output_path=str(tmp_path / "hit.json")) == json_data
+
+    monkeypatch.setattr(src.main, "safe_load_json_file", fail_if_called)
+
+    assert encode_ontouml_graph2json(input_file, "test", cache_directory, output_path=str(tmp_path / "copy.json"),
+                                     return_json_data=False) is None
+    assert encode_ontouml_graph2json(input_file, "test", cache_directory, memory_budget=0,
+                                     output_path=str(tmp_path / "budget.json")) is None
+
+    miss_bytes = (tmp_path / "miss.json").read_bytes()
+    for output_name in ["hit.json", "copy.json", "budget.json"]:
+        assert (tmp_path / output_name).read_bytes() == miss_bytes
+
+
+def test_cache_keys(monkeypatch: pytest.MonkeyPatch) -> None:
+    """ Tests that cache keys change with the graph file, the encoder version and the output compression.
+
+    :param monkeypatch: Fixture for replacing the encoder's metadata, provided by pytest.
+    :type monkeypatch: pytest.MonkeyPatch
+    """
+
+    cache_keys = {get_cache_key(LIST_OF_TESTS[0]), get_cache_key(LIST_OF_TESTS[1]),
+                  get_cache_key(LIST_OF_TESTS[0], "gzip"), get_cache_key(LIST_OF_TESTS[0], "xz")}
+    assert get_cache_key(LIST_OF_TESTS[0]) == get_cache_key(LIST_OF_TESTS[0])
+
+    metadata = dict(cache.get_metadata(), version="0.0.0-other")
+    monkeypatch.setattr(cache, "get_metadata", lambda: metadata)
+    cache_keys.add(get_cache_key(LIST_OF_TESTS[0]))
+
+    assert len(cache_keys) == 5
+
+
+def test_cache_eviction(tmp_path: Path) -> None:
+    """ Tests that the least recently used entries are evicted when the cache exceeds its size, and that hits refresh
+    their entries.
+
+    :param tmp_path: Temporary directory, provided by pytest.
+    :type tmp_path: Path
+    """
+
+    cache_directory = str(tmp_path / "cache")
+    output_path = tmp_path / "output.json"
+    # Three entries of 0.4 MB, of which only two fit in a cache of 1 MB
+    output_path.write_bytes(b" " * (400 * 1024))
+
+    for entry_time, cache_key in enumerate(["first", "second", "third"]):
+        assert store_json_file_in_cache(str(output_path), cache_key, cache_directory, cache_size=2) == 0
+        os.utime(os.path.join(cache_directory, f"{cache_key}.json"), (entry_time, entry_time))
+
+    assert get_cached_json_file("first", cache_directory) is not None
+    assert evict_cache_entries(cache_directory, cache_size=1) == 1
+
+    assert get_cached_json_file("second", cache_directory) is None
+    assert get_cached_json_file("first", cache_directory) is not None
+    assert get_cached_json_file("third", cache_directory) is not None
@@ -0,0 +1,27 @@
+""" Tests of the decoding of JSON files into graphs. """
+from pathlib import Path
+
+from src.modules.decoder.decoder_main import decode_json_file_to_graph, decode_json_file_to_graph_file
+from src.modules.encoder.encoder_main import encode_graph_file_to_json
+from src.modules.io_graph import load_all_graph_safely
+from src.modules.io_json import safe_write_json_file
+from tests.test_aux import get_test_list
+
+LIST_OF_TESTS = get_test_list()
+
+
+def test_decode_round_trip(tmp_path: Path) -> None:
+    """ Tests that JSON files decoded into graphs return the original graphs' triples, and that the decoded N-Triples
+    files are encoded back into the same JSON.
+    """
+
+    for input_file in LIST_OF_TESTS[:4]:
+        json_data = encode_graph_file_to_json(input_file)
+        json_path = tmp_path / "decoded.json"
+        safe_write_json_file(json_data, str(json_path))
+
+        assert set(decode_json_file_to_graph(str(json_path))) == set(load_all_graph_safely(input_file))
+
+        graph_path = tmp_path / "decoded.nt"
+        decode_json_file_to_graph_file(str(json_path), str(graph_path), "nt")
+        assert encode_graph_file_to_json(str(graph_path)) == json_data
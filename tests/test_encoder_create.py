@@ -0,0 +1,62 @@
+""" Tests of the creation of the data dictionaries. """
+from pathlib import Path
+
+import pytest
+from rdflib import Graph
+
+from src.modules.encoder.encoder_create import create_data_dictionaries
+from src.modules.encoder.encoder_mount import mount_json_dictionary
+from src.modules.globals import GRAPH_STORE_BACKEND_DEFAULT
+from src.modules.io_graph import load_all_graph_safely
+from tests.test_aux import get_encodable_test_params, get_test_list
+
+LIST_OF_TESTS = get_test_list()
+
+
+@pytest.mark.parametrize("input_file", get_encodable_test_params(LIST_OF_TESTS))
+def test_bulk_extraction(input_file: str, tmp_path: Path) -> None:
+    """ Tests that the bulk extraction creates the same JSON as the default extraction, both for a graph in memory
+    and for a graph in a persistent store, whose triples are not grouped by subject when all of them are iterated.
+
+    :param input_file: Path of the graph file to be tested.
+    :type input_file: str
+    :param tmp_path: Temporary directory, provided by pytest.
+    :type tmp_path: Path
+    """
+
+    memory_graph = load_all_graph_safely(input_file)
+    expected_json_data = mount_json_dictionary(create_data_dictionaries(memory_graph, bulk_extraction=False)[0])
+
+    assert mount_json_dictionary(create_data_dictionaries(memory_graph, bulk_extraction=True)[0]) == expected_json_data
+
+    store_graph = load_all_graph_safely(input_file, str(tmp_path), GRAPH_STORE_BACKEND_DEFAULT)
+    try:
+        for bulk_extraction in [False, True, None]:
+            list_dictionaries, _ = create_data_dictionaries(store_graph, bulk_extraction=bulk_extraction)
+            assert mount_json_dictionary(list_dictionaries) == expected_json_data
+    finally:
+        store_graph.close()
+
+
+def test_bulk_extraction_of_interleaved_triples(tmp_path: Path) -> None:
+    """ Tests that the bulk extraction creates the same JSON as the default extraction for a persistent store in which
+    the triples of each subject were added interleaved with the triples of other subjects.
+
+    :param tmp_path: Temporary directory, provided by pytest.
+    :type tmp_path: Path
+    """
+
+    memory_graph = load_all_graph_safely(LIST_OF_TESTS[7])
+
+    store_graph = Graph(store=GRAPH_STORE_BACKEND_DEFAULT)
+    store_graph.open(str(tmp_path / "interleaved.sqlite"), create=True)
+    try:
+        interleaved_triples = sorted(memory_graph, key=lambda triple: triple[2], reverse=True)
+        store_graph.addN((s, p, o, store_graph) for s, p, o in interleaved_triples)
+
+        list_dictionaries, _ = create_data_dictionaries(store_graph, bulk_extraction=False)
+        expected_json_data = mount_json_dictionary(list_dictionaries)
+        list_dictionaries, _ = create_data_dictionaries(store_graph, bulk_extraction=True)
+        assert mount_json_dictionary(list_dictionaries) == expected_json_data
+    finally:
+        store_graph.close()
@@ -0,0 +1,116 @@
+""" Tests of the incremental encoding of graph deltas. """
+import json
+
+import pytest
+from rdflib import Graph, Literal, Namespace, RDF, URIRef
+
+from src.modules.encoder.encoder_incremental import create_graph_encoding_state, encode_graph_delta
+from src.modules.encoder.encoder_main import encode_graph_to_json
+from src.modules.globals import URI_ONTOLOGY, URI_ONTOUML
+from src.modules.io_graph import load_all_graph_safely
+from tests.test_aux import get_test_list
+
+LIST_OF_TESTS = get_test_list()
+
+ONTOLOGY = Namespace(URI_ONTOLOGY)
+ONTOUML = Namespace(URI_ONTOUML)
+
+# Elements of test_008, a project with nested packages and diagrams owned by them
+PROJECT = ONTOLOGY["dGSNHRGFS_j2pAvw"]
+MY_PACKAGE = ONTOLOGY["7cxaWxGFS_j2pAoO"]
+MY_MODEL = ONTOLOGY["n4ZaWxGFS_j2pAoS"]
+MY_PACKAGE_3 = ONTOLOGY["XQ6WxGFS_j2pAor"]
+MY_PACKAGE_2 = ONTOLOGY["g2A6WxGFS_j2pAol"]
+MY_PACKAGE_3_DIAGRAM = ONTOLOGY["rmX6WxGFS_j2pAqf"]
+NEW_ELEMENT = ONTOLOGY["newElement"]
+
+# Each delta is a tuple (name, removed triples, added triples)
+LIST_OF_DELTAS = [
+    ("added elements", [], [
+        (NEW_ELEMENT, RDF.type, ONTOUML.Package),
+        (NEW_ELEMENT, ONTOUML.project, PROJECT),
+        (NEW_ELEMENT, ONTOUML.name, Literal("NewPackage")),
+        (MY_PACKAGE_2, ONTOUML.containsModelElement, NEW_ELEMENT)]),
+    ("changed properties", [(NEW_ELEMENT, ONTOUML.name, Literal("NewPackage"))], [
+        (NEW_ELEMENT, ONTOUML.name, Literal("RenamedElement")),
+        (MY_PACKAGE_2, ONTOUML.name, Literal("RenamedPackage"))]),
+    ("changed types", [(NEW_ELEMENT, RDF.type, ONTOUML.Package)], [(NEW_ELEMENT, RDF.type, ONTOUML.Diagram)]),
+    ("moved containment", [(MY_PACKAGE, ONTOUML.containsModelElement, MY_PACKAGE_3)], [
+        (MY_MODEL, ONTOUML.containsModelElement, MY_PACKAGE_3)]),
+    ("changed owners", [(MY_PACKAGE_3_DIAGRAM, ONTOUML.owner, MY_PACKAGE_3)], [
+        (MY_PACKAGE_3_DIAGRAM, ONTOUML.owner, MY_PACKAGE_2)]),
+    ("shared references", [], [(MY_PACKAGE, ONTOUML.containsModelElement, MY_PACKAGE_2)]),
+    ("unshared references", [(MY_PACKAGE, ONTOUML.containsModelElement, MY_PACKAGE_2)], []),
+    ("removed elements", [
+        (NEW_ELEMENT, RDF.type, ONTOUML.Diagram),
+        (NEW_ELEMENT, ONTOUML.project, PROJECT),
+        (NEW_ELEMENT, ONTOUML.name, Literal("RenamedElement")),
+        (MY_PACKAGE_2, ONTOUML.containsModelElement, NEW_ELEMENT)], []),
+    ("removed referenced elements", [(MY_PACKAGE_3, RDF.type, ONTOUML.Package)], []),
+    ("unchanged graph", [(URIRef("https://example.org/other#subject"), ONTOUML.name, Literal("Absent"))], [])]
+
+
+def apply_graph_delta(ontology_graph: Graph, removed_triples: list, added_triples: list) -> None:
+    """ Applies a delta to a graph in the same order in which encode_graph_delta applies it to an encoding state.
+
+    :param ontology_graph: Graph to be modified.
+    :type ontology_graph: Graph
+    :param removed_triples: Triples to be removed from the graph.
+    :type removed_triples: list
+    :param added_triples: Triples to be added to the graph.
+    :type added_triples: list
+    """
+
+    for removed_triple in removed_triples:
+        ontology_graph.remove(removed_triple)
+
+    for added_triple in added_triples:
+        ontology_graph.add(added_triple)
+
+
+def test_encode_graph_delta() -> None:
+    """ Tests that, after each delta of a sequence, the incremental encoding returns the same JSON (including the order
+    of its keys and lists) as encoding again the whole modified graph, and that it does not modify the JSON returned
+    for the previous deltas.
+    """
+
+    ontology_graph = load_all_graph_safely(LIST_OF_TESTS[7])
+    encoding_state = create_graph_encoding_state(ontology_graph)
+    previous_json_data = encoding_state.json_data
+    previous_json_text = json.dumps(previous_json_data)
+
+    assert previous_json_text == json.dumps(encode_graph_to_json(ontology_graph))
+
+    for delta_name, removed_triples, added_triples in LIST_OF_DELTAS:
+        apply_graph_delta(ontology_graph, removed_triples, added_triples)
+
+        resulting_json_data = encode_graph_delta(encoding_state, added_triples, removed_triples)
+
+        assert json.dumps(resulting_json_data) == json.dumps(encode_graph_to_json(ontology_graph)), delta_name
+        assert json.dumps(previous_json_data) == previous_json_text, delta_name
+
+        previous_json_data = resulting_json_data
+        previous_json_text = json.dumps(resulting_json_data)
+
+
+@pytest.mark.parametrize("delta_index", range(len(LIST_OF_DELTAS)), ids=[delta[0] for delta in LIST_OF_DELTAS])
+def test_encode_graph_delta_from_new_state(delta_index: int) -> None:
+    """ Tests that an encoding state created from a graph modified by some deltas encodes the next delta as if the
+    state had been updated by all of them.
+
+    :param delta_index: Index of the delta to be encoded incrementally.
+    :type delta_index: int
+    """
+
+    ontology_graph = load_all_graph_safely(LIST_OF_TESTS[7])
+
+    for _, removed_triples, added_triples in LIST_OF_DELTAS[:delta_index]:
+        apply_graph_delta(ontology_graph, removed_triples, added_triples)
+
+    encoding_state = create_graph_encoding_state(ontology_graph)
+    _, removed_triples, added_triples = LIST_OF_DELTAS[delta_index]
+    apply_graph_delta(ontology_graph, removed_triples, added_triples)
+
+    resulting_json_data = encode_graph_delta(encoding_state, added_triples, removed_triples)
+
+    assert json.dumps(resulting_json_data) == json.dumps(encode_graph_to_json(ontology_graph))
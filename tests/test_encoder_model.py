@@ -0,0 +1,24 @@
+""" Tests of the intermediate representation of the objects. """
+from src.modules.encoder.encoder_model import create_ontouml_object, OBJECT_CLASSES
+
+
+def test_object_classes_fields() -> None:
+    """ Tests that the fields declared by each object class are the keys that are always output for its objects. """
+
+    for object_class in OBJECT_CLASSES.values():
+        assert object_class.FIELDS == frozenset(object_class.KEY_PATTERN) == frozenset(object_class.__slots__)
+
+
+def test_object_undeclared_fields() -> None:
+    """ Tests that fields that are not declared by an object's class (e.g., the views contained by a diagram) are output
+    after the declared ones, in alphabetical order, keeping the last value found for each of them.
+    """
+
+    properties_bucket = [("name", "Diagram"), ("containsView", "v1"), ("contents", "k1"), ("containsView", "v2"),
+                         ("alias", "d")]
+
+    diagram_object = create_ontouml_object("d1", "Diagram", properties_bucket)
+
+    assert diagram_object.to_dict() == {"id": "d1", "name": "Diagram", "description": None, "type": "Diagram",
+                                        "owner": None, "contents": ["k1"], "alias": "d", "containsView": "v2"}
+    assert list(diagram_object.keys())[-2:] == ["alias", "containsView"]
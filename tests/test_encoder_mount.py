@@ -0,0 +1,255 @@
+""" Tests of the mounting of the JSON dictionary. """
+import copy
+import json
+import random
+
+import pytest
+
+from src.modules.encoder import encoder_mount
+from src.modules.encoder.encoder_create import create_data_dictionaries
+from src.modules.encoder.encoder_mount import mount_json_dictionary
+from src.modules.io_graph import load_all_graph_safely
+from tests.test_aux import get_encodable_test_params, get_test_list
+
+LIST_OF_TESTS = get_test_list()
+
+
+def test_mount_does_not_modify_dictionaries() -> None:
+    """ Tests that mounting does not modify the received dictionaries and shares their unmodified nested values. """
+
+    list_dictionaries = [
+        {"id": "p1", "type": "Project", "name": "Project", "model": "k1", "diagrams": ["d1"]},
+        {"id": "k1", "type": "Package", "name": "Root", "contents": ["k2", "literal"]},
+        {"id": "k2", "type": "Package", "name": "Child", "contents": None},
+        {"id": "d1", "type": "Diagram", "name": "Diagram", "owner": {"id": "k1", "type": "Package"},
+         "contents": ["literal"]}]
+    received_dictionaries = copy.deepcopy(list_dictionaries)
+
+    json_data = mount_json_dictionary(list_dictionaries)
+
+    assert list_dictionaries == received_dictionaries
+    assert json_data["model"]["contents"] == ["literal", list_dictionaries[2]]
+    assert json_data["diagrams"][0]["owner"] is list_dictionaries[3]["owner"]
+    assert json_data["diagrams"][0]["contents"] is list_dictionaries[3]["contents"]
+
+
+def legacy_replace_id_pointer_in_dictionary(current_dictionary: dict, element_id: str, element_dict: dict) -> None:
+    """ Reference implementation of the mounting before the single-pass mounting (see legacy_mount_json_dictionary).
+    Replaces the references to element_id found in current_dictionary by copies of element_dict, modifying it.
+
+    :param current_dictionary: Dictionary that is going to be searched for pointers to element_id.
+    :type current_dictionary: dict
+    :param element_id: ID to be searched inside the dictionary.
+    :type element_id: str
+    :param element_dict: Dictionary that has element_id as its ID.
+    :type element_dict: dict
+    """
+
+    for key in current_dictionary.keys():
+        if key == 'id':
+            continue
+
+        if current_dictionary[key] == element_id:
+            current_dictionary[key] = element_dict.copy()
+            break
+
+        if type(current_dictionary[key]) is list:
+            for item in current_dictionary[key]:
+                if item == element_id:
+                    current_dictionary[key].remove(item)
+                    current_dictionary[key].append(element_dict.copy())
+                if type(item) is dict:
+                    legacy_replace_id_pointer_in_dictionary(item, element_id, element_dict)
+
+        if type(current_dictionary[key]) is dict:
+            legacy_replace_id_pointer_in_dictionary(current_dictionary[key], element_id, element_dict)
+
+
+def legacy_mount_json_dictionary(list_dictionaries: list[dict]) -> dict:
+    """ Reference implementation of the mounting before the single-pass mounting, which searched the whole mounted
+    dictionary once for each ID, using a copy of the first dictionary with that ID. The received dictionaries and
+    their nested lists are modified.
+
+    :param list_dictionaries: List with all individual object dictionaries.
+    :type list_dictionaries: list[dict]
+    :return: Single dictionary with all graph's content.
+    :rtype: dict
+    """
+
+    json_dictionary = list_dictionaries[0].copy()
+    for dictionary in list_dictionaries:
+        if dictionary['type'] == 'Project':
+            json_dictionary = dictionary.copy()
+            break
+
+    for element_id in [dictionary['id'] for dictionary in list_dictionaries]:
+        element_dict = next(dictionary for dictionary in list_dictionaries if dictionary['id'] == element_id).copy()
+        if json_dictionary['id'] != element_dict['id']:
+            legacy_replace_id_pointer_in_dictionary(json_dictionary, element_id, element_dict)
+
+    return json_dictionary
+
+
+def create_shared_dictionaries(seed: int) -> list[dict]:
+    """ Creates a random list of dictionaries with shared references: IDs referenced several times, repeated IDs and
+    lists shared by several dictionaries, with lists and dictionaries nested in their values. Each dictionary only
+    references the IDs that follow its own in a random sequence of IDs, as the legacy mounting would recurse endlessly
+    on cyclic references, but the dictionaries are created in another random order.
+
+    :param seed: Seed of the random choices.
+    :type seed: int
+    :return: List of dictionaries with a single Project.
+    :rtype: list[dict]
+    """
+
+    random_generator = random.Random(seed)
+    list_ids = [f"e{index}" for index in range(random_generator.randint(2, 12))]
+    random_generator.shuffle(list_ids)
+    middle_index = len(list_ids) // 2
+
+    # Shared lists reference the second half of the IDs and are held by the first half
+    shared_lists = [random_generator.choices(list_ids[middle_index:] + ["literal"], k=random_generator.randint(1, 3))
+                    for _ in range(2)]
+
+    def create_value(id_index: int, depth: int):
+        list_values = list_ids[id_index + 1:] + ["literal"]
+        choice = random_generator.random()
+        if choice < 0.5:
+            return random_generator.choice(list_values)
+        if choice < 0.7 and depth < 2:
+            return [create_value(id_index, depth + 1) if random_generator.random() < 0.3
+                    else random_generator.choice(list_values) for _ in range(random_generator.randint(0, 4))]
+        if choice < 0.8 and depth < 2:
+            return {"id": random_generator.choice(list_ids), "value": create_value(id_index, depth + 1),
+                    "other": create_value(id_index, depth + 1)}
+        if choice < 0.9 and id_index < middle_index:
+            return random_generator.choice(shared_lists)
+        return None
+
+    list_dictionaries = [{"id": elem_id, "type": "Package"} for elem_id in list_ids]
+    for _ in range(random_generator.randint(0, 2)):
+        list_dictionaries.append({"id": random_generator.choice(list_ids), "type": "Class"})
+    random_generator.shuffle(list_dictionaries)
+    random_generator.choice(list_dictionaries)["type"] = "Project"
+
+    for dictionary in list_dictionaries:
+        for key in ["model", "contents", "owner"][:random_generator.randint(1, 3)]:
+            dictionary[key] = create_value(list_ids.index(dictionary['id']), 0)
+
+    return list_dictionaries
+
+
+def count_references(list_dictionaries: list[dict]) -> dict[str, int]:
+    """ Counts the references to the IDs of the dictionaries made by their fields (except their own IDs).
+
+    :param list_dictionaries: List with all individual object dictionaries.
+    :type list_dictionaries: list[dict]
+    :return: Number of references to each referenced ID.
+    :rtype: dict[str, int]
+    """
+
+    list_ids = {dictionary['id'] for dictionary in list_dictionaries}
+    references_count = {}
+    list_values = [value for dictionary in list_dictionaries for key, value in dictionary.items() if key != 'id']
+
+    while list_values:
+        value = list_values.pop()
+        if type(value) is list:
+            list_values.extend(value)
+        elif type(value) is dict:
+            list_values.extend(nested_value for key, nested_value in value.items() if key != 'id')
+        elif value in list_ids:
+            references_count[value] = references_count.get(value, 0) + 1
+
+    return references_count
+
+
+@pytest.mark.parametrize("input_file", get_encodable_test_params(LIST_OF_TESTS))
+def test_mount_legacy_equivalence(input_file: str) -> None:
+    """ Tests that the mounting returns the same JSON (including the order of its keys and lists) as the legacy
+    mounting for the golden files, including the ones whose IDs are referenced more than once (e.g., test_054).
+
+    :param input_file: Path of the graph file to be tested.
+    :type input_file: str
+    """
+
+    list_objects, _ = create_data_dictionaries(load_all_graph_safely(input_file))
+    list_dictionaries = [ontouml_object.to_dict() for ontouml_object in list_objects]
+
+    expected_json_data = legacy_mount_json_dictionary(copy.deepcopy(list_dictionaries))
+
+    assert json.dumps(mount_json_dictionary(list_dictionaries)) == json.dumps(expected_json_data)
+
+
+def test_mount_multiple_references() -> None:
+    """ Tests that an ID referenced several times is mounted as in the legacy mounting: the package that is the
+    project's model is not resolved in the contents of a diagram, as its replacement stops searching the project's
+    following fields, but it is resolved in the contents of another package. """
+
+    list_dictionaries = [
+        {"id": "p1", "type": "Project", "model": "k1", "diagrams": ["d1"]},
+        {"id": "d1", "type": "Diagram", "owner": {"id": "k2", "type": "Package"}, "contents": ["k1", "k2"]},
+        {"id": "k1", "type": "Package", "contents": ["k2"]},
+        {"id": "k2", "type": "Package", "contents": None}]
+    received_json_text = json.dumps(list_dictionaries)
+
+    legacy_json_data = legacy_mount_json_dictionary(copy.deepcopy(list_dictionaries))
+    json_data = mount_json_dictionary(list_dictionaries)
+
+    assert json.dumps(json_data) == json.dumps(legacy_json_data)
+    assert json_data["diagrams"][0]["contents"][0] == "k1"
+    assert json_data["model"]["contents"] == [list_dictionaries[3]]
+    assert json.dumps(list_dictionaries) == received_json_text
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_mount_shared_references(seed: int) -> None:
+    """ Tests that random dictionaries with shared references are mounted as in the legacy mounting (including the
+    order of keys and lists) and that the received dictionaries are not modified.
+
+    :param seed: Seed of the random dictionaries.
+    :type seed: int
+    """
+
+    list_dictionaries = create_shared_dictionaries(seed)
+    received_json_text = json.dumps(list_dictionaries)
+
+    legacy_json_data = legacy_mount_json_dictionary(copy.deepcopy(list_dictionaries))
+
+    assert json.dumps(mount_json_dictionary(list_dictionaries)) == json.dumps(legacy_json_data)
+    assert json.dumps(list_dictionaries) == received_json_text
+
+
+@pytest.mark.parametrize("package_count", [10, 100, 1000])
+def test_mount_scaling(package_count: int, monkeypatch: pytest.MonkeyPatch) -> None:
+    """ Tests that the mounting work grows linearly with the number of dictionaries: each dictionary (and each nested
+    dictionary) is mounted exactly once and each reference is resolved once, independently of the graph's size.
+
+    :param package_count: Number of packages of the synthetic model, which has as many diagrams.
+    :type package_count: int
+    :param monkeypatch: Fixture for counting the calls of the mounting functions, provided by pytest.
+    :type monkeypatch: pytest.MonkeyPatch
+    """
+
+    list_dictionaries = [{"id": "p", "type": "Project", "model": "k0",
+                          "diagrams": [f"d{index}" for index in range(package_count)]}]
+    for index in range(package_count):
+        # Packages form a binary tree whose root is the model
+        list_contents = [f"k{child}" for child in (index * 2 + 1, index * 2 + 2) if child < package_count]
+        list_dictionaries.append({"id": f"k{index}", "type": "Package", "contents": list_contents or None})
+    for index in range(package_count):
+        list_dictionaries.append({"id": f"d{index}", "type": "Diagram",
+                                  "owner": {"id": f"k{index}", "type": "Package"}, "contents": None})
+
+    calls_count = {"mount_dictionary": 0, "get_mounted_reference": 0}
+    for function_name in calls_count:
+        def count_call(*args, counted_function=getattr(encoder_mount, function_name), counted_name=function_name):
+            calls_count[counted_name] += 1
+            return counted_function(*args)
+        monkeypatch.setattr(encoder_mount, function_name, count_call)
+
+    encoder_mount.mount_json_dictionary(list_dictionaries)
+
+    # All dictionaries, the diagrams' owners and the project, which is mounted only as the upper level dictionary
+    assert calls_count["mount_dictionary"] == len(list_dictionaries) - 1 + package_count + 1
+    assert calls_count["get_mounted_reference"] == sum(count_references(list_dictionaries).values())
@@ -0,0 +1,22 @@
+""" Tests of the parallel encoding of package subtrees. """
+import pytest
+
+from src.modules.encoder import encoder_parallel
+from src.modules.encoder.encoder_main import encode_graph_to_json
+from src.modules.encoder.encoder_parallel import encode_graph_to_json_parallel
+from src.modules.io_graph import load_all_graph_safely
+from tests.test_aux import get_test_list
+
+LIST_OF_TESTS = get_test_list()
+
+
+def test_parallel_encoding(monkeypatch: pytest.MonkeyPatch) -> None:
+    """ Tests that encoding the package subtrees in parallel returns the same JSON as the sequential encoding, also
+    when their IDs are referenced more than once (test_054). """
+
+    monkeypatch.setattr(encoder_parallel, "PARALLEL_ENCODING_MINIMUM_OBJECTS", 0)
+
+    for input_file in LIST_OF_TESTS[3:8] + [LIST_OF_TESTS[53]]:
+        ontology_graph = load_all_graph_safely(input_file)
+
+        assert encode_graph_to_json_parallel(ontology_graph, 2) == encode_graph_to_json(ontology_graph)
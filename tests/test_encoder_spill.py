@@ -0,0 +1,30 @@
+""" Tests of the encoding under a memory budget. """
+from pathlib import Path
+
+from src.modules.encoder.encoder_main import encode_graph_file_to_json, encode_graph_file_to_json_file
+from src.modules.io_json import safe_write_json_file
+from tests.test_aux import get_test_list
+
+LIST_OF_TESTS = get_test_list()
+
+
+def test_memory_budget(tmp_path: Path) -> None:
+    """ Tests that graphs encoded with a memory budget (spilling all their objects, or none of them) are written into
+    the same JSON file as the mounted dictionaries, also when their IDs are referenced more than once (test_054), and
+    that no spill file is left behind.
+    """
+
+    spill_directory = tmp_path / "spill"
+    spill_directory.mkdir()
+
+    for input_file in LIST_OF_TESTS[:4] + [LIST_OF_TESTS[53]]:
+        expected_json_path = tmp_path / "expected.json"
+        safe_write_json_file(encode_graph_file_to_json(input_file), str(expected_json_path))
+
+        for memory_budget in [0, 100]:
+            resulting_json_path = tmp_path / "resulting.json"
+            encode_graph_file_to_json_file(input_file, str(resulting_json_path), memory_budget,
+                                           spill_directory=str(spill_directory))
+            assert resulting_json_path.read_bytes() == expected_json_path.read_bytes()
+
+    assert not list(spill_directory.iterdir())
@@ -0,0 +1,29 @@
+""" Tests of the registered type handlers. """
+import pytest
+
+# The encoder's modules import each other as 'modules', so the encoder and its registry are imported from that package
+from modules.encoder.encoder_main import encode_graph_file_to_json
+from modules.encoder.encoder_types_treatment import TYPE_HANDLERS
+from src.modules.io_json import safe_load_json_file
+from tests.test_aux import get_test_list, get_typed_dictionaries
+
+LIST_OF_TESTS = get_test_list()
+
+
+def test_type_handlers(monkeypatch: pytest.MonkeyPatch) -> None:
+    """ Tests that registered type handlers are dispatched once per object of their type, receiving the types of all
+    objects, and that diagram owners are resolved from these types.
+    """
+
+    treated_objects = []
+    monkeypatch.setitem(TYPE_HANDLERS, "Package", lambda package_dict, objects_types: treated_objects.append(
+        (package_dict['id'], objects_types[package_dict['id']])))
+
+    json_data = encode_graph_file_to_json(LIST_OF_TESTS[7])
+    expected_json_data = safe_load_json_file(LIST_OF_TESTS[7].replace(".ttl", ".json"))
+    # Diagram owners are also typed dictionaries, so the packages' IDs are repeated
+    package_ids = {package_dict['id'] for package_dict in get_typed_dictionaries(json_data, "Package")}
+
+    assert json_data == expected_json_data
+    assert sorted(treated_objects) == sorted((package_id, "Package") for package_id in package_ids)
+    assert all(type(diagram_dict['owner']) is dict for diagram_dict in get_typed_dictionaries(json_data, "Diagram"))
@@ -0,0 +1,31 @@
+""" Tests of the detection and reading of (compressed) graph files. """
+import gzip
+import lzma
+from pathlib import Path
+
+from rdflib import Graph
+
+from src.modules.encoder.encoder_main import encode_graph_file_to_json, encode_graph_to_json
+from src.modules.graph_input import detect_graph_format
+from src.modules.io_graph import load_all_graph_safely
+from tests.test_aux import get_test_list
+
+LIST_OF_TESTS = get_test_list()
+
+
+def test_compressed_line_based_inputs(tmp_path: Path) -> None:
+    """ Tests that compressed N-Triples files, and files without extension whose format is sniffed, are read by the fast
+    tokenizer and return the same JSON as the N-Triples graph parsed by rdflib.
+    """
+
+    for input_file in LIST_OF_TESTS[:4]:
+        ntriples_data = load_all_graph_safely(input_file).serialize(format="nt", encoding="utf-8")
+        expected_json_data = encode_graph_to_json(Graph().parse(data=ntriples_data, format="nt"))
+        input_name = Path(input_file).stem
+
+        (tmp_path / f"{input_name}.nt.gz").write_bytes(gzip.compress(ntriples_data))
+        (tmp_path / input_name).write_bytes(lzma.compress(ntriples_data))
+
+        for graph_file in [tmp_path / f"{input_name}.nt.gz", tmp_path / input_name]:
+            assert detect_graph_format(str(graph_file)) == "nt"
+            assert encode_graph_file_to_json(str(graph_file)) == expected_json_data
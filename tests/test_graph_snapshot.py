@@ -0,0 +1,23 @@
+""" Tests of the binary graph snapshots. """
+from pathlib import Path
+
+from src.modules.encoder.encoder_main import encode_graph_file_to_json
+from src.modules.globals import GRAPH_SNAPSHOT_BACKEND
+from src.modules.io_json import safe_load_json_file
+from tests.test_aux import get_test_list
+
+LIST_OF_TESTS = get_test_list()
+
+
+def test_graph_snapshot(tmp_path: Path) -> None:
+    """ Tests that graphs encoded from their binary snapshots (when written and when reused) return the expected JSON.
+    """
+
+    for input_file in LIST_OF_TESTS[:4]:
+        expected_json_data = safe_load_json_file(input_file.replace(".ttl", ".json"))
+
+        for _ in range(2):
+            resulting_json_data = encode_graph_file_to_json(input_file, str(tmp_path), GRAPH_SNAPSHOT_BACKEND)
+            assert resulting_json_data == expected_json_data
+
+    assert len(list(tmp_path.glob("*.snapshot"))) == 4
@@ -0,0 +1,81 @@
+""" Tests of the instrumentation of the encoding pipeline. """
+from pathlib import Path
+
+from src.main import encode_ontouml_graph2json
+from src.modules.arguments import treat_user_arguments
+from src.modules.encoder.encoder_main import encode_graph_file_to_json
+from src.modules.instrumentation import create_instrumentation_report, finish_instrumentation_report, \
+    measure_stage, save_instrumentation_report
+from src.modules.io_json import safe_load_json_file
+from tests.test_aux import get_test_list
+
+LIST_OF_TESTS = get_test_list()
+
+
+def assert_measured_stages(instrumentation_report: dict, list_stage_names: list[str]) -> None:
+    """ Asserts that a finished report has measured the received stages, in this order, with valid measures.
+
+    :param instrumentation_report: Finished instrumentation report.
+    :type instrumentation_report: dict
+    :param list_stage_names: Names of the stages expected in the report.
+    :type list_stage_names: list[str]
+    """
+
+    assert [stage["stage"] for stage in instrumentation_report["stages"]] == list_stage_names
+
+    for stage in instrumentation_report["stages"]:
+        assert stage["wall_time"] >= 0 and stage["cpu_time"] >= 0 and stage["peak_memory"] >= 0
+
+    assert instrumentation_report["total"]["wall_time"] >= 0
+    assert instrumentation_report["total"]["peak_memory"] >= 0
+
+
+def test_instrumentation_report(tmp_path: Path) -> None:
+    """ Tests that the stages measured by the caller and by the encoder are recorded in the report with their counts,
+    that the report is finished with its totals and that it is saved in a sidecar file next to the output file.
+
+    :param tmp_path: Temporary directory, provided by pytest.
+    :type tmp_path: Path
+    """
+
+    instrumentation_report = create_instrumentation_report()
+
+    with measure_stage(instrumentation_report, "prepare") as stage_counts:
+        stage_counts["files"] = 1
+
+    json_data = encode_graph_file_to_json(LIST_OF_TESTS[0], instrumentation_report=instrumentation_report)
+    finish_instrumentation_report(instrumentation_report)
+
+    assert json_data["type"] == "Project"
+    assert_measured_stages(instrumentation_report, ["prepare", "load", "create_data_dictionaries",
+                                                    "mount_json_dictionary"])
+    assert instrumentation_report["stages"][0]["counts"] == {"files": 1}
+    assert instrumentation_report["stages"][1]["counts"]["triples"] > 0
+    assert "started_tracemalloc" not in instrumentation_report
+
+    report_path = save_instrumentation_report(instrumentation_report, str(tmp_path / "model.json.gz"))
+
+    assert report_path == str(tmp_path / "model.report.json")
+    assert safe_load_json_file(report_path) == instrumentation_report
+
+
+def test_instrumentation_argument(tmp_path: Path) -> None:
+    """ Tests that the command line's instrumentation argument makes the encoding save its report next to the output
+    file, including the saving stage.
+
+    :param tmp_path: Temporary directory, provided by pytest.
+    :type tmp_path: Path
+    """
+
+    output_path = tmp_path / "output.json"
+    arguments = treat_user_arguments([LIST_OF_TESTS[0], "-i", "-o", str(output_path)])
+
+    assert arguments["instrumentation"]
+
+    encode_ontouml_graph2json(arguments["graph_path"], "test", instrumentation=arguments["instrumentation"],
+                              output_path=arguments["output_path"])
+
+    assert output_path.exists()
+    instrumentation_report = safe_load_json_file(str(tmp_path / "output.report.json"))
+    assert_measured_stages(instrumentation_report, ["load", "create_data_dictionaries", "mount_json_dictionary",
+                                                    "save"])
@@ -0,0 +1,96 @@
+""" Tests of the JSON output: key order, compression and output targets. """
+import gzip
+import io
+import json
+import lzma
+from pathlib import Path
+
+import pytest
+
+from src.main import encode_ontouml_graph2json
+from src.modules.io_json import safe_load_json_file, stream_json_data
+from tests.test_aux import get_test_list
+
+LIST_OF_TESTS = get_test_list()
+
+
+def test_output_key_order() -> None:
+    """ Tests that the generated JSON is written with the keys in the order of the OntoUML-Schema, exactly as in the
+    expected JSON files. """
+
+    for input_file in LIST_OF_TESTS[:4]:
+        resulting_json_data = encode_ontouml_graph2json(input_file, "test")
+        expected_json_data = safe_load_json_file(input_file.replace(".ttl", ".json"))
+
+        output_stream = io.StringIO()
+        stream_json_data(resulting_json_data, output_stream, 2)
+
+        assert output_stream.getvalue() == json.dumps(expected_json_data, indent=2)
+
+
+def test_output_compression(tmp_path: Path, capsysbinary: pytest.CaptureFixture) -> None:
+    """ Tests that compressed outputs and outputs written to the standard output contain exactly the uncompressed JSON
+    file, that compressed outputs are reproducible and that no temporary file is left behind.
+
+    :param tmp_path: Temporary directory, provided by pytest.
+    :type tmp_path: Path
+    :param capsysbinary: Fixture that captures the standard output as bytes, provided by pytest.
+    :type capsysbinary: pytest.CaptureFixture
+    """
+
+    for input_file in LIST_OF_TESTS[:4]:
+        expected_json_path = tmp_path / "expected.json"
+        json_data = encode_ontouml_graph2json(input_file, "test", output_path=str(expected_json_path))
+        expected_json_bytes = expected_json_path.read_bytes()
+
+        gzip_path = tmp_path / "resulting.json.gz"
+        encode_ontouml_graph2json(input_file, "test", output_path=str(gzip_path))
+        assert gzip.decompress(gzip_path.read_bytes()) == expected_json_bytes
+        assert safe_load_json_file(str(gzip_path)) == json_data
+
+        gzip_bytes = gzip_path.read_bytes()
+        encode_ontouml_graph2json(input_file, "test", output_path=str(gzip_path))
+        assert gzip_path.read_bytes() == gzip_bytes
+
+        xz_path = tmp_path / "resulting.json.xz"
+        encode_ontouml_graph2json(input_file, "test", memory_budget=0, output_path=str(xz_path))
+        assert lzma.decompress(xz_path.read_bytes()) == expected_json_bytes
+
+        capsysbinary.readouterr()
+        encode_ontouml_graph2json(input_file, "test", output_path="-")
+        assert capsysbinary.readouterr().out == expected_json_bytes
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["expected.json", "resulting.json.gz",
+                                                                "resulting.json.xz"]
+
+
+class RecordingStream(io.StringIO):
+    """ Text stream that records the size of each write. """
+
+    def __init__(self):
+        super().__init__()
+        self.list_write_sizes = []
+
+    def write(self, text: str) -> int:
+        self.list_write_sizes.append(len(text))
+        return super().write(text)
+
+
+@pytest.mark.parametrize("indent", [None, 2])
+def test_output_buffer_size(indent: int) -> None:
+    """ Tests that the buffer is written whenever it exceeds the buffer size, also inside a container with many values,
+    and that the output is the same as the one generated by json.dumps.
+
+    :param indent: Number of spaces used to indent the JSON output.
+    :type indent: int
+    """
+
+    json_data = {"id": "p1", "contents": [{"id": f"k{index}", "name": "x" * 50} for index in range(200)] +
+                 [f"value{index}" for index in range(2000)] + [index for index in range(2000)]}
+
+    output_stream = RecordingStream()
+    stream_json_data(json_data, output_stream, indent, buffer_size=1024)
+
+    assert output_stream.getvalue() == json.dumps(json_data, indent=indent)
+    assert len(output_stream.list_write_sizes) > 1
+    assert max(output_stream.list_write_sizes) < 1024 + 100
@@ -0,0 +1,51 @@
+""" Tests of the canonical comparison of JSON outputs used by the tests. """
+import copy
+from pathlib import Path
+
+from src.modules.io_json import safe_load_json_file
+from tests.test_aux import get_test_list, compare_json_files_data, get_json_differences
+
+LIST_OF_TESTS = get_test_list()
+
+
+def test_canonical_comparison() -> None:
+    """ Tests that the comparison ignores the order of identified objects and that only the differing subtrees are
+    reported as differences. """
+
+    expected_json_data = safe_load_json_file(LIST_OF_TESTS[7].replace(".ttl", ".json"))
+    resulting_json_data = copy.deepcopy(expected_json_data)
+    resulting_json_data["model"]["contents"].reverse()
+    assert compare_json_files_data(resulting_json_data, expected_json_data, "canonical")
+
+    # The first object of the reversed contents is the last one of the expected contents, and the last is the first
+    changed_object = resulting_json_data["model"]["contents"][0]
+    original_name = changed_object["name"]
+    changed_object["name"] = "changed name"
+    removed_object = resulting_json_data["model"]["contents"].pop()
+
+    assert not compare_json_files_data(resulting_json_data, expected_json_data, "canonical")
+    assert get_json_differences(resulting_json_data, expected_json_data) == {
+        "values_changed": {f"root['model']['contents'][id={changed_object['id']!r}]['name']":
+                           {"old_value": "changed name", "new_value": original_name}},
+        "items_added": {"root['model']['contents'][0]": removed_object}}
+    assert Path("results/canonical_diff.txt").exists()
+
+
+def test_canonical_comparison_unidentified_lists() -> None:
+    """ Tests that the comparison also ignores the order of lists without IDs, agreeing with the reported differences,
+    while it still detects their changed elements. """
+
+    expected_json_data = {"id": "p1", "type": "Project", "values": ["a", 1, None, {"type": "Point", "x": 1}, ["b", 2]]}
+    resulting_json_data = copy.deepcopy(expected_json_data)
+    resulting_json_data["values"].reverse()
+    resulting_json_data["values"][0].reverse()
+
+    assert compare_json_files_data(resulting_json_data, expected_json_data, "unidentified")
+    assert get_json_differences(resulting_json_data, expected_json_data) == {}
+
+    resulting_json_data["values"][0] = [2, "c"]
+
+    assert not compare_json_files_data(resulting_json_data, expected_json_data, "unidentified")
+    assert get_json_differences(resulting_json_data, expected_json_data) == {
+        "items_removed": {"root['values'][0]": [2, "c"]},
+        "items_added": {"root['values'][4]": ["b", 2]}}
@@ -10,7 +10,7 @@ from tests.test_aux import get_test_list, compare_json_files_data
 LIST_OF_TESTS = get_test_list()
 
 
-@pytest.mark.parametrize("input_file", LIST_OF_TESTS)
+@pytest.mark.parametrize("input_file", LIST_OF_TESTS, ids=[Path(input_file).stem for input_file in LIST_OF_TESTS])
 def test_ontouml_graph2json(input_file: str) -> None:
     """ Main function for testing the OntoUML Graph2JSON software.
 
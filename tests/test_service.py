@@ -0,0 +1,160 @@
+""" Tests of the local encoder service. """
+import json
+import multiprocessing
+import threading
+import time
+from contextlib import contextmanager
+from http.client import HTTPConnection
+from pathlib import Path
+from typing import Iterator
+
+from src.modules.io_json import safe_load_json_file
+from src.modules.service import EncoderService, create_service_server, ServiceHTTPServer, SERVICE_RETRY_AFTER
+from tests.test_aux import get_test_list
+
+LIST_OF_TESTS = get_test_list()
+
+
+@contextmanager
+def serve_encoder_service(encoder_service: EncoderService, **server_arguments) -> Iterator[ServiceHTTPServer]:
+    """ Serves the encoder service on a free localhost port in a background thread, stopping the server and the
+    service's workers on exit.
+
+    :param encoder_service: Pool of worker processes that encode the requests.
+    :type encoder_service: EncoderService
+    :param server_arguments: Further arguments of create_service_server (e.g., max_body_size).
+    :return: Running HTTP server.
+    :rtype: Iterator[ServiceHTTPServer]
+    """
+
+    service_server = create_service_server(encoder_service, port=0, **server_arguments)
+    threading.Thread(target=service_server.serve_forever, daemon=True).start()
+
+    try:
+        yield service_server
+    finally:
+        service_server.shutdown()
+        service_server.server_close()
+        encoder_service.shutdown()
+
+
+def request_service(service_server: ServiceHTTPServer, method: str, path: str, body=None,
+                    content_type: str = None) -> tuple:
+    """ Sends a request to the service and reads its response.
+
+    :param service_server: Running HTTP server.
+    :type service_server: ServiceHTTPServer
+    :param method: HTTP method.
+    :type method: str
+    :param path: Requested path.
+    :type path: str
+    :param body: Request's body, if any.
+    :type body: str | bytes
+    :param content_type: Content-Type of the request's body, if any.
+    :type content_type: str
+    :return: Response's status, headers and JSON content.
+    :rtype: tuple[int, HTTPMessage, dict]
+    """
+
+    connection = HTTPConnection(*service_server.server_address[:2])
+    connection.request(method, path, body, {"Content-Type": content_type} if content_type else {})
+    response = connection.getresponse()
+    response_data = json.loads(response.read())
+    connection.close()
+
+    return response.status, response.headers, response_data
+
+
+def test_service_encoding() -> None:
+    """ Tests that the encoder service returns the expected JSON for graph files and for graph payloads. """
+
+    input_file = LIST_OF_TESTS[0]
+    expected_json_data = safe_load_json_file(input_file.replace(".ttl", ".json"))
+
+    with serve_encoder_service(EncoderService(workers=1)) as service_server:
+        for body, content_type in [(json.dumps({"graph_path": input_file}), "application/json"),
+                                   (Path(input_file).read_bytes(), "text/turtle")]:
+            status, _, response_data = request_service(service_server, "POST", "/encode", body, content_type)
+
+            assert status == 200
+            assert response_data == expected_json_data
+
+
+def test_service_health() -> None:
+    """ Tests that the health request returns the service's status and bounds and that unknown paths are refused. """
+
+    with serve_encoder_service(EncoderService(workers=2, queue_size=3)) as service_server:
+        status, _, health_data = request_service(service_server, "GET", "/health")
+
+        assert status == 200
+        assert health_data["status"] == "ok"
+        assert (health_data["workers"], health_data["pending"], health_data["max_pending"]) == (2, 0, 5)
+
+        assert request_service(service_server, "GET", "/unknown")[0] == 404
+        assert request_service(service_server, "POST", "/unknown", b"{}", "application/json")[0] == 404
+
+
+def test_service_busy() -> None:
+    """ Tests that, when the maximum number of pending requests is reached, new requests are immediately refused with
+    503 and a Retry-After header, and that the pending request is still answered. The pending request waits for the
+    only worker, which is blocked by a task submitted directly to the pool until an event is set. """
+
+    encoder_service = EncoderService(workers=1, queue_size=0)
+    input_file = LIST_OF_TESTS[0]
+
+    with serve_encoder_service(encoder_service) as service_server, multiprocessing.Manager() as manager:
+        release_event = manager.Event()
+        encoder_service.executor.submit(release_event.wait, 60)
+
+        pending_response = {}
+        pending_thread = threading.Thread(target=lambda: pending_response.update(response=request_service(
+            service_server, "POST", "/encode", json.dumps({"graph_path": input_file}), "application/json")))
+        pending_thread.start()
+
+        try:
+            for _ in range(100):
+                if encoder_service.pending == 1:
+                    break
+                time.sleep(0.05)
+            assert request_service(service_server, "GET", "/health")[2]["pending"] == 1
+
+            status, headers, response_data = request_service(service_server, "POST", "/encode",
+                                                             Path(input_file).read_bytes(), "text/turtle")
+
+            assert status == 503
+            assert headers["Retry-After"] == str(SERVICE_RETRY_AFTER)
+            assert "busy" in response_data["error"]
+        finally:
+            release_event.set()
+            pending_thread.join()
+
+    assert pending_response["response"][0] == 200
+    assert pending_response["response"][2] == safe_load_json_file(input_file.replace(".ttl", ".json"))
+
+
+def test_service_request_errors() -> None:
+    """ Tests that oversized bodies are refused with 413 without being read, that graphs that cannot be parsed or
+    encoded are answered with 422 and that invalid bodies are refused with 400 or 415. """
+
+    with serve_encoder_service(EncoderService(workers=1), max_body_size=0) as service_server:
+        status, _, response_data = request_service(service_server, "POST", "/encode", b"<a> <b> <c> .", "text/turtle")
+
+        assert status == 413
+        assert "exceeds 0 bytes" in response_data["error"]
+
+    with serve_encoder_service(EncoderService(workers=1)) as service_server:
+        list_unprocessable_requests = [
+            (b"this is not turtle", "text/turtle"),
+            # Valid graph without any OntoUML object
+            (b"<http://example.org/a> <http://example.org/b> <http://example.org/c> .", "text/turtle"),
+            (json.dumps({"graph_path": "missing_graph.ttl"}), "application/json")]
+
+        for body, content_type in list_unprocessable_requests:
+            status, _, response_data = request_service(service_server, "POST", "/encode", body, content_type)
+
+            assert status == 422
+            assert response_data["error"].startswith("The graph could not be encoded.")
+
+        assert request_service(service_server, "POST", "/encode", b"not json", "application/json")[0] == 400
+        assert request_service(service_server, "POST", "/encode", b"{}", "application/json")[0] == 400
+        assert request_service(service_server, "POST", "/encode", b"graph", "image/png")[0] == 415
@@ -0,0 +1,132 @@
+""" Tests of the persistent SQLite store. """
+from pathlib import Path
+
+import pytest
+from rdflib import BNode, Graph, Literal, Namespace, RDF, URIRef, XSD
+from rdflib.store import NO_STORE
+
+from src.modules import sqlite_store
+from src.modules.globals import GRAPH_STORE_BACKEND_DEFAULT
+from src.modules.io_graph import load_all_graph_safely
+from tests.test_aux import get_test_list
+
+LIST_OF_TESTS = get_test_list()
+
+EXAMPLE = Namespace("https://example.org#")
+
+
+def open_store_graph(store_path: Path, create: bool = True) -> Graph:
+    """ Opens a graph kept in the SQLite store of the received database file.
+
+    :param store_path: Path of the store's database file.
+    :type store_path: Path
+    :param create: Indicates if the database file must be created if it does not exist.
+    :type create: bool
+    :return: Graph kept in the SQLite store.
+    :rtype: Graph
+    """
+
+    store_graph = Graph(store=GRAPH_STORE_BACKEND_DEFAULT)
+    store_graph.open(str(store_path), create=create)
+    return store_graph
+
+
+def test_store_add_and_remove(tmp_path: Path) -> None:
+    """ Tests that added triples (with all kinds of terms) are returned as they were added, that repeated triples are
+    ignored and that triples are removed both individually and by pattern.
+
+    :param tmp_path: Temporary directory, provided by pytest.
+    :type tmp_path: Path
+    """
+
+    list_triples = [(EXAMPLE.a, RDF.type, EXAMPLE.Class),
+                    (EXAMPLE.a, EXAMPLE.name, Literal("A", lang="en")),
+                    (EXAMPLE.a, EXAMPLE.order, Literal(1)),
+                    (EXAMPLE.a, EXAMPLE.isAbstract, Literal("false", datatype=XSD.boolean)),
+                    (EXAMPLE.b, EXAMPLE.view, BNode("view"))]
+
+    store_graph = open_store_graph(tmp_path / "store.sqlite")
+    try:
+        for triple in list_triples + list_triples[:2]:
+            store_graph.add(triple)
+
+        assert len(store_graph) == len(list_triples)
+        assert list(store_graph) == list_triples
+        assert all(triple in store_graph for triple in list_triples)
+
+        store_graph.remove(list_triples[1])
+        assert list_triples[1] not in store_graph and len(store_graph) == len(list_triples) - 1
+
+        store_graph.remove((EXAMPLE.a, None, None))
+        assert list(store_graph) == list_triples[4:]
+
+        store_graph.remove((EXAMPLE.c, None, None))
+        assert len(store_graph) == 1
+    finally:
+        store_graph.close()
+
+
+@pytest.mark.parametrize("fetch_rows_size", [1, 1000])
+def test_store_pattern_order(fetch_rows_size: int, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """ Tests that all triples are returned in insertion order and that the triples matching each kind of pattern
+    are returned in the same order as in the in-memory store, also when their rows are read one at a time.
+
+    :param fetch_rows_size: Number of rows read at a time from the database.
+    :type fetch_rows_size: int
+    :param tmp_path: Temporary directory, provided by pytest.
+    :type tmp_path: Path
+    :param monkeypatch: Patching fixture, provided by pytest.
+    :type monkeypatch: pytest.MonkeyPatch
+    """
+
+    monkeypatch.setattr(sqlite_store, "FETCH_ROWS_SIZE", fetch_rows_size)
+
+    # Both graphs receive the triples in the same order, with the triples of each subject interleaved with others
+    list_triples = sorted(load_all_graph_safely(LIST_OF_TESTS[7]), key=lambda triple: triple[2])
+    memory_graph = Graph()
+    store_graph = open_store_graph(tmp_path / "store.sqlite")
+    try:
+        for triple in list_triples:
+            memory_graph.add(triple)
+            store_graph.add(triple)
+        s, p, o = list_triples[len(list_triples) // 2]
+
+        assert list(store_graph) == list_triples
+
+        for triple_pattern in [(s, None, None), (None, p, None), (None, None, o), (s, p, None), (s, None, o),
+                               (None, p, o), (s, p, o), (EXAMPLE.missing, None, None)]:
+            assert list(store_graph.triples(triple_pattern)) == list(memory_graph.triples(triple_pattern))
+
+        assert list(store_graph.subject_objects(RDF.type)) == list(memory_graph.subject_objects(RDF.type))
+    finally:
+        store_graph.close()
+
+
+def test_store_persistence(tmp_path: Path) -> None:
+    """ Tests that committed triples and namespaces are kept when the store is opened again, and that a store that does
+    not exist is only opened if it is created.
+
+    :param tmp_path: Temporary directory, provided by pytest.
+    :type tmp_path: Path
+    """
+
+    store_path = tmp_path / "store.sqlite"
+
+    assert Graph(store=GRAPH_STORE_BACKEND_DEFAULT).open(str(store_path), create=False) == NO_STORE
+
+    memory_graph = load_all_graph_safely(LIST_OF_TESTS[7])
+    store_graph = open_store_graph(store_path)
+    store_graph.bind("example", EXAMPLE)
+    store_graph.addN((s, p, o, store_graph) for s, p, o in memory_graph)
+    store_graph.commit()
+    store_graph.add((EXAMPLE.a, RDF.type, EXAMPLE.Uncommitted))
+    store_graph.rollback()
+    store_graph.close()
+
+    store_graph = open_store_graph(store_path, create=False)
+    try:
+        assert list(store_graph) == list(memory_graph)
+        assert store_graph.store.namespace("example") == URIRef(EXAMPLE)
+        assert store_graph.store.prefix(EXAMPLE) == "example"
+    finally:
+        store_graph.close()
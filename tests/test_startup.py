@@ -0,0 +1,45 @@
+""" Tests of the start-up of the main module. """
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+# Maximum time, in seconds, for importing the main module (measured around 0.08 seconds; 0.25 before lazy imports).
+# As it depends on the machine and on its load, the default is generous and it may be tightened in the environment.
+IMPORT_TIME_BUDGET = float(os.environ.get("IMPORT_TIME_BUDGET", 2.0))
+
+# Modules that must only be imported when a graph is actually encoded
+LIST_OF_LAZY_MODULES = ["rdflib", "toml", "concurrent.futures", "modules.encoder.encoder_main"]
+
+
+def test_startup_import_time(tmp_path: Path) -> None:
+    """ Tests that importing the main module has no side effects (i.e., no arguments parsed, no metadata read and no log
+    files created), that neither it nor the arguments module import the modules that are only needed for encoding (e.g.,
+    rdflib), and that it is done within the import time budget.
+
+    :param tmp_path: Temporary working directory, provided by pytest.
+    :type tmp_path: Path
+    """
+
+    root_directory = Path(__file__).resolve().parents[1]
+    environment = dict(os.environ, PYTHONPATH=os.pathsep.join([str(root_directory), str(root_directory / "src")]))
+
+    startup_script = ("import json, sys, time\n"
+                      "st = time.perf_counter()\n"
+                      "import main\n"
+                      "import_time = time.perf_counter() - st\n"
+                      "import modules.arguments\n"
+                      "print(json.dumps({'import_time': import_time, 'modules': sorted(sys.modules)}))")
+
+    # Arguments that would be invalid if they were parsed at import time
+    process = subprocess.run([sys.executable, "-c", startup_script, "--invalid-argument"], cwd=tmp_path,
+                             env=environment, capture_output=True, text=True)
+    assert process.returncode == 0, process.stderr
+
+    startup_data = json.loads(process.stdout)
+    imported_lazy_modules = [module for module in LIST_OF_LAZY_MODULES if module in startup_data["modules"]]
+
+    assert not imported_lazy_modules
+    assert not (tmp_path / "logs").exists()
+    assert startup_data["import_time"] < IMPORT_TIME_BUDGET